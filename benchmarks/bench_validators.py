@@ -0,0 +1,256 @@
+#!/usr/bin/env python
+
+#  Copyright 2019 Jeremy Schulman, nwkautomaniac@gmail.com
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""
+Micro-benchmarks of the NRFU validators, on synthetic devices of each size;
+see nrfupytesteos/synthetic.py:
+
+    bench_validators.py
+
+    bench_validators.py --size large -k cabling
+
+    bench_validators.py --save-baseline
+
+Each benchmark is timed as the best of `--repeat` rounds, each round running
+the benchmark for at least `--min-time` seconds, and reported in operations per
+second, with the peak memory allocated by one operation.  The benchmarks are:
+
+    <test-case>:<size>
+        one `evaluate_all` of the NRFU module over all the test-cases of the
+        device, from the projected show output, as run by engine.run_device
+
+    <test-case>:per-case:<size>
+        one call of the `test_*` function of the NRFU module for each of the
+        test-cases of the device, as run by the pytest test functions
+
+    shorten_if_name:<size>
+        one `Device.shorten_if_name` call, over each interface name
+
+    sorted_interfaces:<size>
+        one `sorted_interfaces` call of all the interface names
+
+The results are compared to the baselines file, and the benchmarks slower, or
+allocating more, than the baseline by more than `--threshold` percent are
+reported as regressions, and the exit status is 1.
+"""
+
+from pathlib import Path
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+
+from nrfupytesteos.eos_device import Device, sorted_interfaces
+from nrfupytesteos.nrfu_exc import NrfuError
+from nrfupytesteos import synthetic, engine
+
+BASELINES_FILE = Path(__file__).with_name('baselines.json')
+
+
+def timeit(func, min_time, repeat):
+    """ Returns the best time of one call of func, in seconds """
+
+    # find the number of calls that run for at least min_time, and then take
+    # the best of the rounds of that number of calls.
+
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            break
+        number *= 2 if elapsed == 0 else max(2, min(10, int(min_time / elapsed) + 1))
+
+    best = elapsed / number
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        best = min(best, (time.perf_counter() - start) / number)
+
+    return best
+
+
+def peak_memory(func):
+    """ Returns the peak memory allocated by one call of func, in bytes """
+    tracemalloc.start()
+    try:
+        base, _ = tracemalloc.get_traced_memory()
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return peak - base
+
+
+def test_function(nrfu):
+    """ Returns the `test_*` function of the NRFU module """
+    return next(func for name, func in vars(nrfu).items()
+                if name.startswith('test_') and callable(func))
+
+
+def make_benchmarks(size):
+    """ Yields the (name, func) of the benchmarks of the synthetic device size """
+    device = synthetic.make_device(synthetic.make_outputs(**synthetic.SIZES[size]))
+    nrfu_testcases = synthetic.make_testcases(device)
+
+    # the validators run from the projected output, as when run by the engine
+
+    device.invalidate()
+    engine.fetch(device, engine.plan_commands(nrfu_testcases),
+                 engine.plan_projections(nrfu_testcases))
+
+    for nrfu, testcases in nrfu_testcases.items():
+        actual = nrfu.snapshot_testdata(device)
+
+        def evaluate(nrfu=nrfu, actual=actual, testcases=testcases):
+            nrfu.evaluate_all(device, actual, testcases)
+
+        yield f"{nrfu.TEST_CASE_NAME}:{size}", evaluate
+
+        # the pytest test functions call the module test function once per
+        # test-case, which raises on failure.
+
+        test_func = test_function(nrfu)
+
+        def test_each(test_func=test_func, actual=actual, testcases=testcases):
+            for testcase in testcases:
+                try:
+                    test_func(device, actual, testcase)
+                except NrfuError:
+                    pass
+
+        yield f"{nrfu.TEST_CASE_NAME}:per-case:{size}", test_each
+
+    if_names = list(device.execute('show interfaces')['interfaces'])
+
+    def shorten_if_name():
+        for if_name in if_names:
+            Device.shorten_if_name(if_name)
+
+    def sort_interfaces():
+        sorted_interfaces(if_names)
+
+    yield f"shorten_if_name:{size}", shorten_if_name, len(if_names)
+    yield f"sorted_interfaces:{size}", sort_interfaces
+
+
+def run_benchmarks(sizes, keyword, min_time, repeat):
+    """ Returns the results, a dict, key: benchmark name, value: dict of measures """
+    results = dict()
+
+    for size in sizes:
+        for name, func, *calls in make_benchmarks(size):
+            if keyword and keyword not in name:
+                continue
+
+            calls = calls[0] if calls else 1
+            seconds = timeit(func, min_time, repeat)
+
+            results[name] = dict(ops_per_sec=round(calls / seconds, 1),
+                                 peak_bytes=peak_memory(func) // calls)
+
+            print(f"{name:44} {results[name]['ops_per_sec']:>14,.1f} ops/s "
+                  f"{results[name]['peak_bytes']:>12,} B peak", flush=True)
+
+    return results
+
+
+def compare(results, baselines, threshold):
+    """ Returns the names of the benchmarks that regressed from the baselines """
+    regressions = list()
+
+    print(f"\n{'benchmark':44} {'ops/s':>8} {'peak':>8}   (change from baseline)")
+
+    for name, result in results.items():
+        baseline = baselines.get(name)
+        if not baseline:
+            print(f"{name:44} {'new':>8}")
+            continue
+
+        speed = 100 * (result['ops_per_sec'] / baseline['ops_per_sec'] - 1)
+        memory = (100 * (result['peak_bytes'] / baseline['peak_bytes'] - 1)
+                  if baseline['peak_bytes'] else 0.0)
+
+        regressed = speed < -threshold or memory > threshold
+        if regressed:
+            regressions.append(name)
+
+        print(f"{name:44} {speed:>+7.1f}% {memory:>+7.1f}%"
+              f"{'   REGRESSION' if regressed else ''}")
+
+    return regressions
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Benchmark the NRFU validators')
+
+    parser.add_argument('--size', dest='sizes', action='append',
+                        choices=list(synthetic.SIZES),
+                        help='synthetic device size, by default all sizes')
+
+    parser.add_argument('-k', dest='keyword',
+                        help='only the benchmarks whose name contains the keyword')
+
+    parser.add_argument('--min-time', type=float, default=0.2,
+                        help='minimum time of each round, in seconds')
+
+    parser.add_argument('--repeat', type=int, default=5,
+                        help='number of rounds of each benchmark')
+
+    parser.add_argument('--baselines', type=Path, default=BASELINES_FILE,
+                        help='the baselines file')
+
+    parser.add_argument('--threshold', type=float, default=25.0,
+                        help='percent slower, or more memory, reported as a regression')
+
+    parser.add_argument('--save-baseline', action='store_true',
+                        help='save the results into the baselines file')
+
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    results = run_benchmarks(args.sizes or list(synthetic.SIZES), args.keyword,
+                             args.min_time, args.repeat)
+
+    baselines = (json.loads(args.baselines.read_text())
+                 if args.baselines.exists() else dict())
+
+    if args.save_baseline:
+        baselines.update(results)
+        args.baselines.write_text(json.dumps(baselines, indent=2, sort_keys=True) + '\n')
+        print(f"\nsaved {len(results)} baselines to {args.baselines}")
+        return 0
+
+    if not baselines:
+        return 0
+
+    regressions = compare(results, baselines, args.threshold)
+    if regressions:
+        print(f"\n{len(regressions)} regressions over {args.threshold}%")
+        return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,228 @@
+#  Copyright 2019 Jeremy Schulman, nwkautomaniac@gmail.com
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""
+This file contains the `nrfu` command, which runs the NRFU test-cases with the
+NRFU engine rather than pytest, and streams the results as they complete.  The
+options match those of the pytest plugin:
+
+    nrfu --device dev1 --testcasedir dev1-testcases --replay dev1-show-outputs
+
+    nrfu --inventory pod1.txt --testcasedir pod1-testcases --format jsonl
+
+    nrfu --inventory pod1.txt --testcasedir pod1-testcases --watch 10
+
+    nrfu --inventory pod1.txt --testcasedir pod1-testcases --trace pod1-trace.json
+
+The exit status is 0 when all test-cases pass, and 1 otherwise.  In watch mode
+the status is that of the last verdict of each test-case when all pass, or the
+watch is interrupted.
+"""
+
+from collections import Counter
+from pathlib import Path
+import argparse
+import sys
+
+from nrfupytesteos import engine
+from nrfupytesteos import tracing
+from nrfupytesteos.eapi_capture import RecordTransport
+from nrfupytesteos.testcase_store import TestcaseStore
+from nrfupytesteos.results_store import ResultsStore, dumps
+from nrfupytesteos.report import ReportWriter, build_html
+
+__all__ = ['main']
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='nrfu', description='Run the NRFU test-cases without pytest')
+
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument('--device', help='device name or IP address')
+    target.add_argument('--inventory',
+                        help='file of device names, one per line, to test as a fleet')
+
+    parser.add_argument('--testcasedir', required=True,
+                        help='directory storing device test-case files, in fleet '
+                             'mode a sub-directory per device; or a test-case '
+                             'store file')
+
+    parser.add_argument('--ssh-config', help='path to SSH config file')
+
+    parser.add_argument('--replay',
+                        help='use the captured show output at this path rather '
+                             'than the live device')
+
+    parser.add_argument('--record',
+                        help='capture the device show output to this path')
+
+    parser.add_argument('--max-workers', type=int, default=16,
+                        help='maximum number of devices run concurrently')
+
+    parser.add_argument('--format', choices=('text', 'jsonl'), default='text',
+                        help='the result output format')
+
+    parser.add_argument('--failures-only', action='store_true',
+                        help='output only the test-cases that do not pass')
+
+    parser.add_argument('--results-db',
+                        help='append the results to this results store file')
+
+    parser.add_argument('--report',
+                        help='stream the results to this report directory, and '
+                             'build its paginated HTML report')
+
+    parser.add_argument('--durations', action='store_true',
+                        help='time the check of each test-case for the results '
+                             'store and report, rather than each module as a whole')
+
+    parser.add_argument('--watch', type=float, metavar='SECONDS',
+                        help='run again, every SECONDS, only the test-cases that '
+                             'do not pass until all pass, and output their '
+                             'verdict changes')
+
+    parser.add_argument('--trace',
+                        help='write the span trace of the run to this Chrome '
+                             'trace JSON file')
+
+    return parser.parse_args(argv)
+
+
+def format_text(result, previous=None):
+    verdict = result.verdict.upper()
+    if previous:
+        verdict = f"{previous.upper()}->{verdict}"
+
+    line = f"{verdict:5} {result.hostname} {result.test_case} {result.name}"
+    if result.message:
+        line += '\n' + '\n'.join('      ' + msg_line for msg_line in result.message.splitlines())
+    return line
+
+
+def format_jsonl(result, previous=None):
+    data = result._asdict()
+    if previous:
+        data['previous'] = previous
+
+    return dumps(data)
+
+
+def watch_results(args, hostnames, testcases_for, device_for, formatter, record):
+    """
+    Returns the final verdict of each test-case, outputting the results of the
+    first round and then each verdict change.
+    """
+    verdicts = dict()
+
+    try:
+        for previous, result in engine.watch(hostnames, testcases_for, device_for,
+                                             interval=args.watch,
+                                             max_workers=args.max_workers,
+                                             durations=args.durations):
+            # the test-cases of a type can have the same name, for example
+            # the same interface with other params, so the params are part of
+            # the key.
+
+            verdicts[(*result[:3], dumps(result.params))] = result.verdict
+            record(result)
+            if previous is None and args.failures_only and result.verdict == 'pass':
+                continue
+            print(formatter(result, previous), flush=True)
+
+    except KeyboardInterrupt:
+        pass
+
+    return verdicts.values()
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    if args.trace:
+        tracing.start()
+
+    fleet = bool(args.inventory)
+    hostnames = engine.load_inventory(args.inventory) if fleet else [args.device]
+    testcases_dir = Path(args.testcasedir)
+    devices = dict()
+
+    def host_path(path, hostname):
+        return Path(path) / hostname if path and fleet else path
+
+    def testcases_for(hostname):
+        if TestcaseStore.is_store(testcases_dir):
+            return engine.load_testcases(testcases_dir, dut=hostname)
+        return engine.load_testcases(host_path(testcases_dir, hostname))
+
+    def device_for(hostname):
+        devices[hostname] = engine.make_device(
+            hostname, ssh_config_file=args.ssh_config,
+            replay=host_path(args.replay, hostname),
+            record=host_path(args.record, hostname))
+        return devices[hostname]
+
+    formatter = format_jsonl if args.format == 'jsonl' else format_text
+    counts = Counter()
+
+    # the results are added to the results store and the report from this
+    # thread; in watch mode these have the first round and then each verdict
+    # change.
+
+    results_db = ResultsStore(args.results_db) if args.results_db else None
+    run_id = results_db.start_run('nrfu') if results_db is not None else None
+    report = ReportWriter(args.report) if args.report else None
+
+    def record(result):
+        if results_db is not None:
+            results_db.add_result(run_id, result)
+        if report is not None:
+            report.write(result)
+
+    if args.watch is not None:
+        counts.update(watch_results(args, hostnames, testcases_for, device_for,
+                                    formatter, record))
+
+    else:
+        for result in engine.run(hostnames, testcases_for, device_for,
+                                 max_workers=args.max_workers,
+                                 durations=args.durations):
+            counts[result.verdict] += 1
+            record(result)
+            if args.failures_only and result.verdict == 'pass':
+                continue
+            print(formatter(result), flush=True)
+
+    if results_db is not None:
+        results_db.close()
+
+    if report is not None:
+        report.close()
+        build_html(report.directory / ReportWriter.JSONL_FILE, report.directory)
+
+    for dev in devices.values():
+        if isinstance(dev.api, RecordTransport):
+            dev.api.save()
+
+    if args.trace:
+        tracing.save(args.trace)
+
+    summary = ', '.join(f"{counts[verdict]} {verdict}" for verdict in ('pass', 'fail', 'error'))
+    print(f"{len(hostnames)} devices: {summary}", file=sys.stderr)
+
+    return 0 if counts['pass'] == sum(counts.values()) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -12,11 +12,52 @@
 #  See the License for the specific language governing permissions and
 #  limitations under the License.
 
+"""
+This file contains the pytest NRFU options, hooks and fixtures that are shared
+by the NRFU test directories; import them into the `conftest.py` of the test
+directory.
+
+A run is either for a single device, using --nrfu-device, or for a fleet of
+devices listed in an inventory file, using --nrfu-inventory.  In fleet mode the
+--nrfu-testcasedir directory contains a sub-directory of test-case files for
+each device, as created by `nrfu-snapshot.py`, and every test is parametrized
+over the devices so that one pytest session produces one consolidated report.
+
+The plugin is a thin adapter on the NRFU engine (see engine.py), which does the
+device creation, command planning and fetching; the `nrfu` command runs the same
+engine without pytest.
+"""
+
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import hashlib
+import json
+import pickle
+
 import pytest
 from nrfupytesteos import Device
+from nrfupytesteos.eapi_capture import RecordTransport
+from nrfupytesteos.testcase_store import TestcaseStore
+from nrfupytesteos.results_store import ResultsStore
+from nrfupytesteos.report import ReportWriter, build_html
+from nrfupytesteos.nrfu_exc import NrfuError
+from nrfupytesteos import engine
+from nrfupytesteos import tracing
+from nrfupytesteos.engine import plan_projections, load_inventory
 
 __all__ = [
     'pytest_addoption',
+    'pytest_configure',
+    'pytest_collection_finish',
+    'pytest_runtest_call',
+    'pytest_runtest_makereport',
+    'pytest_sessionfinish',
+    'nrfu_parametrize',
+    'plan_commands',
+    'plan_projections',
+    'load_inventory',
+    'NRFUconfig',
     'device',
     'Device'
 ]
@@ -24,18 +65,440 @@ __all__ = [
 
 def pytest_addoption(parser):
     parser.addoption("--nrfu-device",
-                     required=True,
                      help='device name or IP address')
 
+    parser.addoption("--nrfu-inventory",
+                     help='file of device names, one per line, to test as a fleet')
+
+    parser.addoption("--nrfu-max-workers",
+                     type=int, default=16,
+                     help='maximum number of fleet devices fetched concurrently')
+
     parser.addoption("--nrfu-testcasedir",
                      required=True,
-                     help='directory storing device test-case files')
+                     help='directory storing device test-case files, or a '
+                          'test-case store file')
 
     parser.addoption("--ssh-config", help='path to SSH config file')
 
+    parser.addoption("--nrfu-replay",
+                     help='use the captured show output at this path rather '
+                          'than the live device')
+
+    parser.addoption("--nrfu-record",
+                     help='capture the device show output to this path')
+
+    parser.addoption("--nrfu-results-db",
+                     help='append the test results to this results store file')
+
+    parser.addoption("--nrfu-report",
+                     help='stream the test results to this report directory, '
+                          'and build its paginated HTML report')
+
+    parser.addoption("--nrfu-trace",
+                     help='write the span trace of the run to this Chrome trace '
+                          'JSON file')
+
+    parser.addoption("--nrfu-no-collect-cache",
+                     action='store_true',
+                     help='always parse the test-case files rather than using '
+                          'the collection cache')
+
+
+class NRFUconfig(object):
+    """
+    for NRFU specific config / runtime, stored as `config._nrfu`
+
+    Attributes
+    ----------
+    hostnames : list[str]
+        The names of the devices under test.
+
+    fleet : bool
+        True when the devices were given by the --nrfu-inventory option.
+
+    testcases_dir : Path
+        The directory storing the test-case files, or a test-case store file.
+
+    store : TestcaseStore
+        The test-case store when --nrfu-testcasedir is a store file, otherwise
+        None.
+
+    devices : dict
+        key: hostname, value: Device instance
+
+    errors : dict
+        key: hostname, value: the exception raised while fetching from the device
+
+    modules : set
+        The NRFU modules used by the collected test files.
+
+    make_device : callable
+        Called with the hostname to create the Device instance; the test
+        directory conftest can replace this function.
+
+    collect_cache_dir : Path
+        The directory of the collection cache, None when the cache is not
+        used; see `load_testcases`.
+
+    results_db : ResultsStore
+        The results store of the --nrfu-results-db option, otherwise None.
+
+    run_id : int
+        The id of this session in the results store.
+
+    report : ReportWriter
+        The report writer of the --nrfu-report option, otherwise None.
+    """
+    def __init__(self, config):
+        self.config = config
+        self.testcases_dir = Path(config.option.nrfu_testcasedir).absolute()
+        self.store = None
+
+        if TestcaseStore.is_store(self.testcases_dir):
+            if not self.testcases_dir.is_file():
+                raise pytest.UsageError(f'test-case store not found: {self.testcases_dir}')
+
+            self.store = TestcaseStore(self.testcases_dir, readonly=True)
+
+        inventory = config.option.nrfu_inventory
+        self.fleet = bool(inventory)
+        self.hostnames = (load_inventory(inventory) if inventory
+                          else [config.option.nrfu_device])
+
+        self.devices = dict()
+        self.errors = dict()
+        self.modules = set()
+        self.make_device = self._make_device
+
+        # the collection cache is stored in the pytest cache directory, so it
+        # is not used when the cacheprovider plugin is disabled.
+
+        cache = getattr(config, 'cache', None)
+        self.collect_cache_dir = (
+            Path(cache.makedir('nrfu-testcases'))
+            if cache is not None and not config.option.nrfu_no_collect_cache
+            else None)
+
+        results_db = config.option.nrfu_results_db
+        self.results_db = ResultsStore(results_db) if results_db else None
+        self.run_id = self.results_db.start_run('pytest') if results_db else None
+
+        report_dir = config.option.nrfu_report
+        self.report = ReportWriter(report_dir) if report_dir else None
+
+    @property
+    def device(self):
+        """ the Device instance when not in fleet mode """
+        return self.get_device(self.hostnames[0])
+
+    @device.setter
+    def device(self, dev):
+        self.devices[dev.hostname] = dev
+
+    def get_device(self, hostname):
+        dev = self.devices.get(hostname)
+        if dev is None:
+            dev = self.devices[hostname] = self.make_device(hostname)
+        return dev
+
+    def testcases_file(self, hostname, filename):
+        if self.store is not None:
+            return self.testcases_dir
+        if self.fleet:
+            return self.testcases_dir / hostname / filename
+        return self.testcases_dir / filename
+
+    def load_testcases(self, testcases_file, nrfu, hostname):
+        """
+        Returns the test-cases of the file and the test name of each, as
+        given by the `nrfu.name_test` function.  When using a test-case store,
+        the test-cases of the device and NRFU module type are read from the
+        store.
+
+        The parsed test-cases and names are cached, keyed by the file path,
+        modification time and size, so that re-collecting unchanged test-case
+        files does not parse them again.
+
+        Returns
+        -------
+        tuple - (list of test-cases, list of test names)
+        """
+        with tracing.span('nrfu.load_testcases', device=hostname, test_case=nrfu.TEST_CASE_NAME):
+            return self._load_testcases(testcases_file, nrfu, hostname)
+
+    def _load_testcases(self, testcases_file, nrfu, hostname):
+        stat = testcases_file.stat()
+        stamp = (stat.st_mtime_ns, stat.st_size, Path(nrfu.__file__).stat().st_mtime_ns)
+        cache_file = None
+
+        if self.collect_cache_dir is not None:
+            key = f"{testcases_file}:{hostname}:{nrfu.__name__}".encode()
+            cache_file = self.collect_cache_dir / f"{hashlib.sha1(key).hexdigest()}.pickle"
+
+            try:
+                with cache_file.open('rb') as ifile:
+                    cached = pickle.load(ifile)
+                if cached['stamp'] == stamp:
+                    return cached['testcases'], cached['names']
+
+            except (OSError, EOFError, pickle.PickleError, KeyError):
+                pass
+
+        if self.store is not None:
+            testcases = list(self.store.iter(dut=hostname, test_case=nrfu.TEST_CASE_NAME))
+        else:
+            with testcases_file.open() as ifile:
+                testcases = json.load(ifile)
+
+        names = [nrfu.name_test(testcase) for testcase in testcases]
+
+        if cache_file is not None:
+            tmp_file = cache_file.with_suffix('.tmp')
+            with tmp_file.open('wb') as ofile:
+                pickle.dump(dict(stamp=stamp, testcases=testcases, names=names),
+                            ofile, protocol=pickle.HIGHEST_PROTOCOL)
+            tmp_file.replace(cache_file)
+
+        return testcases, names
+
+    def _capture_path(self, path, hostname):
+        return Path(path) / hostname if self.fleet else path
+
+    def _make_device(self, hostname):
+        option = self.config.option
+
+        return engine.make_device(
+            hostname, ssh_config_file=option.ssh_config,
+            replay=option.nrfu_replay and self._capture_path(option.nrfu_replay, hostname),
+            record=option.nrfu_record and self._capture_path(option.nrfu_record, hostname))
+
+
+def pytest_configure(config):
+    if not (config.option.nrfu_device or config.option.nrfu_inventory):
+        raise pytest.UsageError('one of --nrfu-device or --nrfu-inventory is required')
+
+    if config.option.nrfu_trace:
+        tracing.start()
+
+    config._nrfu = NRFUconfig(config)
+
+
+def nrfu_parametrize(metafunc, nrfu, filename):
+    """
+    Parametrize the test function with the test-cases stored in the `filename`
+    file of the device test-case directory, or with the test-cases of the NRFU
+    module type in the test-case store.  In fleet mode the test function
+    is parametrized with the (device, testcase) combinations of all devices.
+
+    Parameters
+    ----------
+    metafunc : Metafunc instance used to parametrize the test function
+    nrfu : module - the NRFU module of the test-cases
+    filename : str - the name of the test-case file
+    """
+    nrfu_cfg = metafunc.config._nrfu
+    nrfu_cfg.modules.add(nrfu)
+
+    if not nrfu_cfg.fleet:
+        hostname = nrfu_cfg.hostnames[0]
+        testcases_file = nrfu_cfg.testcases_file(None, filename)
+        if not testcases_file.exists():
+            metafunc.parametrize('testcase', [], ids=['no-tests'])
+            return
+
+        testcases, names = nrfu_cfg.load_testcases(testcases_file, nrfu, hostname)
+        metafunc.parametrize('testcase', testcases, ids=names or ['no-tests'])
+        return
+
+    params, ids = list(), list()
+
+    for hostname in nrfu_cfg.hostnames:
+        testcases_file = nrfu_cfg.testcases_file(hostname, filename)
+        if not testcases_file.exists():
+            continue
+
+        testcases, names = nrfu_cfg.load_testcases(testcases_file, nrfu, hostname)
+        params.extend((hostname, testcase) for testcase in testcases)
+        ids.extend(f"{hostname}:{name}" for name in names)
+
+    # the device is parametrized indirectly and scoped by module so that the
+    # module scoped show output fixtures are evaluated once per device.
+
+    metafunc.parametrize('device,testcase', params, ids=ids,
+                         indirect=['device'], scope='module')
+
+
+def plan_commands(nrfu_cfg, items):
+    """
+    Determine the show commands needed by the selected test items of each
+    device; see `engine.plan_commands`.
+
+    Returns
+    -------
+    dict
+        key: hostname, value: dict of the planned commands, where the key is
+        the command to fetch and the value is the module SHOW_COMMAND to fetch
+        instead if the planned command fails.
+    """
+    nrfu_by_name = {nrfu.TEST_CASE_NAME: nrfu for nrfu in nrfu_cfg.modules}
+    selected = defaultdict(lambda: defaultdict(list))
+
+    for item in items:
+        params = getattr(getattr(item, 'callspec', None), 'params', {})
+        testcase = params.get('testcase')
+        if not isinstance(testcase, dict):
+            continue
+
+        nrfu = nrfu_by_name.get(testcase.get('test-case'))
+        if nrfu is None:
+            continue
+
+        hostname = params.get('device', nrfu_cfg.hostnames[0])
+        selected[hostname][nrfu].append(testcase)
+
+    return {hostname: engine.plan_commands(nrfu_testcases)
+            for hostname, nrfu_testcases in selected.items()}
+
+
+def _fetch_device(nrfu_cfg, hostname, plan, projections, streams):
+    with tracing.span('nrfu.fetch', device=hostname):
+        engine.fetch(nrfu_cfg.get_device(hostname), plan, projections, streams)
+
+
+def pytest_collection_finish(session):
+    """
+    Fetch the show output used by the selected tests, one request per device,
+    so that the tests run from the Device caches.  In fleet mode the devices
+    are fetched concurrently, with at most --nrfu-max-workers devices in
+    flight.
+    """
+    nrfu_cfg = session.config._nrfu
+    plans = plan_commands(nrfu_cfg, session.items)
+    if not plans:
+        return
+
+    projections = plan_projections(nrfu_cfg.modules)
+    streams = engine.plan_streams(nrfu_cfg.modules)
+    max_workers = session.config.option.nrfu_max_workers
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {
+            hostname: pool.submit(_fetch_device, nrfu_cfg, hostname, plan,
+                                  projections, streams)
+            for hostname, plan in plans.items()
+        }
+
+    for hostname, future in futures.items():
+        exc = future.exception()
+        if exc is not None:
+            nrfu_cfg.errors[hostname] = exc
+
+
+def _item_result(nrfu_cfg, item, call, report):
+    """ Returns the engine Result of the test item, None when it is not a test-case """
+    params = getattr(getattr(item, 'callspec', None), 'params', {})
+    testcase = params.get('testcase')
+    if not isinstance(testcase, dict):
+        return None
+
+    nrfu_by_name = {nrfu.TEST_CASE_NAME: nrfu for nrfu in nrfu_cfg.modules}
+    nrfu = nrfu_by_name.get(testcase.get('test-case'))
+    name = nrfu.name_test(testcase) if nrfu else item.name
+
+    error = call.excinfo.value if call.excinfo else None
+    message = data = None
+
+    if report.passed:
+        verdict = 'pass'
+
+    elif isinstance(error, NrfuError):
+        verdict, message = 'fail', str(error)
+        data = {field: value for field, value in vars(error).items() if field != 'extra'}
+
+    else:
+        verdict = 'error'
+        message = str(error) if error is not None else report.longreprtext
+
+    return engine.Result(params.get('device', nrfu_cfg.hostnames[0]),
+                         testcase.get('test-case'), name, verdict, message,
+                         params=testcase.get('params'), data=data,
+                         duration=report.duration)
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_call(item):
+    """ trace the test function, which evaluates the test-case, when using --nrfu-trace """
+    with tracing.span('nrfu.evaluate', test=item.name):
+        yield
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_makereport(item, call):
+    """
+    add the result of each test-case to the results store and the report when
+    using the --nrfu-results-db and --nrfu-report options; a test-case that
+    fails in setup, for example when the device cannot be accessed, has the
+    'error' verdict.
+    """
+    outcome = yield
+    report = outcome.get_result()
+
+    nrfu_cfg = getattr(item.config, '_nrfu', None)
+    if nrfu_cfg is None or (nrfu_cfg.results_db is None and nrfu_cfg.report is None):
+        return
+
+    if not (report.when == 'call' or (report.when == 'setup' and report.failed)):
+        return
+
+    result = _item_result(nrfu_cfg, item, call, report)
+    if result is None:
+        return
+
+    if nrfu_cfg.results_db is not None:
+        nrfu_cfg.results_db.add_result(nrfu_cfg.run_id, result)
+
+    if nrfu_cfg.report is not None:
+        nrfu_cfg.report.write(result)
+
+
+def pytest_sessionfinish(session):
+    """
+    write the captured show output when using the --nrfu-record option, the
+    remaining results when using the --nrfu-results-db option, the HTML
+    report when using the --nrfu-report option, and the span trace when using
+    the --nrfu-trace option
+    """
+    nrfu_cfg = getattr(session.config, '_nrfu', None)
+    if nrfu_cfg is None:
+        return
+
+    if nrfu_cfg.results_db is not None:
+        nrfu_cfg.results_db.close()
+
+    if nrfu_cfg.report is not None:
+        nrfu_cfg.report.close()
+        build_html(nrfu_cfg.report.directory / ReportWriter.JSONL_FILE,
+                   nrfu_cfg.report.directory)
+
+    for dev in nrfu_cfg.devices.values():
+        if isinstance(dev.api, RecordTransport):
+            dev.api.save()
+
+    if session.config.option.nrfu_trace:
+        tracing.save(session.config.option.nrfu_trace)
+
 
 @pytest.fixture(scope='session')
 def device(request):
-    device_name = request.config.getoption("--nrfu-device")
-    ssh_config_file = request.config.getoption('--ssh-config')
-    return Device(device_name, ssh_config_file=ssh_config_file)
+    """
+    Returns the Device instance under test; in fleet mode the device name is
+    given by the test parametrization.
+    """
+    nrfu_cfg = request.config._nrfu
+    hostname = getattr(request, 'param', nrfu_cfg.hostnames[0])
+
+    if hostname in nrfu_cfg.errors:
+        pytest.fail(f"Unable to access device {hostname}: {nrfu_cfg.errors[hostname]}")
+
+    return nrfu_cfg.get_device(hostname)
@@ -0,0 +1,269 @@
+#  Copyright 2019 Jeremy Schulman, nwkautomaniac@gmail.com
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""
+This file contains the drift engine, which reports what changed between two
+captures of the show output of a device, for example before and after a change
+window, and the `nrfu-drift` command that runs it over a fleet:
+
+    nrfu-drift --device dev1 pre-change/dev1 post-change/dev1
+
+    nrfu-drift --inventory pod1.txt pre-change post-change --format jsonl
+
+Rather than a generic deep-diff, the output of each command is split into its
+entities using the keyed collections declared by the NRFU modules in their
+COLLECTIONS, for example the "interfaces" of "show interfaces" by interface
+name, or the "lldpNeighbors" list by port and neighbor device.  Each entity is
+hashed once, the command digest is made from the entity digests, and an
+unchanged command, or entity, is skipped by comparing digests; only the changed
+entities are compared field by field.  The output of a command without a
+declared collection is split into its top-level fields.
+
+By default the output is first pruned by the NRFU module PROJECTIONS, so that
+only the fields the test-cases use are compared, and counters and timers do not
+show as drift.
+"""
+
+from collections import namedtuple
+from pathlib import Path
+import argparse
+import hashlib
+import json
+import sys
+
+from nrfupytesteos.eapi_capture import CaptureStore
+from nrfupytesteos.projection import project
+from nrfupytesteos import engine
+
+__all__ = [
+    'Drift',
+    'plan_collections',
+    'Fingerprint',
+    'diff_outputs',
+    'diff_captures',
+    'main'
+]
+
+Drift = namedtuple('Drift', ['hostname', 'command', 'added', 'removed', 'changed'])
+Drift.__doc__ = """
+The drift of one command output; `added` and `removed` are lists of entity
+keys, and `changed` is a dict, key: the entity key, value: the list of its
+changed fields.
+"""
+
+
+def plan_collections(modules):
+    """ Returns the keyed collection of each command used by the NRFU modules """
+    collections = dict()
+
+    for nrfu in modules:
+        collections.update(getattr(nrfu, 'COLLECTIONS', {}))
+
+    return collections
+
+
+def _digest(data):
+    data = json.dumps(data, sort_keys=True, separators=(',', ':'))
+    return hashlib.blake2b(data.encode(), digest_size=16).digest()
+
+
+def _entities(output, collection):
+    """ Returns the entities of the command output, as a dict by entity key """
+    path, key_fields = collection or ((), None)
+
+    for key in path:
+        output = output.get(key, {}) if isinstance(output, dict) else {}
+
+    if isinstance(output, dict):
+        return output
+
+    if isinstance(output, list) and key_fields:
+        return {' '.join(str(item.get(field)) for field in key_fields): item
+                for item in output}
+
+    return {'': output}
+
+
+class Fingerprint(object):
+    """
+    The entities of one command output, and their digests.  The command
+    `digest` does not depend on the order of the entities, so that it is made
+    in linear time.
+    """
+    __slots__ = ('entities', 'digests', 'digest')
+
+    def __init__(self, output, collection=None):
+        self.entities = _entities(output, collection)
+        self.digests = {key: _digest(entity) for key, entity in self.entities.items()}
+
+        combined = 0
+        for key, digest in self.digests.items():
+            keyed = hashlib.blake2b(key.encode() + digest, digest_size=16).digest()
+            combined += int.from_bytes(keyed, 'big')
+
+        self.digest = combined & ((1 << 128) - 1)
+
+
+def _changed_fields(pre, post):
+    if not (isinstance(pre, dict) and isinstance(post, dict)):
+        return []
+
+    return sorted(field for field in pre.keys() | post.keys()
+                  if pre.get(field) != post.get(field))
+
+
+def _diff(hostname, command, pre, post):
+    pre_digests, post_digests = pre.digests, post.digests
+
+    changed = {
+        key: _changed_fields(pre.entities[key], post.entities[key])
+        for key, digest in post_digests.items()
+        if key in pre_digests and pre_digests[key] != digest
+    }
+
+    return Drift(hostname, command,
+                 added=[key for key in post_digests if key not in pre_digests],
+                 removed=[key for key in pre_digests if key not in post_digests],
+                 changed=changed)
+
+
+def diff_outputs(hostname, pre_outputs, post_outputs, collections=None, projections=None):
+    """
+    Compare the command outputs of a device before and after a change.
+
+    Parameters
+    ----------
+    hostname : str - the device name
+    pre_outputs : dict - key: command, value: the output before the change
+    post_outputs : dict - key: command, value: the output after the change
+    collections : dict - key: command, value: its keyed collection, see `plan_collections`
+    projections : dict - key: command, value: the projection spec applied first
+
+    Yields
+    ------
+    Drift - for each command whose output has changed
+    """
+    collections = collections or dict()
+    projections = projections or dict()
+
+    for command in sorted(pre_outputs.keys() | post_outputs.keys()):
+        spec = projections.get(command)
+        collection = collections.get(command)
+
+        pre, post = (Fingerprint(project(outputs.get(command, {}), spec), collection)
+                     for outputs in (pre_outputs, post_outputs))
+
+        if pre.digest == post.digest:
+            continue
+
+        yield _diff(hostname, command, pre, post)
+
+
+def diff_captures(hostname, pre_path, post_path, modules=None, all_fields=False):
+    """
+    Compare the 'json' show output of two capture stores of a device, see
+    eapi_capture.py, using the keyed collections and projections of the NRFU
+    modules, by default engine.NRFU_MODULES.
+
+    Raises
+    ------
+    FileNotFoundError - when there is no capture at either path
+
+    Yields
+    ------
+    Drift - for each command whose output has changed
+    """
+    for path in (pre_path, post_path):
+        if not (CaptureStore(path).path.exists() or Path(path).is_dir()):
+            raise FileNotFoundError(f"No capture for {hostname} at {path}")
+
+    modules = modules or engine.NRFU_MODULES
+    projections = None if all_fields else engine.plan_projections(modules)
+
+    pre = CaptureStore.load(pre_path).outputs.get('json', {})
+    post = CaptureStore.load(post_path).outputs.get('json', {})
+
+    yield from diff_outputs(hostname, pre, post, plan_collections(modules), projections)
+
+
+def format_text(drift):
+    lines = [f"{drift.hostname} {drift.command}: {len(drift.added)} added, "
+             f"{len(drift.removed)} removed, {len(drift.changed)} changed"]
+
+    lines.extend(f"   + {key}" for key in drift.added)
+    lines.extend(f"   - {key}" for key in drift.removed)
+    lines.extend(f"   ~ {key} {', '.join(fields)}".rstrip()
+                 for key, fields in drift.changed.items())
+
+    return '\n'.join(lines)
+
+
+def format_jsonl(drift):
+    return json.dumps(drift._asdict())
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='nrfu-drift', description='Report the drift between two show-output captures')
+
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument('--device', help='device name')
+    target.add_argument('--inventory',
+                        help='file of device names, one per line; the captures are '
+                             'in a sub-directory per device')
+
+    parser.add_argument('pre', help='the capture before the change')
+    parser.add_argument('post', help='the capture after the change')
+
+    parser.add_argument('--all-fields', action='store_true',
+                        help='compare all fields, not only those used by the test-cases')
+
+    parser.add_argument('--format', choices=('text', 'jsonl'), default='text',
+                        help='the drift output format')
+
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    fleet = bool(args.inventory)
+    hostnames = engine.load_inventory(args.inventory) if fleet else [args.device]
+    formatter = format_jsonl if args.format == 'jsonl' else format_text
+    drifted = failed = 0
+
+    for hostname in hostnames:
+        pre, post = (Path(path) / hostname if fleet else path
+                     for path in (args.pre, args.post))
+
+        try:
+            drifts = list(diff_captures(hostname, pre, post, all_fields=args.all_fields))
+
+        except Exception as exc:
+            print(f"{hostname}: FAILED, {exc}", file=sys.stderr)
+            failed += 1
+            continue
+
+        drifted += bool(drifts)
+
+        for drift in drifts:
+            print(formatter(drift), flush=True)
+
+    print(f"{len(hostnames)} devices: {drifted} changed, {failed} failed", file=sys.stderr)
+
+    return 1 if drifted or failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,212 @@
+#  Copyright 2019 Jeremy Schulman, nwkautomaniac@gmail.com
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""
+This file contains the record and replay eAPI transports for the Device class.
+
+The `RecordTransport` wraps a live eAPI connection and captures the output of
+every command executed into a `CaptureStore`.  The `ReplayTransport` serves the
+command output from a `CaptureStore` without opening any sockets and without
+importing pyeapi, so that captured production data can be used for offline
+runs and in CI.
+
+A capture store is a single gzip compressed JSON file, by default named
+"show-outputs.json.gz", that has the form:
+
+    {
+        "json": {
+            "show lldp neighbors": { ... },
+            "show inventory": { ... }
+        }
+    }
+
+A replay can also be made from a directory of per-command JSON files that are
+named after the command, for example "show-lldp-neighbors.json", as found in
+the offline-demo "dev1-show-outputs" directory.
+
+Examples
+--------
+    dev = Device('dev1', api=ReplayTransport.from_path('dev1-show-outputs'))
+    dev.execute('show lldp neighbors')
+"""
+
+from pathlib import Path
+import gzip
+import json
+
+__all__ = [
+    'CaptureStore',
+    'CaptureMissingError',
+    'RecordTransport',
+    'ReplayTransport'
+]
+
+
+class CaptureMissingError(LookupError):
+    def __init__(self, command, encoding, path=None):
+        super(CaptureMissingError, self).__init__(
+            f"No captured {encoding} output for '{command}' in {path}")
+        self.command = command
+        self.encoding = encoding
+
+
+class CaptureStore(object):
+    """
+    The captured command output for a single device.
+
+    Parameters
+    ----------
+    path : str | Path
+        The capture filename ending in ".gz", otherwise a directory in which
+        case the file "show-outputs.json.gz" within that directory is used.
+    """
+    FILENAME = 'show-outputs.json.gz'
+
+    def __init__(self, path):
+        path = Path(path)
+        self.path = path if path.suffix == '.gz' else path / self.FILENAME
+        self.outputs = dict()
+
+    @classmethod
+    def load(cls, path):
+        """
+        Load the capture store from the given path.  When the path is a
+        directory without a capture file, the per-command JSON files found in
+        that directory are loaded as 'json' encoded output.
+        """
+        store = cls(path)
+
+        if store.path.exists():
+            with gzip.open(store.path, 'rt') as ifile:
+                store.outputs = json.load(ifile)
+
+        elif Path(path).is_dir():
+            for show_file in sorted(Path(path).glob('*.json')):
+                command = ' '.join(show_file.stem.split('-'))
+                with show_file.open() as ifile:
+                    store.put(command, 'json', json.load(ifile))
+
+        return store
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(self.path.name + '.tmp')
+
+        with gzip.open(tmp_path, 'wt') as ofile:
+            json.dump(self.outputs, ofile, separators=(',', ':'))
+
+        tmp_path.replace(self.path)
+
+    def get(self, command, encoding='json'):
+        try:
+            return self.outputs[encoding][command]
+        except KeyError:
+            raise CaptureMissingError(command, encoding, self.path)
+
+    def put(self, command, encoding, output):
+        self.outputs.setdefault(encoding, dict())[command] = output
+
+    def commands(self, encoding='json'):
+        return list(self.outputs.get(encoding, ()))
+
+
+class ReplayTransport(object):
+    """
+    An eAPI connection stand-in that returns captured command output.
+    """
+    def __init__(self, store):
+        self.store = store
+
+    @classmethod
+    def from_path(cls, path):
+        return cls(CaptureStore.load(path))
+
+    def __str__(self):
+        return f'ReplayTransport({self.store.path})'
+
+    def probe(self, timeout=5):
+        return True
+
+    def execute(self, commands, encoding='json', **kwargs):
+        return {
+            'jsonrpc': '2.0',
+            'result': [{} if command == 'enable'
+                       else self.store.get(command, encoding)
+                       for command in commands]
+        }
+
+
+class RecordTransport(object):
+    """
+    An eAPI connection wrapper that captures the output of every command
+    executed through the wrapped connection `api`.  Call `save` to write the
+    capture store.
+    """
+    def __init__(self, api, store):
+        self.api = api
+        self.store = store
+
+    def __str__(self):
+        return f'RecordTransport({self.api}, {self.store.path})'
+
+    def __getattr__(self, item):
+        return getattr(self.api, item)
+
+    def execute(self, commands, encoding='json', **kwargs):
+        res = self.api.execute(commands, encoding=encoding, **kwargs)
+        self._record(commands, encoding, res)
+        return res
+
+    def _record(self, commands, encoding, res):
+        for command, output in zip(commands, res['result']):
+            if command != 'enable':
+                self.store.put(command, encoding, output)
+
+    @property
+    def send_stream(self):
+        # only when the wrapped connection streams, so that the Device falls
+        # back to `execute` otherwise.
+
+        if not hasattr(self.api, 'send_stream'):
+            raise AttributeError('send_stream')
+
+        return self._send_stream
+
+    def _send_stream(self, data, chunk_size=65536):
+        """
+        Stream the response of the wrapped connection, and record the output of
+        each command once the response has been read to the end.  The recorded
+        response is held in memory until then, as the capture stores the
+        complete output.
+        """
+        params = json.loads(data)['params']
+        chunks = self.api.send_stream(data, chunk_size=chunk_size)
+        return self._record_stream(params['cmds'], params.get('format') or 'json', chunks)
+
+    def _record_stream(self, commands, encoding, chunks):
+        received = list()
+
+        try:
+            for chunk in chunks:
+                received.append(chunk)
+                yield chunk
+        finally:
+            chunks.close()
+
+        res = json.loads(b''.join(received))
+        if 'result' in res:
+            self._record(commands, encoding, res)
+
+    def save(self):
+        self.store.save()
@@ -0,0 +1,360 @@
+#  Copyright 2019 Jeremy Schulman, nwkautomaniac@gmail.com
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""
+This file contains a pooled eAPI transport for the Device class.  The pyeapi
+transports close the HTTP connection after every request, so each command pays
+a TCP and TLS handshake.  The `PooledEapiConnection` instead sends the requests
+over HTTP/1.1 keep-alive connections that are held in a thread-safe
+`ConnectionPool`, and new TLS connections to the same host resume the previous
+TLS session when the device supports it.
+
+Examples
+--------
+    pool = ConnectionPool(maxsize=2)
+    dev = Device('switch-101.bld1', pool=pool)
+    dev.probe()
+    dev.execute('show version')
+    print(pool.stats())
+"""
+
+from collections import defaultdict, deque, Counter
+from http.client import HTTPConnection, HTTPSConnection, HTTPException
+import json
+import select
+import ssl
+import threading
+
+from pyeapi.eapilib import EapiConnection, CommandError, ConnectionError
+
+from nrfupytesteos import tracing
+
+__all__ = ['ConnectionPool', 'PooledEapiConnection', 'shared_pool']
+
+_DEFAULT_PORTS = {
+    'http': 80,
+    'https': 443
+}
+
+# errors that indicate the device closed an idle keep-alive connection; the
+# request is retried once on a new connection.
+
+_STALE_ERRORS = (ConnectionResetError, BrokenPipeError, HTTPException)
+
+
+class _PooledHTTPConnection(HTTPConnection):
+    def __init__(self, host, port, pool, timeout):
+        super(_PooledHTTPConnection, self).__init__(host, port, timeout=timeout)
+        self._pool = pool
+
+
+class _PooledHTTPSConnection(HTTPSConnection):
+    def __init__(self, host, port, pool, timeout):
+        super(_PooledHTTPSConnection, self).__init__(
+            host, port, timeout=timeout, context=pool.context)
+        self._pool = pool
+
+    def connect(self):
+        HTTPConnection.connect(self)
+        key = (self.host, self.port)
+        self.sock = self._context.wrap_socket(
+            self.sock, server_hostname=self.host,
+            session=self._pool.tls_session(key))
+        self._pool.tls_connected(key, self.sock)
+
+
+class ConnectionPool(object):
+    """
+    A thread-safe pool of idle keep-alive connections, keyed by
+    (transport, host, port).
+
+    Parameters
+    ----------
+    maxsize : int
+        The maximum number of idle connections kept per host.
+
+    context : ssl.SSLContext
+        The TLS context shared by all HTTPS connections.  By default the
+        certificate verification is disabled, as with pyeapi, since EOS
+        devices use self-signed certificates.
+    """
+    def __init__(self, maxsize=4, context=None):
+        self.maxsize = maxsize
+        self.context = context or ssl._create_unverified_context()
+        self._lock = threading.Lock()
+        self._idle = defaultdict(deque)
+        self._tls_sessions = dict()
+        self._stats = Counter()
+
+    def acquire(self, key, timeout=None):
+        """
+        Return a connection for the given key and a flag that is True when the
+        connection is an existing (warm) connection.  The caller must either
+        `release` or `discard` the connection when done.
+        """
+        with self._lock:
+            idle = self._idle[key]
+            if idle:
+                self._stats['reused'] += 1
+                conn = idle.pop()
+                conn.timeout = timeout
+                if conn.sock is not None:
+                    conn.sock.settimeout(timeout)
+                return conn, True
+
+            self._stats['created'] += 1
+
+        transport, host, port = key
+        conn_cls = (_PooledHTTPSConnection if transport == 'https'
+                    else _PooledHTTPConnection)
+        return conn_cls(host, port, pool=self, timeout=timeout), False
+
+    def release(self, key, conn):
+        if conn.sock is None:
+            return self.discard(conn)
+
+        session = getattr(conn.sock, 'session', None)
+
+        with self._lock:
+            if session is not None:
+                self._tls_sessions[key[1:]] = session
+
+            idle = self._idle[key]
+            if len(idle) < self.maxsize:
+                idle.append(conn)
+                return
+
+        self.discard(conn)
+
+    def discard(self, conn):
+        conn.close()
+        with self._lock:
+            self._stats['discarded'] += 1
+
+    def request(self, key, body, headers, timeout=None):
+        """
+        POST the body to the eAPI endpoint using a pooled connection.
+
+        Returns
+        -------
+        tuple - (status, reason, content bytes)
+        """
+        status, reason, chunks = self.stream(key, body, headers, timeout=timeout)
+        return status, reason, b''.join(chunks)
+
+    def stream(self, key, body, headers, timeout=None, chunk_size=65536):
+        """
+        POST the body to the eAPI endpoint using a pooled connection, without
+        reading the response content.  The connection is returned to the pool
+        once the content iterator is exhausted, or discarded when the iterator
+        is closed early.
+
+        Returns
+        -------
+        tuple - (status, reason, iterator of content bytes chunks)
+        """
+        with self._lock:
+            self._stats['requests'] += 1
+
+        while True:
+            conn, reused = self.acquire(key, timeout=timeout)
+            try:
+                conn.request('POST', '/command-api', body=body, headers=headers)
+                resp = conn.getresponse()
+
+            except _STALE_ERRORS:
+                self.discard(conn)
+                if reused:
+                    with self._lock:
+                        self._stats['retried'] += 1
+                    continue
+                raise
+
+            except Exception:
+                self.discard(conn)
+                raise
+
+            return resp.status, resp.reason, self._iter_content(
+                key, conn, resp, chunk_size)
+
+    def _iter_content(self, key, conn, resp, chunk_size):
+        done = False
+        try:
+            while True:
+                chunk = resp.read(chunk_size)
+                if not chunk:
+                    done = True
+                    return
+                yield chunk
+
+        finally:
+            if done and not resp.will_close:
+                self.release(key, conn)
+            else:
+                self.discard(conn)
+
+    def tls_session(self, host_port):
+        with self._lock:
+            return self._tls_sessions.get(host_port)
+
+    def tls_connected(self, host_port, sock):
+        with self._lock:
+            self._stats['tls_handshakes'] += 1
+            if sock.session_reused:
+                self._stats['tls_resumed'] += 1
+
+    def stats(self):
+        """
+        Returns
+        -------
+        dict - counters of the pool activity and the number of idle connections
+        """
+        with self._lock:
+            stats = dict.fromkeys(('requests', 'created', 'reused', 'retried',
+                                   'discarded', 'tls_handshakes', 'tls_resumed'), 0)
+            stats.update(self._stats)
+            stats['idle'] = sum(map(len, self._idle.values()))
+            return stats
+
+    def close(self):
+        with self._lock:
+            idle = [conn for conns in self._idle.values() for conn in conns]
+            self._idle.clear()
+
+        for conn in idle:
+            conn.close()
+
+
+_shared_pool = None
+_shared_pool_lock = threading.Lock()
+
+
+def _is_idle_open(sock):
+    # an idle keep-alive connection has nothing to read; a readable socket has
+    # either been closed by the device or has unexpected data, and is not
+    # reused.  The TLS sockets do not take recv flags, so the socket is not
+    # peeked.
+
+    try:
+        readable, _, _ = select.select([sock], [], [], 0)
+    except (OSError, ValueError):
+        return False
+
+    return not readable
+
+
+def shared_pool():
+    """ Returns the process-wide pool used by Device instances by default """
+    global _shared_pool
+
+    with _shared_pool_lock:
+        if _shared_pool is None:
+            _shared_pool = ConnectionPool()
+        return _shared_pool
+
+
+class PooledEapiConnection(EapiConnection):
+    """
+    A pyeapi EapiConnection that sends the requests over the connections of a
+    ConnectionPool rather than opening a new connection for each request.
+    """
+    def __init__(self, host, port=None, transport='https', username=None,
+                 password=None, timeout=60, pool=None, **kwargs):
+        super(PooledEapiConnection, self).__init__()
+        port = int(port or _DEFAULT_PORTS[transport])
+        self.key = (transport, host, port)
+        self.timeout = timeout
+        self.pool = pool or shared_pool()
+        self.authentication(username or '', password or '')
+
+    def __str__(self):
+        return 'PooledEapiConnection(%s://%s:%s)' % self.key
+
+    __repr__ = __str__
+
+    def probe(self, timeout=5):
+        """
+        Open a connection to the device and leave it in the pool so that the
+        next request uses the already established connection.
+        """
+        conn, reused = self.pool.acquire(self.key, timeout=timeout)
+        try:
+            if reused and conn.sock is not None and not _is_idle_open(conn.sock):
+                conn.close()
+
+            if not reused or conn.sock is None:
+                conn.connect()
+
+        except Exception:
+            self.pool.discard(conn)
+            return False
+
+        self.pool.release(self.key, conn)
+        return True
+
+    def send_stream(self, data, chunk_size=65536):
+        """
+        Sends the eAPI request and returns an iterator of the response content
+        chunks, so that the caller can decode the response as it arrives.
+        """
+        headers = {'Content-type': 'application/json-rpc'}
+        if self._auth:
+            headers[self._auth[0]] = self._auth[1]
+
+        try:
+            status, reason, chunks = self.pool.stream(
+                self.key, data.encode(), headers, timeout=self.timeout,
+                chunk_size=chunk_size)
+
+        except OSError as exc:
+            self.socket_error = exc
+            self.error = exc
+            raise ConnectionError(str(self), 'Socket error during eAPI connection: %s' % exc)
+
+        if status == 401:
+            raise ConnectionError(str(self), f'{reason}. {b"".join(chunks).decode()}')
+
+        return chunks
+
+    def send(self, data):
+        """
+        Sends the eAPI request and returns the decoded response; see the
+        pyeapi `EapiConnection.send` for details.
+        """
+        host = self.key[1]
+
+        with tracing.span('eapi.request', cat='device', host=host) as span:
+            chunks = self.send_stream(data)
+
+            try:
+                content = b''.join(chunks)
+            except OSError as exc:
+                self.socket_error = exc
+                self.error = exc
+                raise ConnectionError(str(self), 'Socket error during eAPI connection: %s' % exc)
+
+            span.set(bytes=len(content))
+
+        try:
+            with tracing.span('eapi.decode', cat='device', host=host, bytes=len(content)):
+                decoded = json.loads(content)
+        except ValueError as exc:
+            self.error = exc
+            raise ConnectionError(str(self), 'unable to connect to eAPI')
+
+        if 'error' in decoded:
+            (code, msg, err, out) = self._parse_error_message(decoded)
+            raise CommandError(code, msg, command_error=err, output=out)
+
+        return decoded
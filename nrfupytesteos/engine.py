@@ -0,0 +1,476 @@
+#  Copyright 2019 Jeremy Schulman, nwkautomaniac@gmail.com
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""
+This file contains the NRFU engine: load the test-case files, plan and fetch
+the show output of each device in one request, and run the `nrfu_*` validators
+over the test-cases.  The `nrfu` command (see cli.py) runs the engine directly,
+without pytest, and the pytest plugin (see conftest.py) uses the same planning,
+fetching and device creation.
+
+Examples
+--------
+    from nrfupytesteos import engine
+
+    testcases = engine.load_testcases('dev1-testcases')
+    for result in engine.run_device(engine.make_device('dev1'), testcases):
+        print(result.verdict, result.name, result.message or '')
+"""
+
+from collections import namedtuple, defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+import json
+import time
+
+from nrfupytesteos.eos_device import Device
+from nrfupytesteos.eapi_capture import (
+    CaptureStore, CaptureMissingError, RecordTransport, ReplayTransport
+)
+from nrfupytesteos.projection import merge_projections
+from nrfupytesteos.evaluate import PASS, FAIL, ERROR
+from nrfupytesteos.testcase_store import TestcaseStore
+from nrfupytesteos.snapshot import MANIFEST_FILE
+from nrfupytesteos import tracing
+from nrfupytesteos import (
+    nrfu_optic_inventory,
+    nrfu_interface_status,
+    nrfu_cabling,
+    nrfu_lag_status,
+    nrfu_mlag_status,
+    nrfu_mlag_interface_status,
+    nrfu_bgp_neighbor_status
+)
+
+__all__ = [
+    'NRFU_MODULES',
+    'Result',
+    'load_inventory',
+    'make_device',
+    'load_testcases',
+    'plan_commands',
+    'plan_projections',
+    'plan_streams',
+    'fetch',
+    'run_device',
+    'run',
+    'watch'
+]
+
+# the NRFU modules in the order their test-cases are run
+
+NRFU_MODULES = [
+    nrfu_optic_inventory,
+    nrfu_interface_status,
+    nrfu_cabling,
+    nrfu_lag_status,
+    nrfu_mlag_status,
+    nrfu_mlag_interface_status,
+    nrfu_bgp_neighbor_status
+]
+
+VERDICTS = {PASS: 'pass', FAIL: 'fail', ERROR: 'error'}
+
+Result = namedtuple('Result', ['hostname', 'test_case', 'name', 'verdict', 'message',
+                               'params', 'data', 'duration'],
+                    defaults=(None, None, None))
+Result.__doc__ = """
+The result of one test-case; `verdict` is one of 'pass', 'fail' or 'error' and
+`message` is None when the test-case passes.  `params` are the test-case
+parameters, `data` the failure data, for example the 'expected' and 'actual'
+values of a mismatch, and `duration` the seconds taken by the check, or the
+mean of the checks of its module unless each check was timed; see
+`run_device`.
+"""
+
+
+def load_inventory(filepath):
+    """
+    Returns the list of device names in the inventory file.  The file has one
+    device name per line; blank lines and lines starting with '#' are ignored.
+    """
+    with open(filepath) as ifile:
+        lines = (line.strip() for line in ifile)
+        return [line for line in lines if line and not line.startswith('#')]
+
+
+def make_device(hostname, ssh_config_file=None, replay=None, record=None):
+    """
+    Create the Device instance for the hostname.
+
+    Parameters
+    ----------
+    hostname : str - the device name
+    ssh_config_file : str - path to SSH config file
+    replay : str - use the captured show output at this path, see eapi_capture.py
+    record : str - capture the show output to this path
+    """
+    if replay:
+        return Device(hostname, api=ReplayTransport.from_path(replay))
+
+    dev = Device(hostname, ssh_config_file=ssh_config_file)
+
+    if record:
+        dev.api = RecordTransport(dev.api, CaptureStore(record))
+
+    return dev
+
+
+def load_testcases(testcases_dir, modules=None, dut=None):
+    """
+    Load the test-case files in the directory; each file contains a list of
+    test-cases, and the test-cases are grouped by the module for their
+    "test-case" type.  Test-cases of an unknown type, and the snapshot
+    manifest file, are ignored.
+
+    When `testcases_dir` is a test-case store (see testcase_store.py), the
+    test-cases of the `dut` device are read from the store instead.
+
+    Parameters
+    ----------
+    testcases_dir : str | Path - the directory of test-case JSON files
+    modules : list - the NRFU modules, by default NRFU_MODULES
+    dut : str - the device name, used with a test-case store
+
+    Returns
+    -------
+    dict
+        key: NRFU module, value: list of test-cases
+    """
+    nrfu_by_name = {nrfu.TEST_CASE_NAME: nrfu for nrfu in modules or NRFU_MODULES}
+    nrfu_testcases = defaultdict(list)
+
+    if TestcaseStore.is_store(testcases_dir):
+        with TestcaseStore(testcases_dir, readonly=True) as store:
+            for test_case, nrfu in nrfu_by_name.items():
+                testcases = list(store.iter(dut=dut, test_case=test_case))
+                if testcases:
+                    nrfu_testcases[nrfu] = testcases
+
+        return dict(nrfu_testcases)
+
+    for tc_file in sorted(Path(testcases_dir).glob('*.json')):
+        if tc_file.name == MANIFEST_FILE:
+            continue
+
+        with tc_file.open() as ifile:
+            testcases = json.load(ifile)
+
+        for testcase in testcases:
+            nrfu = nrfu_by_name.get(testcase.get('test-case'))
+            if nrfu is not None:
+                nrfu_testcases[nrfu].append(testcase)
+
+    return dict(nrfu_testcases)
+
+
+def plan_commands(nrfu_testcases):
+    """
+    Determine the show commands needed by the test-cases of one device, so
+    that a command is fetched only when there is at least one test-case of its
+    type.  An NRFU module may define a `plan_command(testcases)` function to
+    select a cheaper command for the given test-cases; otherwise its
+    `SHOW_COMMAND` is used.
+
+    Parameters
+    ----------
+    nrfu_testcases : dict
+        key: NRFU module, value: list of test-cases
+
+    Returns
+    -------
+    dict
+        key: the command to fetch, value: the module SHOW_COMMAND to fetch
+        instead if the planned command fails.
+    """
+    plan = dict()
+
+    for nrfu, testcases in nrfu_testcases.items():
+        if not testcases:
+            continue
+
+        planner = getattr(nrfu, 'plan_command', None)
+        command = planner(testcases) if planner else nrfu.SHOW_COMMAND
+        plan[command] = nrfu.SHOW_COMMAND
+
+    return plan
+
+
+def plan_projections(modules):
+    """
+    Returns the projection spec of each command used by the NRFU modules.
+    When more than one module uses the same command, the projection keeps the
+    fields used by all of them.
+    """
+    projections = dict()
+
+    for nrfu in modules:
+        for command, spec in getattr(nrfu, 'PROJECTIONS', {}).items():
+            projections[command] = (merge_projections(projections[command], spec)
+                                    if command in projections else spec)
+
+    # a module that uses a command without declaring its projection needs the
+    # complete output.
+
+    for nrfu in modules:
+        command = getattr(nrfu, 'SHOW_COMMAND', None)
+        if command and command not in getattr(nrfu, 'PROJECTIONS', {}):
+            projections[command] = None
+
+    return projections
+
+
+def plan_streams(modules):
+    """
+    Returns the collection path of each command used by the NRFU modules that
+    is streamed one record at a time rather than decoded as a whole; see the
+    module STREAM_PATHS.
+    """
+    streams = dict()
+
+    for nrfu in modules:
+        streams.update(getattr(nrfu, 'STREAM_PATHS', {}))
+
+    return streams
+
+
+def fetch(device, plan, projections=None, streams=None):
+    """
+    Fetch the planned commands in one request, so that the validators run
+    from the Device cache.  The output of the commands in `streams`, see
+    `plan_streams`, is decoded one record at a time as the response arrives,
+    so that it is never decoded as a whole; see `Device.execute_many`.
+    """
+    # pyeapi is imported here, so that replay-only use does not load it.
+
+    from pyeapi.eapilib import CommandError
+
+    streams = streams or dict()
+
+    try:
+        device.execute_many(list(plan), projections=projections, streams=streams)
+
+    except (CommandError, CaptureMissingError):
+        # if a cheaper planned command is not supported by the device, or was
+        # not captured, then fetch the commands the NRFU modules use by
+        # default.  Any other error, for example a timeout, is raised.
+
+        if all(command == fallback for command, fallback in plan.items()):
+            raise
+
+        device.execute_many(list(dict.fromkeys(plan.values())), projections=projections,
+                            streams=streams)
+
+
+def _error_results(hostname, nrfu, testcases, message):
+    for testcase in testcases:
+        yield Result(hostname, nrfu.TEST_CASE_NAME, nrfu.name_test(testcase),
+                     'error', message, testcase.get('params'))
+
+
+def _access_error(hostname, nrfu_testcases, exc):
+    message = f"Unable to access device {hostname}: {exc}"
+    for nrfu, testcases in nrfu_testcases.items():
+        yield from _error_results(hostname, nrfu, testcases, message)
+
+
+def run_device(device, nrfu_testcases, durations=False):
+    """
+    Fetch the show output of the device and run the validators over the
+    test-cases.  When the device cannot be accessed, or the show output of a
+    module cannot be fetched, each affected test-case has the 'error' verdict.
+
+    Parameters
+    ----------
+    device : Device instance
+    nrfu_testcases : dict - key: NRFU module, value: list of test-cases
+
+    durations : bool
+        Time the check of each test-case, rather than only the checks of each
+        module as a whole; see `evaluate.evaluate_all`.
+
+    Yields
+    ------
+    Result - for each test-case
+    """
+    hostname = device.hostname
+
+    try:
+        with tracing.span('nrfu.fetch', device=hostname):
+            fetch(device, plan_commands(nrfu_testcases), plan_projections(nrfu_testcases),
+                  plan_streams(nrfu_testcases))
+
+    except Exception as exc:
+        yield from _access_error(hostname, nrfu_testcases, exc)
+        return
+
+    for nrfu, testcases in nrfu_testcases.items():
+        try:
+            with tracing.span('nrfu.snapshot', device=hostname, test_case=nrfu.TEST_CASE_NAME):
+                actual = nrfu.snapshot_testdata(device)
+
+        except Exception as exc:
+            yield from _error_results(hostname, nrfu, testcases,
+                                      f"Unable to get {nrfu.SHOW_COMMAND}: {exc}")
+            continue
+
+        with tracing.span('nrfu.evaluate', device=hostname, test_case=nrfu.TEST_CASE_NAME,
+                          testcases=len(testcases)):
+            results = nrfu.evaluate_all(device, actual, testcases, durations)
+
+        for index, testcase in enumerate(testcases):
+            yield Result(hostname, nrfu.TEST_CASE_NAME, nrfu.name_test(testcase),
+                         VERDICTS[results.codes[index]], results.message(index),
+                         testcase.get('params'), results.data(index),
+                         results.duration(index))
+
+
+def run(hostnames, testcases_for, device_for=make_device, max_workers=16, durations=False):
+    """
+    Run the test-cases of each device, with at most `max_workers` devices in
+    flight.  The results of a device are yielded as soon as that device is
+    done.
+
+    Parameters
+    ----------
+    hostnames : list[str] - the device names
+
+    testcases_for : callable
+        Called with the hostname, returns the `load_testcases` dict of the
+        device.
+
+    device_for : callable
+        Called with the hostname, returns the Device instance.
+
+    max_workers : int - the maximum number of devices in flight
+    durations : bool - time the check of each test-case, see `run_device`
+
+    Yields
+    ------
+    Result - for each test-case of each device
+    """
+    def run_one(hostname):
+        with tracing.span('nrfu.load_testcases', device=hostname):
+            nrfu_testcases = testcases_for(hostname)
+
+        if not nrfu_testcases:
+            return []
+
+        try:
+            device = device_for(hostname)
+        except Exception as exc:
+            return list(_access_error(hostname, nrfu_testcases, exc))
+
+        with tracing.span('nrfu.device', device=hostname):
+            return list(run_device(device, nrfu_testcases, durations))
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = [pool.submit(run_one, hostname) for hostname in hostnames]
+        for future in as_completed(futures):
+            yield from future.result()
+
+
+class _DeviceWatch(object):
+    """ The device, and the test-cases not passing, of a device being watched """
+
+    def __init__(self, hostname):
+        self.hostname = hostname
+        self.device = None
+        self.verdicts = dict()
+        self.failing = None
+
+    def run_round(self, testcases_for, device_for, durations=False):
+        """ Returns the (previous verdict, Result) of each test-case run """
+        if self.failing is None:
+            self.failing = testcases_for(self.hostname) or dict()
+
+        nrfu_testcases = self.failing
+        if not nrfu_testcases:
+            return []
+
+        try:
+            if self.device is None:
+                self.device = device_for(self.hostname)
+
+            # only the commands of the test-cases not passing are fetched again
+
+            for command, fallback in plan_commands(nrfu_testcases).items():
+                self.device.invalidate(command)
+                self.device.invalidate(fallback)
+
+            results = list(run_device(self.device, nrfu_testcases, durations))
+
+        except Exception as exc:
+            results = list(_access_error(self.hostname, nrfu_testcases, exc))
+
+        cases = [(nrfu, testcase) for nrfu, testcases in nrfu_testcases.items()
+                 for testcase in testcases]
+
+        transitions, failing = list(), defaultdict(list)
+
+        for (nrfu, testcase), result in zip(cases, results):
+            previous = self.verdicts.get(id(testcase))
+            self.verdicts[id(testcase)] = result.verdict
+            transitions.append((previous, result))
+
+            if result.verdict != 'pass':
+                failing[nrfu].append(testcase)
+
+        self.failing = dict(failing)
+        return transitions
+
+
+def watch(hostnames, testcases_for, device_for=make_device, interval=10,
+          max_workers=16, max_rounds=None, sleep=time.sleep, durations=False):
+    """
+    Run the test-cases of each device, and then every `interval` seconds run
+    again only the test-cases that do not pass, re-fetching only their show
+    commands, until all of the test-cases pass.  The Device instances are kept
+    between rounds so that their eAPI connections stay open.
+
+    Parameters
+    ----------
+    hostnames, testcases_for, device_for, max_workers, durations : see `run`
+    interval : float - the seconds from the start of one round to the next
+    max_rounds : int - the maximum number of rounds, by default no maximum
+    sleep : callable - called with the seconds to wait between rounds
+
+    Yields
+    ------
+    tuple (previous verdict, Result)
+        Each result of the first round, with a previous verdict of None, and
+        afterwards only the results whose verdict has changed, for example
+        from 'fail' to 'pass'.
+    """
+    watches = [_DeviceWatch(hostname) for hostname in hostnames]
+    rounds = 0
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        while True:
+            started = time.monotonic()
+            rounds += 1
+
+            futures = [pool.submit(dev_watch.run_round, testcases_for, device_for, durations)
+                       for dev_watch in watches]
+
+            for future in as_completed(futures):
+                for previous, result in future.result():
+                    if previous != result.verdict:
+                        yield previous, result
+
+            watches = [dev_watch for dev_watch in watches if dev_watch.failing]
+            if not watches or rounds == max_rounds:
+                return
+
+            sleep(max(0, interval - (time.monotonic() - started)))
@@ -14,12 +14,16 @@
 
 import os
 import re
+import time
 
 from first import first
 from paramiko.config import SSHConfig
-import pyeapi
 
-__all__ = ['Device']
+from nrfupytesteos.projection import project, covers, sub_projection
+from nrfupytesteos.json_stream import iter_records, iter_items, StreamPathError
+from nrfupytesteos import tracing
+
+__all__ = ['Device', 'CommandCache', 'connect_args']
 
 _if_shorten_find_patterns = [
     r'Ethernet(?P<E2>\d+)/1',
@@ -50,6 +54,95 @@ def sorted_interfaces(if_list):
     return sorted(if_list, key=lambda i: tuple(map(int, match_numbers.findall(i))))
 
 
+def connect_args(hostname, username=None, password=None,
+                 transport=None, port=None, ssh_config_file=None):
+    """
+    Resolve the eAPI connection arguments (host, port, transport, credentials)
+    for the given device name using the EOS_* environment variables and the
+    optional SSH config file.
+
+    Returns
+    -------
+    dict - keyword arguments suitable for `pyeapi.connect`
+    """
+    c_args = dict()
+
+    c_args['username'] = os.getenv('EOS_USER') or os.getenv('USER') or username
+    c_args['password'] = os.getenv('EOS_PASSWORD') or os.getenv('PASSWORD') or password
+
+    if port:
+        c_args['port'] = port
+
+    # EOS_TRANSPORT selects the eAPI transport, for example 'http' to use a
+    # fake eAPI server; see fake_eapi.py.
+
+    transport = transport or os.getenv('EOS_TRANSPORT')
+    if transport:
+        c_args['transport'] = transport
+
+    ssh_config_file = ssh_config_file or os.getenv('EOS_SSH_CONFIG')
+    if ssh_config_file:
+        ssh_config = SSHConfig()
+        ssh_config.parse(open(ssh_config_file))
+        found = ssh_config.lookup(hostname)
+
+        if 'user' in found:
+            c_args['username'] = found['user']
+
+        if 'hostname' in found:
+            c_args['host'] = found['hostname']
+
+        if 'localforward' in found:
+            port = int(first(found['localforward']).split()[0])
+            c_args['port'] = port
+            c_args['host'] = 'localhost'
+
+    else:
+        c_args['host'] = hostname
+        c_args.setdefault('transport', Device.DEFAULT_TRANSPORT)
+
+    return c_args
+
+
+class CommandCache(object):
+    """
+    Show command results keyed by (command, encoding).  A `ttl` of None means
+    the results never expire.  A result that was pruned by a projection is
+    returned only when it retains all of the fields of the requested
+    projection.
+    """
+    def __init__(self, ttl=None):
+        self.ttl = ttl
+        self._data = dict()
+
+    def get(self, command, encoding, projection=None):
+        cached = self._data.get((command, encoding))
+        if cached is None:
+            return None
+
+        fetched_at, output, cached_projection = cached
+        if self.ttl is not None and time.monotonic() - fetched_at > self.ttl:
+            del self._data[(command, encoding)]
+            return None
+
+        if cached_projection is not None and not covers(cached_projection, projection):
+            return None
+
+        return output
+
+    def put(self, command, encoding, output, projection=None):
+        self._data[(command, encoding)] = (time.monotonic(), output, projection)
+        return output
+
+    def invalidate(self, command=None, encoding=None):
+        for key in list(self._data):
+            if command is not None and key[0] != command:
+                continue
+            if encoding is not None and key[1] != encoding:
+                continue
+            del self._data[key]
+
+
 class Device(object):
     """
     An Arista EOS Device class that provides access via the eAPI.
@@ -58,41 +151,57 @@ class Device(object):
 
     def __init__(self, hostname, username=None, password=None,
                  transport=None, port=None,
-                 ssh_config_file=None):
+                 ssh_config_file=None, cache_ttl=None, pool=None,
+                 api=None):
 
         self.hostname = hostname
-        c_args = dict()
 
-        c_args['username'] = os.getenv('EOS_USER') or os.getenv('USER') or username
-        c_args['password'] = os.getenv('EOS_PASSWORD') or os.getenv('PASSWORD') or password
+        # show command results are cached by (command, encoding) so that the
+        # command is run once per session no matter how many NRFU test modules
+        # need the output.  A `cache_ttl` of None means the results never
+        # expire; use `invalidate` or `refresh` to force a new fetch.
 
-        if port:
-            c_args['port'] = port
+        self.cache = CommandCache(ttl=cache_ttl)
 
-        ssh_config_file = ssh_config_file or os.getenv('EOS_SSH_CONFIG')
-        if ssh_config_file:
-            ssh_config = SSHConfig()
-            ssh_config.parse(open(ssh_config_file))
-            found = ssh_config.lookup(hostname)
+        # an eAPI connection can be given, for example a ReplayTransport to
+        # use captured show output rather than a live device.
 
-            if 'user' in found:
-                c_args['username'] = found['user']
+        if api is not None:
+            self.api = api
+            return
 
-            if 'hostname' in found:
-                c_args['host'] = found['hostname']
+        # pyeapi is imported here, so that replay-only use does not load it.
 
-            if 'localforward' in found:
-                port = int(first(found['localforward']).split()[0])
-                c_args['port'] = port
-                c_args['host'] = 'localhost'
+        import pyeapi
+        from nrfupytesteos.eapi_pool import PooledEapiConnection
 
-        else:
-            c_args['host'] = hostname
-            c_args['transport'] = transport or self.DEFAULT_TRANSPORT
+        c_args = connect_args(hostname, username=username, password=password,
+                              transport=transport, port=port,
+                              ssh_config_file=ssh_config_file)
+
+        # the eAPI requests are sent over the keep-alive connections of a
+        # ConnectionPool; by default the process-wide pool shared by all Device
+        # instances.  Use `pool=False` for a pyeapi transport that opens a new
+        # connection per request.
 
-        self.api = pyeapi.connect(**c_args)
+        transport = c_args.get('transport') or pyeapi.client.DEFAULT_TRANSPORT
+        if pool is not False and transport in ('http', 'https'):
+            c_args['transport'] = transport
+            self.api = PooledEapiConnection(pool=pool, **c_args)
+        else:
+            self.api = pyeapi.connect(**c_args)
 
     def probe(self, timeout=5):
+        with tracing.span('device.probe', cat='device', device=self.hostname) as span:
+            ok = self._probe(timeout)
+            span.set(ok=ok)
+
+        return ok
+
+    def _probe(self, timeout):
+        if hasattr(self.api, 'probe'):
+            return self.api.probe(timeout=timeout)
+
         _orig_to = self.api.transport.timeout
         self.api.transport.timeout = timeout
 
@@ -108,7 +217,8 @@ class Device(object):
 
         return ok
 
-    def execute(self, command, encoding='json'):
+    def execute(self, command, encoding='json', use_cache=True,
+                projection=None):
         """
         Execute an operational command, "show version" for example.
 
@@ -119,13 +229,298 @@ class Device(object):
         encoding : str
             The return format encoding, defaults to 'json'.
 
+        use_cache : bool
+            When True (default) return the cached result if one exists and
+            has not expired.
+
+        projection : dict | list
+            When given, the result is pruned to the projected fields right
+            after it is fetched, so that only the fields used by the caller
+            are retained; see projection.py for the spec format.
+
         Returns
         -------
         dict - results of the command
         """
-        res = self.api.execute(['enable', command], encoding=encoding)
-        return res['result'][1]
+        results = self.execute_many(
+            [command], encoding=encoding, use_cache=use_cache,
+            projections={command: projection} if projection else None)
+
+        return results[command]
+
+    def execute_many(self, commands, encoding='json', use_cache=True,
+                     projections=None, streams=None):
+        """
+        Execute a list of operational commands in a single eAPI request so that
+        the caller pays only one round-trip to the device regardless of the
+        number of commands.  Commands with a valid cached result are not sent
+        to the device.
+
+        Parameters
+        ----------
+        commands : list[str] - commands to execute, duplicates are sent once
+
+        encoding : str
+            The return format encoding, defaults to 'json'.
+
+        use_cache : bool
+            When True (default) only the commands without a cached result are
+            sent to the device.
+
+        projections : dict
+            key: command, value: the projection spec used to prune the result
+            of that command right after it is fetched.
+
+        streams : dict
+            key: command, value: the path of its output collection.  When the
+            eAPI connection supports streaming, the response is decoded as it
+            arrives, and the records of these collections one at a time, so
+            that their output is never decoded as a whole; the result of each
+            of these commands has only the collection, see `execute_records`.
+
+        Returns
+        -------
+        dict - results of each command, keyed by the command string
+        """
+        commands = list(dict.fromkeys(commands))
+        projections = projections or dict()
+        streams = streams or dict()
+        results = dict()
+
+        if use_cache:
+            for command in commands:
+                cached = self.cache.get(command, encoding, projections.get(command))
+                if cached is not None:
+                    results[command] = cached
+
+        fetch = [command for command in commands if command not in results]
+
+        if fetch and encoding == 'json' and hasattr(self.api, 'send_stream') and \
+                any(command in streams for command in fetch):
+            with tracing.span('device.execute', cat='device', device=self.hostname,
+                              commands=fetch, encoding=encoding, streamed=True):
+                results.update(self._stream_many(fetch, projections, streams))
+
+        elif fetch:
+            with tracing.span('device.execute', cat='device', device=self.hostname,
+                              commands=fetch, encoding=encoding):
+                res = self.api.execute(['enable', *fetch], encoding=encoding)
+
+            with tracing.span('device.project', cat='device', device=self.hostname):
+                for command, output in zip(fetch, res['result'][1:]):
+                    projection = projections.get(command)
+                    results[command] = self.cache.put(
+                        command, encoding, project(output, projection), projection)
+
+        return {command: results[command] for command in commands}
+
+    def execute_stream(self, command, path, projection=None, chunk_size=65536):
+        """
+        Execute a 'json' encoded command and yield the records of the output
+        collection at `path` as the response arrives, so that a large output,
+        for example "show interfaces", is never decoded as a whole.  The
+        streamed records are not cached.
+
+        When the eAPI connection does not support streaming, for example a
+        ReplayTransport, or the output is already cached, the records are
+        taken from the complete output.
+
+        Parameters
+        ----------
+        command : str - command to execute
+
+        path : tuple
+            The keys from the output root down to the collection of records,
+            for example ('interfaces',).
+
+        projection : dict | list
+            When given, the projection spec of the collection; each record is
+            pruned as it is decoded.
+
+        Yields
+        ------
+        tuple - (key, record) for a dict collection, (index, record) for a list
+        """
+        output = self.cache.get(command, 'json')
+
+        if output is None and hasattr(self.api, 'send_stream'):
+            records = self._stream_records(command, path, chunk_size)
+        else:
+            if output is None:
+                output = self.execute(command)
+            records = _iter_output_records(output, path)
+
+        yield from _project_records(records, projection)
+
+    def execute_records(self, command, path, projection=None):
+        """
+        Returns the output of the command with only the collection at `path`,
+        each record pruned by `projection` as it is streamed; see
+        `execute_stream`.  The result is cached, so that the peak memory is
+        bounded by the pruned result rather than by the complete output.
+
+        Parameters
+        ----------
+        command : str - command to execute
+        path : tuple - the keys from the output root down to the collection
+        projection : dict | list - the projection spec of the command output
+
+        Returns
+        -------
+        dict - the pruned output of the command
+        """
+        cached = self.cache.get(command, 'json', projection)
+        if cached is not None:
+            return cached
+
+        collection_spec = projection
+        for key in path:
+            collection_spec = sub_projection(collection_spec, key)
+
+        with tracing.span('device.execute_records', cat='device', device=self.hostname,
+                          command=command):
+            return self._put_records(command, path, collection_spec,
+                                     self.execute_stream(command, path, collection_spec))
+
+    def _put_records(self, command, path, collection_spec, records):
+        """ Cache the output of the command that has only the collection of records """
+        records = list(records)
+        is_list = bool(records) and isinstance(records[0][0], int)
+        output = [record for _, record in records] if is_list else dict(records)
+
+        # the cached entry is recorded with the projection of what it retains,
+        # which is only the collection at the path.
+
+        output_spec = collection_spec or True
+        for key in reversed(path):
+            output, output_spec = {key: output}, {key: output_spec}
+
+        return self.cache.put(command, 'json', output, output_spec)
+
+    def _command_error(self, exc):
+        # an eAPI error response has an "error" member rather than the
+        # "result" list of the stream path.
+
+        from pyeapi.eapilib import CommandError
+
+        if 'error' not in exc.skipped:
+            return exc
+
+        code, msg, err, out = self.api._parse_error_message(exc.skipped)
+        return CommandError(code, msg, command_error=err, output=out)
+
+    def _stream_records(self, command, path, chunk_size):
+        data = self.api.request(['enable', command], encoding='json')
+        chunks = self.api.send_stream(data, chunk_size=chunk_size)
+
+        try:
+            yield from iter_records(chunks, ('result', 1, *path))
+
+            # read the rest of the response so that the connection can be
+            # reused.
+
+            for _ in chunks:
+                pass
+
+        except StreamPathError as exc:
+            raise self._command_error(exc)
+
+        finally:
+            chunks.close()
+
+    def _stream_many(self, commands, projections, streams, chunk_size=65536):
+        """
+        Execute the 'json' encoded commands in one streamed request, and cache
+        the result of each; see `execute_many`.
+        """
+        data = self.api.request(['enable', *commands], encoding='json')
+        chunks = self.api.send_stream(data, chunk_size=chunk_size)
+
+        # the "result" list has the output of 'enable' first
+
+        item_paths = {index: streams[command]
+                      for index, command in enumerate(commands, start=1) if command in streams}
+        results = dict()
+
+        try:
+            for index, item in iter_items(chunks, ('result',), item_paths):
+                if index == 0:
+                    continue
+
+                command = commands[index - 1]
+                projection = projections.get(command)
+
+                if index not in item_paths:
+                    results[command] = self.cache.put(
+                        command, 'json', project(item, projection), projection)
+                    continue
+
+                collection_spec = projection
+                for key in streams[command]:
+                    collection_spec = sub_projection(collection_spec, key)
+
+                results[command] = self._put_records(
+                    command, streams[command], collection_spec,
+                    _project_records(item, collection_spec))
+
+            for _ in chunks:
+                pass
+
+        except StreamPathError as exc:
+            raise self._command_error(exc)
+
+        finally:
+            chunks.close()
+
+        return results
+
+    def invalidate(self, command=None, encoding=None):
+        """
+        Remove cached command results.
+
+        Parameters
+        ----------
+        command : str
+            The command to remove; all commands when None.
+
+        encoding : str
+            The encoding to remove; all encodings when None.
+        """
+        self.cache.invalidate(command=command, encoding=encoding)
+
+    def refresh(self, command, encoding='json'):
+        """
+        Re-run the command on the device, replacing any cached result.
+
+        Returns
+        -------
+        dict - results of the command
+        """
+        return self.execute(command, encoding=encoding, use_cache=False)
 
     @staticmethod
     def shorten_if_name(if_name):
         return _if_shorten_regex.sub(_if_shorten_replace_func, if_name)
+
+
+def _project_records(records, projection):
+    for key, record in records:
+        record_spec = projection if isinstance(key, int) else sub_projection(projection, key)
+        yield key, project(record, record_spec)
+
+
+def _iter_output_records(output, path):
+    try:
+        for key in path:
+            output = output[key]
+
+    except (KeyError, IndexError, TypeError):
+        raise StreamPathError(path, dict())
+
+    if isinstance(output, dict):
+        return iter(output.items())
+
+    if isinstance(output, list):
+        return enumerate(output)
+
+    raise StreamPathError(path, dict())
@@ -0,0 +1,292 @@
+#  Copyright 2019 Jeremy Schulman, nwkautomaniac@gmail.com
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""
+This file contains an asyncio version of the EOS Device class so that the show
+command data for an entire fabric can be collected concurrently from a single
+process.  The data returned is the same structured output as `Device.execute`,
+so the existing `nrfu_*` test functions can be used unchanged to validate it.
+
+This module requires the optional `aiohttp` package:
+
+    pip install nrfu-pytest-eos[async]
+
+Examples
+--------
+    from nrfupytesteos.eos_device_async import collect_fleet
+
+    results = collect_fleet(['switch-101.bld1', 'switch-102.bld1'],
+                            ['show lldp neighbors', 'show inventory'],
+                            max_concurrency=100)
+
+    for hostname, outputs in results.items():
+        if isinstance(outputs, Exception):
+            print(f"{hostname}: {outputs}")
+"""
+
+import asyncio
+import json
+
+import aiohttp
+from pyeapi.eapilib import CommandError, ConnectionError
+
+from nrfupytesteos.eos_device import Device, CommandCache, connect_args
+from nrfupytesteos.projection import project
+
+__all__ = ['AsyncDevice', 'collect', 'collect_fleet']
+
+_DEFAULT_PORTS = {
+    'http': 80,
+    'https': 443
+}
+
+
+class AsyncDevice(object):
+    """
+    An Arista EOS Device class that provides asyncio access via the eAPI.
+
+    Devices can share a single `aiohttp.ClientSession` so that the total number
+    of open connections is bounded by the session connector rather than by the
+    number of devices.
+    """
+    DEFAULT_TRANSPORT = Device.DEFAULT_TRANSPORT
+
+    def __init__(self, hostname, username=None, password=None,
+                 transport=None, port=None,
+                 ssh_config_file=None, cache_ttl=None,
+                 session=None, timeout=60):
+
+        self.hostname = hostname
+        self.cache = CommandCache(ttl=cache_ttl)
+        self.timeout = timeout
+
+        c_args = connect_args(hostname, username=username, password=password,
+                              transport=transport, port=port,
+                              ssh_config_file=ssh_config_file)
+
+        transport = c_args.get('transport') or self.DEFAULT_TRANSPORT
+        self.host = c_args['host']
+        self.port = int(c_args.get('port') or _DEFAULT_PORTS[transport])
+        self.url = f"{transport}://{self.host}:{self.port}/command-api"
+
+        self._auth = aiohttp.BasicAuth(c_args['username'] or '',
+                                       c_args['password'] or '')
+        self._session = session
+        self._owns_session = session is None
+        self._reqid = 0
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    @property
+    def session(self):
+        if self._session is None:
+            # EOS devices use self-signed certificates, so as with pyeapi the
+            # certificate verification is disabled.
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(ssl=False))
+        return self._session
+
+    async def close(self):
+        if self._owns_session and self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def probe(self, timeout=5):
+        try:
+            _, writer = await asyncio.wait_for(
+                asyncio.open_connection(self.host, self.port), timeout)
+
+        except Exception:
+            return False
+
+        # the device is reachable once connected, even if the close fails
+
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except OSError:
+            pass
+
+        return True
+
+    async def execute(self, command, encoding='json', use_cache=True,
+                      projection=None):
+        """
+        Execute an operational command, "show version" for example.
+
+        Parameters
+        ----------
+        command : str - command to execute
+
+        encoding : str
+            The return format encoding, defaults to 'json'.
+
+        use_cache : bool
+            When True (default) return the cached result if one exists and
+            has not expired.
+
+        projection : dict | list
+            When given, the result is pruned to the projected fields.
+
+        Returns
+        -------
+        dict - results of the command
+        """
+        results = await self.execute_many(
+            [command], encoding=encoding, use_cache=use_cache,
+            projections={command: projection} if projection else None)
+
+        return results[command]
+
+    async def execute_many(self, commands, encoding='json', use_cache=True,
+                           projections=None):
+        """
+        Execute a list of operational commands in a single eAPI request.  See
+        `Device.execute_many` for details.
+
+        Returns
+        -------
+        dict - results of each command, keyed by the command string
+        """
+        commands = list(dict.fromkeys(commands))
+        projections = projections or dict()
+        results = dict()
+
+        if use_cache:
+            for command in commands:
+                cached = self.cache.get(command, encoding, projections.get(command))
+                if cached is not None:
+                    results[command] = cached
+
+        fetch = [command for command in commands if command not in results]
+        if fetch:
+            res = await self._run_cmds(['enable', *fetch], encoding=encoding)
+            for command, output in zip(fetch, res['result'][1:]):
+                projection = projections.get(command)
+                results[command] = self.cache.put(
+                    command, encoding, project(output, projection), projection)
+
+        return {command: results[command] for command in commands}
+
+    def invalidate(self, command=None, encoding=None):
+        self.cache.invalidate(command=command, encoding=encoding)
+
+    async def refresh(self, command, encoding='json'):
+        return await self.execute(command, encoding=encoding, use_cache=False)
+
+    async def _run_cmds(self, commands, encoding):
+        self._reqid += 1
+        request = {
+            'jsonrpc': '2.0',
+            'method': 'runCmds',
+            'params': {'version': 1, 'cmds': commands, 'format': encoding},
+            'id': str(self._reqid)
+        }
+
+        try:
+            async with self.session.post(
+                    self.url, auth=self._auth,
+                    data=json.dumps(request),
+                    headers={'Content-Type': 'application/json-rpc'},
+                    timeout=aiohttp.ClientTimeout(total=self.timeout)) as resp:
+
+                content = await resp.read()
+
+                # a non-200 response, for example a 401 or the HTML page of a
+                # 5xx error, is a device error rather than an eAPI response.
+
+                if resp.status != 200:
+                    raise ConnectionError(
+                        self.url, f'{resp.status} {resp.reason}. {content.decode(errors="replace")}')
+
+        except (aiohttp.ClientError, asyncio.TimeoutError, OSError) as exc:
+            raise ConnectionError(self.url, f'eAPI connection error: {exc!r}')
+
+        try:
+            decoded = json.loads(content)
+        except ValueError:
+            raise ConnectionError(self.url, 'unable to connect to eAPI')
+
+        if 'error' in decoded:
+            error = decoded['error']
+            raise CommandError(error.get('code'), error.get('message'),
+                               commands=commands,
+                               output=error.get('data'))
+
+        return decoded
+
+    @staticmethod
+    def shorten_if_name(if_name):
+        return Device.shorten_if_name(if_name)
+
+
+async def collect(devices, commands, max_concurrency=50, encoding='json',
+                  projections=None):
+    """
+    Run the same list of commands on each device, with at most
+    `max_concurrency` devices in flight at any one time.
+
+    Parameters
+    ----------
+    devices : list[AsyncDevice]
+    commands : list[str] - the commands to run on every device
+    max_concurrency : int - the maximum number of devices in flight
+    encoding : str - the return format encoding
+    projections : dict - the projection spec of each command, see projection.py
+
+    Returns
+    -------
+    dict
+        key: hostname, value: the `execute_many` results dict for the device or
+        the exception raised when collecting from that device.
+    """
+    limit = asyncio.Semaphore(max_concurrency)
+
+    async def collect_device(dev):
+        async with limit:
+            try:
+                return await dev.execute_many(commands, encoding=encoding,
+                                              projections=projections)
+            except Exception as exc:
+                return exc
+
+    results = await asyncio.gather(*(collect_device(dev) for dev in devices))
+    return {dev.hostname: result for dev, result in zip(devices, results)}
+
+
+def collect_fleet(hostnames, commands, max_concurrency=50, encoding='json',
+                  projections=None, **device_kwargs):
+    """
+    Blocking wrapper around `collect` for use from synchronous code.  All
+    devices share one HTTP session bounded to `max_concurrency` connections.
+
+    Returns
+    -------
+    dict - see `collect`
+    """
+    async def run():
+        connector = aiohttp.TCPConnector(ssl=False, limit=max_concurrency)
+        async with aiohttp.ClientSession(connector=connector) as session:
+            devices = [AsyncDevice(hostname, session=session, **device_kwargs)
+                       for hostname in hostnames]
+            return await collect(devices, commands,
+                                 max_concurrency=max_concurrency,
+                                 encoding=encoding,
+                                 projections=projections)
+
+    return asyncio.run(run())
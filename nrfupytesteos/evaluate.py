@@ -0,0 +1,180 @@
+#  Copyright 2019 Jeremy Schulman, nwkautomaniac@gmail.com
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""
+This file contains the bulk evaluation of a list of test-cases against one
+show output dataset, used by the `evaluate_all` function of each `nrfu_*`
+module so that scripted runs outside of pytest can check a large number of
+test-cases in one pass.
+
+The result of each test-case is stored as a compact code in an array, and only
+the failed test-cases keep their Verdict (see nrfu_exc.py), from which the
+message is formatted when it is asked for.
+
+Examples
+--------
+    from nrfupytesteos import nrfu_interface_status as nrfu
+
+    actual = nrfu.snapshot_testdata(dev)
+    results = nrfu.evaluate_all(dev, actual, testcases)
+
+    print(results.counts())
+    for index, message in results.messages():
+        print(nrfu.name_test(testcases[index]), message)
+"""
+
+from array import array
+import time
+
+from nrfupytesteos.nrfu_exc import NrfuError, Verdict
+
+__all__ = ['PASS', 'FAIL', 'ERROR', 'EvalResults', 'evaluate_all']
+
+# the result codes; FAIL when the check returned a failed Verdict or raised an
+# NrfuError, ERROR when it raised any other exception, for example for a
+# malformed test-case.
+
+PASS, FAIL, ERROR = 0, 1, 2
+
+_CODE_NAMES = ('pass', 'fail', 'error')
+
+
+class EvalResults(object):
+    """
+    The results of `evaluate_all`.
+
+    Attributes
+    ----------
+    testcases : list - the evaluated test-cases
+
+    codes : array
+        The PASS, FAIL or ERROR code of each test-case, in test-case order.
+
+    elapsed : float - the seconds taken by the checks of all of the test-cases
+
+    durations : array
+        The seconds taken by the check of each test-case, in test-case order;
+        empty unless `evaluate_all` was called with durations=True.
+
+    errors : dict
+        key: test-case index, value: the failed Verdict or the exception
+        raised for the test-case
+    """
+    def __init__(self, testcases):
+        self.testcases = testcases
+        self.codes = array('b')
+        self.elapsed = 0.0
+        self.durations = array('d')
+        self.errors = dict()
+
+    def __len__(self):
+        return len(self.codes)
+
+    def counts(self):
+        """ Returns the number of test-cases for each of 'pass', 'fail' and 'error' """
+        return {name: self.codes.count(code) for code, name in enumerate(_CODE_NAMES)}
+
+    def duration(self, index):
+        """
+        Returns the seconds taken by the check of the test-case at index, or
+        the mean of all of the checks when each one was not timed.
+        """
+        if self.durations:
+            return self.durations[index]
+
+        return self.elapsed / len(self.codes) if self.codes else 0.0
+
+    def message(self, index):
+        """ Returns the message of the test-case at index, None when it passed """
+        error = self.errors.get(index)
+        if error is None:
+            return None
+
+        return str(error) if isinstance(error, (Verdict, NrfuError)) else repr(error)
+
+    def data(self, index):
+        """
+        Returns the failure data of the test-case at index, for example the
+        'expected' and 'actual' values of a mismatch; None when it passed or
+        raised an exception other than an NrfuError.
+        """
+        error = self.errors.get(index)
+
+        if isinstance(error, Verdict):
+            return error.data
+
+        if isinstance(error, NrfuError):
+            return {name: value for name, value in vars(error).items() if name != 'extra'}
+
+        return None
+
+    def messages(self):
+        """ Yields (index, message) for each test-case that did not pass """
+        for index in sorted(self.errors):
+            yield index, self.message(index)
+
+
+def evaluate_all(check_func, device, actual, testcases, durations=False):
+    """
+    Evaluate each test-case with the NRFU check function.  The checks are
+    timed as a whole, and each one only when `durations` is True, as the
+    clock reads cost about as much as a check.
+
+    Parameters
+    ----------
+    check_func : callable
+        The `check_*` function of an NRFU module, called as
+        check_func(device, actual, testcase), that returns a Verdict.  A
+        `test_*` function that raises on failure can also be used.
+
+    device : Device instance
+    actual : dict - the show output dataset used by the test function
+    testcases : list - the test-cases
+    durations : bool - time the check of each test-case, see EvalResults
+
+    Returns
+    -------
+    EvalResults
+    """
+    results = EvalResults(testcases)
+    codes, errors = results.codes, results.errors
+    append_duration = results.durations.append
+    clock = time.perf_counter
+    started = clock()
+
+    for index, testcase in enumerate(testcases):
+        if durations:
+            check_started = clock()
+
+        try:
+            verdict = check_func(device, actual, testcase)
+            if isinstance(verdict, Verdict) and not verdict.passed:
+                codes.append(FAIL)
+                errors[index] = verdict
+            else:
+                codes.append(PASS)
+
+        except NrfuError as error:
+            codes.append(FAIL)
+            errors[index] = error
+
+        except Exception as error:
+            codes.append(ERROR)
+            errors[index] = error
+
+        if durations:
+            append_duration(clock() - check_started)
+
+    results.elapsed = clock() - started
+    return results
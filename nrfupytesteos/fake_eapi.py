@@ -0,0 +1,420 @@
+#  Copyright 2019 Jeremy Schulman, nwkautomaniac@gmail.com
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""
+This file contains a fake eAPI server, which serves captured or synthetic show
+output to the eAPI JSON-RPC requests of a fleet of virtual devices, so that the
+online path (the Device class, the connection pool, the pytest plugin, the
+`nrfu` command and nrfu-snapshot.py) can be exercised and load tested without
+switches.
+
+Each virtual device listens on its own local port; the accept loop of all the
+devices runs in one thread, and each connection is served by its own thread,
+over HTTP/1.1 keep-alive.  The responses can be delayed by a latency and
+jitter, and a fraction of the requests can fail with a command error, have the
+connection dropped without a response, or stall so that the client times out.
+
+The devices are reached through an SSH config file with a LocalForward entry
+per device, and the EOS_TRANSPORT variable, since the fake server uses plain
+HTTP:
+
+    nrfu-fake-eapi --devices 200 --size large --latency 0.05 --jitter 0.02 \\
+        --ssh-config fake.ssh --inventory fake.txt
+
+    EOS_TRANSPORT=http nrfu --inventory fake.txt --ssh-config fake.ssh --testcasedir fake
+
+Examples
+--------
+    outputs = CaptureStore.load('offline-demo/dev1-show-outputs').outputs
+    with FakeEapiFleet(['dev1', 'dev2'], Responder(outputs)) as fleet:
+        fleet.write_ssh_config('fake.ssh')
+        ...
+        print(fleet.stats())
+"""
+
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import argparse
+import json
+import random
+import selectors
+import signal
+import sys
+import threading
+import time
+
+from nrfupytesteos.eapi_capture import CaptureStore
+from nrfupytesteos import synthetic
+
+__all__ = ['Responder', 'Faults', 'FakeEapiFleet', 'main']
+
+# the eAPI error codes used by the fake server
+
+_INVALID_COMMAND = 1002
+_COMMAND_FAILED = 1000
+_PARSE_ERROR = -32700
+
+
+class Responder(object):
+    """
+    Creates the eAPI JSON-RPC responses from the show output.  The output of
+    each command is encoded once, and the responses are made by joining the
+    encoded outputs.
+
+    Parameters
+    ----------
+    outputs : dict - key: encoding, value: dict, key: command, value: output;
+        as the `outputs` of a CaptureStore
+    pad_bytes : int - the size of a filler field added to each 'json' output,
+        to increase the payload size
+    """
+    def __init__(self, outputs, pad_bytes=0):
+        self.outputs = outputs
+        self.pad_bytes = pad_bytes
+        self._encoded = dict()
+
+    def encoded(self, command, encoding):
+        """ Returns the encoded output of the command, or None when there is none """
+        key = (command, encoding)
+        if key not in self._encoded:
+            output = {} if command == 'enable' else self.outputs.get(encoding, {}).get(command)
+
+            if output is not None and encoding == 'json' and self.pad_bytes:
+                output = dict(output, fakePadding='x' * self.pad_bytes)
+
+            self._encoded[key] = None if output is None else json.dumps(output).encode()
+
+        return self._encoded[key]
+
+    def respond(self, request_id, commands, encoding='json'):
+        """ Returns the response content bytes of the runCmds request """
+        results = list()
+
+        for index, command in enumerate(commands):
+            if isinstance(command, dict):
+                command = command.get('cmd')
+
+            content = self.encoded(command, encoding)
+            if content is None:
+                return self.error(
+                    request_id, _INVALID_COMMAND,
+                    f"CLI command {index + 1} of {len(commands)} '{command}' failed: invalid command",
+                    results=len(results), errors=["Invalid input"])
+
+            results.append(content)
+
+        return b''.join((b'{"jsonrpc": "2.0", "id": ', json.dumps(request_id).encode(),
+                         b', "result": [', b', '.join(results), b']}'))
+
+    @staticmethod
+    def error(request_id, code, message, results=0, errors=None):
+        """
+        Returns the error response content bytes; as with EOS, the data has an
+        empty result for each command that ran before the failed one.
+        """
+        data = [{}] * results + [{'errors': errors or [message]}]
+        return json.dumps({'jsonrpc': '2.0', 'id': request_id, 'error': {
+            'code': code, 'message': message, 'data': data}}).encode()
+
+
+class Faults(object):
+    """
+    The latency and the failures injected into the responses.
+
+    Parameters
+    ----------
+    latency : float - the delay of each response, in seconds
+    jitter : float - a random delay of up to this many seconds added to the latency
+    error_rate : float - the fraction of the requests that fail with a command error
+    drop_rate : float - the fraction of the requests whose connection is closed
+        without a response
+    stall_rate : float - the fraction of the requests that are not answered
+        within `stall_time`, so that the client times out
+    stall_time : float - the delay of a stalled request, in seconds
+    seed : int - the random seed, for repeatable runs
+    """
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0, drop_rate=0.0,
+                 stall_rate=0.0, stall_time=120.0, seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.drop_rate = drop_rate
+        self.stall_rate = stall_rate
+        self.stall_time = stall_time
+        self._random = random.Random(seed)
+
+    def delay(self):
+        """ Returns the delay of a response, in seconds """
+        return self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0.0)
+
+    def draw(self):
+        """ Returns the fault of a request: 'drop', 'stall', 'error' or None """
+        value = self._random.random()
+
+        for fault, rate in (('drop', self.drop_rate), ('stall', self.stall_rate),
+                            ('error', self.error_rate)):
+            if value < rate:
+                return fault
+            value -= rate
+
+        return None
+
+
+class _EapiHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, content, content_type='application/json'):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+        self.server.fleet.count(responses=1, bytes_sent=len(content))
+
+    def do_POST(self):
+        fleet = self.server.fleet
+        body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        fleet.count(requests=1)
+
+        if self.path != '/command-api':
+            self._send(404, b'Not Found', 'text/plain')
+            return
+
+        fault = fleet.faults.draw()
+        time.sleep(fleet.faults.delay())
+
+        if fault in ('drop', 'stall'):
+            if fault == 'stall':
+                time.sleep(fleet.faults.stall_time)
+
+            fleet.count(**{fault + 's': 1})
+            self.close_connection = True
+            return
+
+        try:
+            request = json.loads(body)
+            request_id = request.get('id')
+            params = request['params']
+
+        except (ValueError, KeyError, AttributeError):
+            self._send(200, Responder.error(None, _PARSE_ERROR, 'Parse error'))
+            return
+
+        commands = params.get('cmds') or []
+
+        if fault == 'error':
+            fleet.count(errors=1)
+            content = Responder.error(
+                request_id, _COMMAND_FAILED,
+                f"CLI command 1 of {len(commands)} '{commands[0] if commands else ''}' "
+                f"failed: could not run command")
+        else:
+            content = self.server.responder.respond(request_id, commands,
+                                                   params.get('format') or 'json')
+
+        self._send(200, content)
+
+
+class _DeviceServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, hostname, address, fleet, responder):
+        self.hostname = hostname
+        self.fleet = fleet
+        self.responder = responder
+        super(_DeviceServer, self).__init__(address, _EapiHandler)
+
+
+class FakeEapiFleet(object):
+    """
+    A fleet of virtual eAPI devices, each listening on a local port.
+
+    Parameters
+    ----------
+    hostnames : list - the virtual device names
+    responder : Responder - the show output served by all of the devices, or a
+        callable that returns the Responder of a device name
+    faults : Faults - the latency and failures, by default none
+    host : str - the listen address
+    base_port : int - the port of the first device, the others follow it; by
+        default a free port is used for each device
+    """
+    def __init__(self, hostnames, responder, faults=None, host='127.0.0.1', base_port=0):
+        self.faults = faults or Faults()
+        self.host = host
+        self.servers = list()
+
+        self._lock = threading.Lock()
+        self._stats = Counter()
+        self._thread = None
+        self._stop = threading.Event()
+
+        responder_for = responder if callable(responder) else (lambda hostname: responder)
+
+        try:
+            for index, hostname in enumerate(hostnames):
+                port = base_port + index if base_port else 0
+                self.servers.append(
+                    _DeviceServer(hostname, (host, port), self, responder_for(hostname)))
+        except Exception:
+            self.close()
+            raise
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @property
+    def addresses(self):
+        """ dict - key: device name, value: (host, port) """
+        return {server.hostname: server.server_address[:2] for server in self.servers}
+
+    def count(self, **counts):
+        with self._lock:
+            self._stats.update(counts)
+
+    def stats(self):
+        """ Returns the counters of the requests served by the fleet """
+        with self._lock:
+            stats = dict.fromkeys(('requests', 'responses', 'errors', 'drops',
+                                   'stalls', 'bytes_sent'), 0)
+            stats.update(self._stats)
+            return stats
+
+    def start(self):
+        """ Start the accept loop of the devices in a background thread """
+        self._thread = threading.Thread(target=self._serve, name='fake-eapi', daemon=True)
+        self._thread.start()
+
+    def _serve(self):
+        # one selector for the listening sockets of all of the devices, so that
+        # a fleet of hundreds of devices does not need a thread per device.
+
+        with selectors.DefaultSelector() as selector:
+            for server in self.servers:
+                selector.register(server.socket, selectors.EVENT_READ, server)
+
+            while not self._stop.is_set():
+                for key, _ in selector.select(timeout=0.5):
+                    key.data._handle_request_noblock()
+
+    def close(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+        for server in self.servers:
+            server.server_close()
+
+    def write_ssh_config(self, path):
+        """ Write the SSH config file that resolves each device name to its port """
+        with open(path, 'w') as ofile:
+            for hostname, (host, port) in self.addresses.items():
+                ofile.write(f"Host {hostname}\n    LocalForward {port} {host}:80\n\n")
+
+    def write_inventory(self, path):
+        """ Write the inventory file of the device names, one per line """
+        with open(path, 'w') as ofile:
+            ofile.writelines(f"{server.hostname}\n" for server in self.servers)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='nrfu-fake-eapi', description='Serve a fleet of fake eAPI devices')
+
+    parser.add_argument('--devices', type=int, default=1, help='number of virtual devices')
+    parser.add_argument('--prefix', default='fake', help='device name prefix')
+
+    output = parser.add_mutually_exclusive_group()
+    output.add_argument('--capture', help='serve the show output of this capture')
+    output.add_argument('--size', choices=list(synthetic.SIZES), default='small',
+                        help='serve the show output of a synthetic device of this size')
+
+    parser.add_argument('--pad-bytes', type=int, default=0,
+                        help='size of a filler field added to each JSON output')
+
+    parser.add_argument('--latency', type=float, default=0.0, help='response delay, in seconds')
+    parser.add_argument('--jitter', type=float, default=0.0,
+                        help='random delay of up to this many seconds added to the latency')
+    parser.add_argument('--error-rate', type=float, default=0.0,
+                        help='fraction of the requests that fail with a command error')
+    parser.add_argument('--drop-rate', type=float, default=0.0,
+                        help='fraction of the requests closed without a response')
+    parser.add_argument('--stall-rate', type=float, default=0.0,
+                        help='fraction of the requests not answered within --stall-time')
+    parser.add_argument('--stall-time', type=float, default=120.0,
+                        help='delay of a stalled request, in seconds')
+    parser.add_argument('--seed', type=int, help='random seed of the faults')
+
+    parser.add_argument('--host', default='127.0.0.1', help='listen address')
+    parser.add_argument('--base-port', type=int, default=0,
+                        help='port of the first device; by default free ports are used')
+
+    parser.add_argument('--ssh-config', help='SSH config file to write')
+    parser.add_argument('--inventory', help='inventory file of the device names to write')
+
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    outputs = (CaptureStore.load(args.capture).outputs if args.capture
+               else {'json': synthetic.make_outputs(**synthetic.SIZES[args.size])})
+
+    width = len(str(args.devices))
+    hostnames = [f"{args.prefix}{index:0{width}d}" for index in range(1, args.devices + 1)]
+
+    faults = Faults(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                    drop_rate=args.drop_rate, stall_rate=args.stall_rate,
+                    stall_time=args.stall_time, seed=args.seed)
+
+    with FakeEapiFleet(hostnames, Responder(outputs, pad_bytes=args.pad_bytes), faults,
+                       host=args.host, base_port=args.base_port) as fleet:
+
+        if args.ssh_config:
+            fleet.write_ssh_config(args.ssh_config)
+        if args.inventory:
+            fleet.write_inventory(args.inventory)
+
+        ports = [port for _, port in fleet.addresses.values()]
+        print(f"serving {len(hostnames)} devices on {args.host} ports "
+              f"{min(ports)}-{max(ports)}, Ctrl-C to stop", file=sys.stderr, flush=True)
+
+        # stop on Ctrl-C, or on SIGTERM when run in the background, for
+        # example by a CI job.
+
+        signal.signal(signal.SIGTERM, signal.default_int_handler)
+
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
+
+        print(' '.join(f"{name}={value}" for name, value in fleet.stats().items()),
+              file=sys.stderr)
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
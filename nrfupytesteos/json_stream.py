@@ -0,0 +1,298 @@
+#  Copyright 2019 Jeremy Schulman, nwkautomaniac@gmail.com
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""
+This file contains an incremental JSON decoder used to stream the records of a
+large show command output, for example the interfaces of "show interfaces",
+as the response arrives rather than decoding the complete response first.
+
+The decoder walks the response down to the collection at the given path and
+then decodes one record at a time, so that the peak memory is bounded by the
+size of a single record plus one chunk of the response.
+
+Examples
+--------
+    "show interfaces" records of an eAPI response with the commands
+    ['enable', 'show interfaces']:
+
+        for name, data in iter_records(chunks, ('result', 1, 'interfaces')):
+            print(name, data['interfaceStatus'])
+"""
+
+import codecs
+import json
+
+__all__ = ['iter_records', 'iter_items', 'StreamPathError']
+
+_WHITESPACE = ' \t\n\r'
+
+
+class StreamPathError(LookupError):
+    def __init__(self, path, skipped):
+        super(StreamPathError, self).__init__(f"No JSON collection at path {path}")
+        self.path = path
+        self.skipped = skipped
+
+
+class _Scanner(object):
+    """
+    A cursor over a JSON document that is given as an iterable of chunks, str
+    or bytes.  The consumed part of the buffer is dropped as more chunks are
+    read.
+    """
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._utf8 = codecs.getincrementaldecoder('utf-8')()
+        self._decoder = json.JSONDecoder()
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self):
+        chunk = next(self._chunks, None)
+        if chunk is None:
+            self.eof = True
+            return False
+
+        if isinstance(chunk, bytes):
+            chunk = self._utf8.decode(chunk)
+
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """ Returns the next non-whitespace character, '' at the end """
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in _WHITESPACE:
+                self.pos += 1
+
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+
+            if not self._fill():
+                return ''
+
+    def expect(self, char):
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"Expected '{char}' at offset {self.pos}, found '{found}'")
+        self.pos += 1
+
+    def next_member(self, close):
+        """
+        Consume the separator before the next member of a collection; returns
+        False when the collection `close` character is found instead.
+        """
+        found = self.peek()
+        if found == close:
+            self.pos += 1
+            return False
+
+        if found == ',':
+            self.pos += 1
+
+        return True
+
+    def value(self):
+        """ Decode the next complete JSON value """
+        self.peek()
+
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self.buf, self.pos)
+
+                # a number at the end of the buffer may continue in the next
+                # chunk, so a value is only accepted when followed by another
+                # character.
+
+                if end < len(self.buf) or self.eof:
+                    self.pos = end
+                    return value
+
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+
+            # read until the pending text doubles, so that a record spanning
+            # many chunks is not decoded from its start once per chunk.
+
+            pending = len(self.buf) - self.pos
+            while self._fill() and len(self.buf) - self.pos < 2 * pending:
+                pass
+
+
+def _descend(scanner, path, skipped):
+    for depth, step in enumerate(path):
+        if isinstance(step, int):
+            scanner.expect('[')
+            for _ in range(step):
+                if not scanner.next_member(']'):
+                    raise StreamPathError(path, skipped)
+                scanner.value()
+
+            if not scanner.next_member(']'):
+                raise StreamPathError(path, skipped)
+            continue
+
+        scanner.expect('{')
+        while True:
+            if not scanner.next_member('}'):
+                raise StreamPathError(path, skipped)
+
+            key = scanner.value()
+            scanner.expect(':')
+            if key == step:
+                break
+
+            value = scanner.value()
+            if depth == 0:
+                skipped[key] = value
+
+
+def _ascend(scanner, path):
+    # skip the rest of each collection on the path, from the innermost out
+
+    for step in reversed(path):
+        close = ']' if isinstance(step, int) else '}'
+        while scanner.next_member(close):
+            if close == '}':
+                scanner.value()
+                scanner.expect(':')
+            scanner.value()
+
+
+def _records(scanner, path, skipped):
+    found = scanner.peek()
+    if not found or found not in '{[':
+        raise StreamPathError(path, skipped)
+
+    scanner.pos += 1
+    close = '}' if found == '{' else ']'
+    index = 0
+
+    while scanner.next_member(close):
+        if close == '}':
+            key = scanner.value()
+            scanner.expect(':')
+        else:
+            key = index
+            index += 1
+
+        yield key, scanner.value()
+
+
+def iter_records(chunks, path=(), skipped=None):
+    """
+    Yield the records of the JSON collection found at `path` as they are
+    decoded from the `chunks` of the document.
+
+    Parameters
+    ----------
+    chunks : iterable
+        The JSON document, as str or bytes chunks.
+
+    path : tuple
+        The dict keys and list indexes from the document root down to the
+        collection of records.
+
+    skipped : dict
+        When given, the members of the root object that are not on the path
+        are stored in this dict, for example the eAPI "error" member.
+
+    Yields
+    ------
+    tuple
+        (key, record) for a dict collection, (index, record) for a list
+        collection.
+
+    Raises
+    ------
+    StreamPathError
+        When the document does not contain the path.
+    """
+    scanner = _Scanner(chunks)
+    skipped = dict() if skipped is None else skipped
+
+    _descend(scanner, path, skipped)
+    yield from _records(scanner, path, skipped)
+
+
+def iter_items(chunks, path=(), item_paths=None, skipped=None):
+    """
+    Yield the items of the JSON list found at `path` as they are decoded from
+    the `chunks` of the document, for example the command outputs of the
+    "result" list of an eAPI response.  An item that has a path in
+    `item_paths` is not decoded as a whole: the records of its collection at
+    that path are decoded one at a time, and the rest of the item is skipped.
+
+    Parameters
+    ----------
+    chunks : iterable
+        The JSON document, as str or bytes chunks.
+
+    path : tuple
+        The dict keys and list indexes from the document root down to the
+        list of items.
+
+    item_paths : dict
+        key: item index, value: the dict keys and list indexes from the item
+        down to the collection of records.
+
+    skipped : dict - see `iter_records`
+
+    Yields
+    ------
+    tuple
+        (index, item) for an item decoded as a whole, and (index, records)
+        for an item with a path, where records yields the records of the
+        collection as `iter_records` does.  The records must be consumed
+        before the next item, they are skipped otherwise.
+
+    Raises
+    ------
+    StreamPathError
+        When the document does not contain the path, or an item the item
+        path.
+    """
+    scanner = _Scanner(chunks)
+    skipped = dict() if skipped is None else skipped
+    item_paths = item_paths or dict()
+
+    _descend(scanner, path, skipped)
+    scanner.expect('[')
+    index = 0
+
+    while scanner.next_member(']'):
+        item_path = item_paths.get(index)
+
+        if item_path is None:
+            yield index, scanner.value()
+
+        else:
+            full_path = path + (index, *item_path)
+            try:
+                _descend(scanner, item_path, dict())
+            except StreamPathError:
+                raise StreamPathError(full_path, skipped)
+
+            records = _records(scanner, full_path, skipped)
+            yield index, records
+
+            for _ in records:
+                pass
+
+            _ascend(scanner, item_path)
+
+        index += 1
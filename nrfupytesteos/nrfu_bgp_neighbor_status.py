@@ -58,42 +58,68 @@ Examples - "show ip bpg summary"
 """
 
 from nrfupytesteos import nrfu_exc as exc
+from nrfupytesteos import evaluate
 
-TEST_CASE = "test-bgp-neighbors"
-
-# def make_testcase(dut, lag_name, interfaces):
-#     return {
-#         "test-case": TEST_CASE,
-#         "dut": dut,
-#         "params": {
-#             "name": lag_name
-#         },
-#         "expected": {
-#             "interfaces": interfaces
-#         }
-#     }
-#
-#
-# def snapshot_testdata(device):
-#     return device.execute('show lacp neighbor')
+TEST_CASE_NAME = "test-bgp-neighbors"
+SHOW_COMMAND = "show ip bgp summary"
 
+# TEST_CASE is the original name of TEST_CASE_NAME
+
+TEST_CASE = TEST_CASE_NAME
+
+# the fields of the "show ip bgp summary" output used by this module; the
+# output is pruned to these fields when it is fetched.
+
+PROJECTIONS = {
+    SHOW_COMMAND: {'vrfs': {'default': {'peers': {'*': ['peerState']}}}}
+}
+
+# the keyed collections of the output, used by drift.py: peers by address
+
+COLLECTIONS = {
+    SHOW_COMMAND: (('vrfs', 'default', 'peers'), None)
+}
+
+# the output is streamed one peer at a time, so that only the projected fields
+# are held in memory; see Device.execute_records.
+
+STREAM_PATHS = {
+    SHOW_COMMAND: ('vrfs', 'default', 'peers')
+}
 
-# def snapshot_testcases(device):
-#     data = snapshot_testdata(device)
-#     lags = data.get('portChannels')
-#
-#     return [
-#         make_testcase(dut=device.hostname,
-#                       lag_name=lag_name,
-#                       interfaces=list(lag_data['interfaces']))
-#         for lag_name, lag_data in lags.items()
-#     ]
+
+def snapshot_testdata(device):
+    return device.execute_records(SHOW_COMMAND, STREAM_PATHS[SHOW_COMMAND],
+                                  PROJECTIONS[SHOW_COMMAND])
 
 
 def name_test(item):
     """ used for pytest verbose output """
     p = item['params']
-    return f"{p['peer_device']} role={p['role']} via={p['peer_ip']}"
+    return f"{p['peer_device']} role={p['peer_role']} via={p['peer_ip']}"
+
+
+def check_bgp_nei_status(device, actual, testcase):
+    """
+    Checks the test-case against the "show ip bgp summary" dataset,
+    returning a Verdict rather than raising; see `test_bgp_nei_status`.
+
+    Returns
+    -------
+    Verdict - exc.PASSED when the test-case passes
+    """
+    peer_ip = testcase['params']['peer_ip']
+    actual_peers = actual["vrfs"]['default']['peers']
+
+    bgp_nei = actual_peers.get(peer_ip)
+    if not bgp_nei:
+        return exc.missing(missing=peer_ip)
+
+    actual_state = bgp_nei["peerState"]
+    if actual_state != 'Established':
+        return exc.mismatch(expected="Established", actual=actual_state)
+
+    return exc.PASSED
 
 
 def test_bgp_nei_status(device, actual, testcase):
@@ -122,15 +148,16 @@ def test_bgp_nei_status(device, actual, testcase):
     MismatchError:
         When the BGP neighbor is not in the "up" status
     """
-    peer_ip = testcase['params']['peer_ip']
-    actual_peers = actual["vrfs"]['default']['peers']
+    return exc.raise_on_failure(check_bgp_nei_status(device, actual, testcase))
 
-    bgp_nei = actual_peers.get(peer_ip)
-    if not bgp_nei:
-        raise exc.MissingError(missing=bgp_nei)
 
-    actual_state = bgp_nei["peerState"]
-    if actual_state != 'Established':
-        raise exc.MismatchError(expected="Established", actual=actual_state)
+def evaluate_all(device, actual, testcases, durations=False):
+    """
+    Check all of the test-cases against the "show ip bgp summary" dataset in one
+    pass; see `evaluate.evaluate_all`.
 
-    return True
+    Returns
+    -------
+    EvalResults
+    """
+    return evaluate.evaluate_all(check_bgp_nei_status, device, actual, testcases, durations)
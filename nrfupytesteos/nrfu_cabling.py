@@ -66,10 +66,79 @@ Examples
 }
 """
 
-from first import first
+from collections import defaultdict
+
 from nrfupytesteos import nrfu_exc as exc
+from nrfupytesteos import evaluate
 
 TEST_CASE_NAME = 'test-cabling'
+SHOW_COMMAND = "show lldp neighbors"
+
+# the fields of the "show lldp neighbors" output used by this module; the
+# output is pruned to these fields when it is fetched.
+
+PROJECTIONS = {
+    SHOW_COMMAND: {'lldpNeighbors': ['port', 'neighborDevice', 'neighborPort']}
+}
+
+# the keyed collections of the output, used by drift.py: the path to the
+# collection, and the fields that identify a list item.
+
+COLLECTIONS = {
+    SHOW_COMMAND: (('lldpNeighbors',), ('port', 'neighborDevice'))
+}
+
+# the port index of the dataset is kept in the Device cache under this
+# encoding of the SHOW_COMMAND, so that it is dropped when the show output is.
+
+_INDEX_ENCODING = 'nrfu-port-index'
+
+
+def port_index(lldp_nbrs):
+    """
+    Returns the LLDP neighbors indexed by the local port.  A port can have more
+    than one neighbor, for example hosts behind an unmanaged switch.
+
+    Parameters
+    ----------
+    lldp_nbrs : list - the "lldpNeighbors" list of the show output
+
+    Returns
+    -------
+    dict
+        key: port name, value: list of the neighbor dicts on that port
+    """
+    index = defaultdict(list)
+    for nei in lldp_nbrs:
+        index[nei['port']].append(nei)
+
+    return dict(index)
+
+
+def device_port_index(device, actual):
+    """
+    Returns the `port_index` of the dataset, built once and then kept in the
+    Device cache for the other test-cases of the same dataset.
+
+    Parameters
+    ----------
+    device : Device instance, or None to build the index without caching it
+    actual : dict - the "show lldp neighbors" dataset
+    """
+    lldp_nbrs = actual['lldpNeighbors']
+    cache = getattr(device, 'cache', None)
+    if cache is None:
+        return port_index(lldp_nbrs)
+
+    # the cached index is only used for the very same dataset
+
+    cached = cache.get(SHOW_COMMAND, _INDEX_ENCODING)
+    if cached is not None and cached[0] is lldp_nbrs:
+        return cached[1]
+
+    index = port_index(lldp_nbrs)
+    cache.put(SHOW_COMMAND, _INDEX_ENCODING, (lldp_nbrs, index))
+    return index
 
 
 def make_testcase(dut, interface, remote_host, remote_interface, role='role=na', **extra_params):
@@ -90,7 +159,7 @@ def make_testcase(dut, interface, remote_host, remote_interface, role='role=na',
 
 
 def snapshot_testdata(device):
-    return device.execute("show lldp neighbors")
+    return device.execute(SHOW_COMMAND, projection=PROJECTIONS[SHOW_COMMAND])
 
 
 def snapshot_testcases(device):
@@ -111,16 +180,86 @@ def name_test(item):
     return f"{item['params']['interface']}<[{item['params']['role']}]->{rmt_host}:{rmt_ifn}"
 
 
-def test_cabling(device, actual, testcase):
+def check_cabling(device, actual, testcase, nbrs_index=None):
+    """
+    Checks the test-case against the "show lldp neighbors" dataset,
+    returning a Verdict rather than raising; see `test_cabling`.
+
+    Parameters
+    ----------
+    nbrs_index : dict
+        The `port_index` of the dataset; by default the `device_port_index`,
+        which is built once for all of the test-cases of the dataset.
+
+    Returns
+    -------
+    Verdict - exc.PASSED when the test-case passes
+    """
+    if_name = testcase['params']['interface']
+
+    if nbrs_index is None:
+        nbrs_index = device_port_index(device, actual)
+
+    lldp_if_nbrs = nbrs_index.get(if_name)
+    if not lldp_if_nbrs:
+        return exc.missing(
+            "Interface not found",
+            missing=if_name)
+
+    expect_rmt_dev = testcase['expected']['remote-hostname']
+    expect_rmt_ifn = testcase['expected']['remote-interface']
+
+    # when there is more than one neighbor on the port, the test-case passes
+    # when any one of them is the expected neighbor.
+
+    if len(lldp_if_nbrs) > 1:
+        expect_rmt = (expect_rmt_dev.lower(), expect_rmt_ifn.lower())
+        found = [(nei['neighborDevice'], nei['neighborPort']) for nei in lldp_if_nbrs]
+
+        if any((dev.lower(), ifn.lower()) == expect_rmt for dev, ifn in found):
+            return exc.PASSED
+
+        return exc.mismatch(
+            "Expected neighbor not found",
+            expected=f"{expect_rmt_dev}:{expect_rmt_ifn}",
+            actual=', '.join(f"{dev}:{ifn}" for dev, ifn in found)
+        )
+
+    actual_rmt_dev = lldp_if_nbrs[0]['neighborDevice']
+    actual_rmt_ifn = lldp_if_nbrs[0]['neighborPort']
+
+    wrong_dev = actual_rmt_dev.lower() != expect_rmt_dev.lower()
+    wrong_ifn = actual_rmt_ifn.lower() != expect_rmt_ifn.lower()
+
+    if not (wrong_dev or wrong_ifn):
+        return exc.PASSED
+
+    emsg = []
+
+    if wrong_dev:
+        emsg.append("Wrong remote-device: {0}")
+
+    if wrong_ifn:
+        emsg.append("Wrong remote-interface: {1}")
+
+    return exc.mismatch(
+        ', '.join(emsg), actual_rmt_dev, actual_rmt_ifn,
+        expected=f"{expect_rmt_dev}:{expect_rmt_ifn}",
+        actual=f"{actual_rmt_dev}:{actual_rmt_ifn}"
+    )
+
+
+def test_cabling(device, actual, testcase, nbrs_index=None):
     """
     This function will return a tuple (bool, str) to indicate
     if the testcase passes or fails.
 
     Parameters
     ----------
-    device : Device instance (unused)
+    device : Device instance, whose cache keeps the port index of the dataset
     actual : dict - EOS device lldp neighbors data (all interfaces)
     testcase : dict - testcase
+    nbrs_index : dict - the `port_index` of the dataset, see `check_cabling`
 
     Returns
     -------
@@ -135,34 +274,21 @@ def test_cabling(device, actual, testcase):
         When either no neighbor is found, or
         the wrong neighbor is found.
     """
-    lldp_nbrs = actual['lldpNeighbors']
-    if_name = testcase['params']['interface']
-
-    lldp_if_nbr = first(nei for nei in lldp_nbrs if nei['port'] == if_name)
-    if not lldp_if_nbr:
-        raise exc.MissingError(
-            f"Interface not found",
-            missing=if_name)
+    return exc.raise_on_failure(check_cabling(device, actual, testcase, nbrs_index))
 
-    actual_rmt_dev = lldp_if_nbr['neighborDevice']
-    actual_rmt_ifn = lldp_if_nbr['neighborPort']
 
-    expect_rmt_dev = testcase['expected']['remote-hostname']
-    expect_rmt_ifn = testcase['expected']['remote-interface']
-
-    emsg = []
-
-    if actual_rmt_dev.lower() != expect_rmt_dev.lower():
-        emsg.append(f"Wrong remote-device: {actual_rmt_dev}")
+def evaluate_all(device, actual, testcases, durations=False):
+    """
+    Check all of the test-cases against the "show lldp neighbors" dataset in one
+    pass; see `evaluate.evaluate_all`.
 
-    if actual_rmt_ifn.lower() != expect_rmt_ifn.lower():
-        emsg.append(f"Wrong remote-interface: {actual_rmt_ifn}")
+    Returns
+    -------
+    EvalResults
+    """
+    nbrs_index = device_port_index(device, actual)
 
-    if emsg:
-        raise exc.MismatchError(
-            ', '.join(emsg),
-            expected=f"{expect_rmt_dev}:{expect_rmt_ifn}",
-            actual=f"{actual_rmt_dev}:{actual_rmt_ifn}"
-        )
+    def check_indexed(device, actual, testcase):
+        return check_cabling(device, actual, testcase, nbrs_index)
 
-    return True
+    return evaluate.evaluate_all(check_indexed, device, actual, testcases, durations)
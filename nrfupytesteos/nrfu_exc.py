@@ -51,3 +51,80 @@ class MismatchError(NrfuError):
         exp_msg = f"MISMATCH:EXPECTED data: {self.expected or 'None'}"
         act_msg = f"MISMATCH:ACTUAL data: {self.actual or 'None'}"
         return '\n'.join((emsg, exp_msg, act_msg, self.extra))
+
+
+class Verdict(object):
+    """
+    The result of a test-case check, used by the `check_*` functions of the
+    NRFU modules in place of raising an NrfuError.  A failed Verdict keeps the
+    error class and its arguments, and the message is only formatted when it
+    is asked for, so that a large number of failures is cheap to produce.
+
+    Attributes
+    ----------
+    error : class
+        The NrfuError class of the failure; None when the check passed.
+
+    msg : str
+        The message format string, formatted with `msg_args` on demand.
+
+    data : dict
+        The keyword arguments of the error class, for example `missing`.
+    """
+    __slots__ = ('error', 'msg', 'msg_args', 'data')
+
+    def __init__(self, error=None, msg=None, msg_args=(), data=None):
+        self.error = error
+        self.msg = msg
+        self.msg_args = msg_args
+        self.data = data
+
+    @property
+    def passed(self):
+        return self.error is None
+
+    def message(self):
+        """ Returns the formatted error message, None when the check passed """
+        if self.error is None:
+            return None
+
+        return str(self.exception())
+
+    def exception(self):
+        """ Returns the NrfuError instance for the failure """
+        msg = self.msg.format(*self.msg_args) if self.msg_args else self.msg
+        vargs = (msg,) if msg else ()
+        return self.error(*vargs, **(self.data or {}))
+
+    def __str__(self):
+        return 'PASS' if self.error is None else self.message()
+
+    def __repr__(self):
+        name = self.error.__name__ if self.error else 'PASS'
+        return f"Verdict({name})"
+
+
+PASSED = Verdict()
+
+
+def missing(msg=None, *msg_args, missing=None):
+    return Verdict(MissingError, msg, msg_args, dict(missing=missing))
+
+
+def unexpected(msg=None, *msg_args, unexpected=None):
+    return Verdict(UnexpectedError, msg, msg_args, dict(unexpected=unexpected))
+
+
+def mismatch(msg=None, *msg_args, expected=None, actual=None):
+    return Verdict(MismatchError, msg, msg_args, dict(expected=expected, actual=actual))
+
+
+def raise_on_failure(verdict):
+    """
+    Adapter from a Verdict to the test function convention used with pytest:
+    returns True when the check passed, otherwise raises the NrfuError.
+    """
+    if verdict.error is None:
+        return True
+
+    raise verdict.exception()
@@ -107,8 +107,40 @@ Examples
 
 
 from nrfupytesteos import nrfu_exc as exc
+from nrfupytesteos import evaluate
 
 TEST_CASE_NAME = "test-interface-status"
+SHOW_COMMAND = "show interfaces"
+
+# The "show interfaces status" output is a fraction of the size of the "show
+# interfaces" output, and has the link status of the Ethernet, Management and
+# Port-Channel interfaces.  The NRFU planner fetches it instead of the "show
+# interfaces" when all of the selected test-cases are for those interfaces.
+
+STATUS_COMMAND = "show interfaces status"
+_status_if_prefixes = ('Ethernet', 'Management', 'Port-Channel')
+
+# the fields of the show outputs used by this module; the outputs are pruned to
+# these fields when fetched.
+
+PROJECTIONS = {
+    SHOW_COMMAND: {'interfaces': {'*': ['interfaceStatus']}},
+    STATUS_COMMAND: {'interfaceStatuses': {'*': ['linkStatus']}}
+}
+
+# the keyed collections of the output, used by drift.py: interfaces by name
+
+COLLECTIONS = {
+    SHOW_COMMAND: (('interfaces',), None),
+    STATUS_COMMAND: (('interfaceStatuses',), None)
+}
+
+# the "show interfaces" output is streamed one interface at a time, so that only
+# the projected fields are held in memory; see Device.execute_records.
+
+STREAM_PATHS = {
+    SHOW_COMMAND: ('interfaces',)
+}
 
 
 def make_testcase(dut, interface, state):
@@ -124,8 +156,30 @@ def make_testcase(dut, interface, state):
     }
 
 
+def plan_command(testcases):
+    """ used by the NRFU planner to select the show command for the testcases """
+    if all(tc['params']['interface'].startswith(_status_if_prefixes)
+           for tc in testcases):
+        return STATUS_COMMAND
+
+    return SHOW_COMMAND
+
+
 def snapshot_testdata(device):
-    return device.execute('show interfaces')
+    # when the planner has fetched the "show interfaces status" output, return
+    # it in the form of the "show interfaces" output used by the test function.
+
+    status = device.cache.get(STATUS_COMMAND, 'json', PROJECTIONS[STATUS_COMMAND])
+    if status is not None:
+        return {
+            'interfaces': {
+                if_name: {'interfaceStatus': if_data['linkStatus']}
+                for if_name, if_data in status['interfaceStatuses'].items()
+            }
+        }
+
+    return device.execute_records(SHOW_COMMAND, STREAM_PATHS[SHOW_COMMAND],
+                                  PROJECTIONS[SHOW_COMMAND])
 
 
 def snapshot_testcases(device):
@@ -147,39 +201,21 @@ def name_test(item):
     return f"{item['params']['interface']}:{item['expected']['state']}"
 
 
-def test_interface_status(device, actual, testcase):
+def check_interface_status(device, actual, testcase):
     """
-    This function will return a tuple (bool, str) to indicate
-    if the testcase passes or fails.
-
-    Parameters
-    ----------
-    device : Device instance
-
-    actual : dict
-        EOS device interfaces data as shown in the file comments
-
-    testcase : dict - testcase
-
+    Checks the test-case against the "show interfaces" dataset,
+    returning a Verdict rather than raising; see `test_interface_status`.
 
     Returns
     -------
-    True: when testcase passes
-
-    Raises
-    ------
-    MissingError:
-        When the requested interface does not exist in the actual dataset
-
-    MismatchError:
-        When the interface is not the expected state (up/down)
+    Verdict - exc.PASSED when the test-case passes
     """
     status = actual['interfaces']
     if_name = testcase['params']['interface']
     if_status = status.get(if_name)
 
     if not if_status:
-        raise exc.MissingError(
+        return exc.missing(
             'No status for interface',
             missing=if_name)
 
@@ -190,22 +226,64 @@ def test_interface_status(device, actual, testcase):
 
     if expected_state == 'down':
         if actual_state != 'disabled':
-            raise exc.MismatchError(
-                f'Interface {if_name} not down as expected',
+            return exc.mismatch(
+                'Interface {} not down as expected', if_name,
                 expected=expected_state,
                 actual=actual_state
             )
 
         # if here, then interface is down as expected
-        return True
+        return exc.PASSED
 
     # check expected up state condition
 
     if actual_state != 'connected':
-        raise exc.MismatchError(
-            f'Interface {if_name} not up as expected',
+        return exc.mismatch(
+            'Interface {} not up as expected', if_name,
             expected=expected_state,
             actual=actual_state
         )
 
-    return True
+    return exc.PASSED
+
+
+def test_interface_status(device, actual, testcase):
+    """
+    This function will return a tuple (bool, str) to indicate
+    if the testcase passes or fails.
+
+    Parameters
+    ----------
+    device : Device instance
+
+    actual : dict
+        EOS device interfaces data as shown in the file comments
+
+    testcase : dict - testcase
+
+
+    Returns
+    -------
+    True: when testcase passes
+
+    Raises
+    ------
+    MissingError:
+        When the requested interface does not exist in the actual dataset
+
+    MismatchError:
+        When the interface is not the expected state (up/down)
+    """
+    return exc.raise_on_failure(check_interface_status(device, actual, testcase))
+
+
+def evaluate_all(device, actual, testcases, durations=False):
+    """
+    Check all of the test-cases against the "show interfaces" dataset in one
+    pass; see `evaluate.evaluate_all`.
+
+    Returns
+    -------
+    EvalResults
+    """
+    return evaluate.evaluate_all(check_interface_status, device, actual, testcases, durations)
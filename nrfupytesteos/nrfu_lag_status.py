@@ -60,8 +60,23 @@ Examples - "show lacp neighbor"
 
 
 from nrfupytesteos import nrfu_exc as exc
+from nrfupytesteos import evaluate
 
 TEST_CASE_NAME = "test-lag-status"
+SHOW_COMMAND = "show lacp neighbor"
+
+# the fields of the "show lacp neighbor" output used by this module; the
+# output is pruned to these fields when it is fetched.
+
+PROJECTIONS = {
+    SHOW_COMMAND: {'portChannels': {'*': {'interfaces': {'*': ['actorPortStatus']}}}}
+}
+
+# the keyed collections of the output, used by drift.py: port-channels by name
+
+COLLECTIONS = {
+    SHOW_COMMAND: (('portChannels',), None)
+}
 
 
 def make_testcase(dut, lag_name, interfaces):
@@ -78,7 +93,7 @@ def make_testcase(dut, lag_name, interfaces):
 
 
 def snapshot_testdata(device):
-    return device.execute('show lacp neighbor')
+    return device.execute(SHOW_COMMAND, projection=PROJECTIONS[SHOW_COMMAND])
 
 
 def snapshot_testcases(device):
@@ -98,39 +113,19 @@ def name_test(item):
     return f"{item['params']['name']}"
 
 
-def test_lag_status(device, actual, testcase):
+def check_lag_status(device, actual, testcase):
     """
-    Verifies the operational status of the LAG.
-
-    Parameters
-    ----------
-    device: Device instance (unused)
-
-    actual: dict
-        The "show lacp neighbor" dataset
-
-    testcase: dict
-        The testcase dataset
+    Checks the test-case against the "show lacp neighbor" dataset,
+    returning a Verdict rather than raising; see `test_lag_status`.
 
     Returns
     -------
-    True when the test passes
-
-    Raises
-    ------
-    MissingError:
-        When an expected interface is missing
-
-    UnexpectedError:
-        When an interface is present that does not belong
-
-    MismatchError:
-        When an interface is not in the "good" status
+    Verdict - exc.PASSED when the test-case passes
     """
     lag_name = testcase['params']['name']
     actual_lag = actual['portChannels'].get(lag_name)
     if not actual_lag:
-        raise exc.MissingError(missing=lag_name)
+        return exc.missing(missing=lag_name)
 
     actual_if_names = set(actual_lag['interfaces'])
     exp_if_names = set(testcase['expected']['interfaces'])
@@ -140,7 +135,7 @@ def test_lag_status(device, actual, testcase):
 
     missing_if_names = exp_if_names - actual_if_names
     if missing_if_names:
-        raise exc.MismatchError(
+        return exc.mismatch(
             expected=exp_if_names,
             actual=actual_if_names)
 
@@ -148,13 +143,13 @@ def test_lag_status(device, actual, testcase):
 
     unexp_if_names = actual_if_names - exp_if_names
     if unexp_if_names:
-        raise exc.UnexpectedError(unexpected=unexp_if_names)
+        return exc.unexpected(unexpected=unexp_if_names)
 
     # now for each interface, ensure that it is in the "good" state, which is
     # "bundled"
 
     if not actual_lag['interfaces']:
-        raise exc.MismatchError(
+        return exc.mismatch(
             'No interfaces found in LAG',
             expected=exp_if_names,
             actual=""
@@ -163,9 +158,53 @@ def test_lag_status(device, actual, testcase):
     for if_name, if_data in actual_lag['interfaces'].items():
         port_status = if_data["actorPortStatus"]
         if port_status != "bundled":
-            raise exc.MismatchError(
+            return exc.mismatch(
                 expected='bundled',
                 actual=port_status
             )
 
-    return True
+    return exc.PASSED
+
+
+def test_lag_status(device, actual, testcase):
+    """
+    Verifies the operational status of the LAG.
+
+    Parameters
+    ----------
+    device: Device instance (unused)
+
+    actual: dict
+        The "show lacp neighbor" dataset
+
+    testcase: dict
+        The testcase dataset
+
+    Returns
+    -------
+    True when the test passes
+
+    Raises
+    ------
+    MissingError:
+        When an expected interface is missing
+
+    UnexpectedError:
+        When an interface is present that does not belong
+
+    MismatchError:
+        When an interface is not in the "good" status
+    """
+    return exc.raise_on_failure(check_lag_status(device, actual, testcase))
+
+
+def evaluate_all(device, actual, testcases, durations=False):
+    """
+    Check all of the test-cases against the "show lacp neighbor" dataset in one
+    pass; see `evaluate.evaluate_all`.
+
+    Returns
+    -------
+    EvalResults
+    """
+    return evaluate.evaluate_all(check_lag_status, device, actual, testcases, durations)
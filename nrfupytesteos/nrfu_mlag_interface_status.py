@@ -46,8 +46,23 @@ Examples - "show mlag interfaces"
 """
 
 from nrfupytesteos import nrfu_exc as exc
+from nrfupytesteos import evaluate
 
 TEST_CASE_NAME = "test-mlag-interface-status"
+SHOW_COMMAND = "show mlag interfaces"
+
+# the fields of the "show mlag interfaces" output used by this module; the
+# output is pruned to these fields when it is fetched.
+
+PROJECTIONS = {
+    SHOW_COMMAND: {'interfaces': {'*': ['localInterface', 'peerInterface', 'status']}}
+}
+
+# the keyed collections of the output, used by drift.py: interfaces by MLAG id
+
+COLLECTIONS = {
+    SHOW_COMMAND: (('interfaces',), None)
+}
 
 
 def make_testcase(dut, mlag, interface, peer_interface=None, state='up'):
@@ -66,7 +81,7 @@ def make_testcase(dut, mlag, interface, peer_interface=None, state='up'):
 
 
 def snapshot_testdata(device):
-    return device.execute('show mlag interfaces')
+    return device.execute(SHOW_COMMAND, projection=PROJECTIONS[SHOW_COMMAND])
 
 
 def snapshot_testcases(device):
@@ -90,33 +105,14 @@ def name_test(item):
     return f"{item['params']['mlag']}:{item['expected']['state']}"
 
 
-def test_mlag_interface_status(device, actual, testcase):
+def check_mlag_interface_status(device, actual, testcase):
     """
-    Verifies the operational status of the MLAG interface.
-
-    Parameters
-    ----------
-    device: Device instance
-        (unused)
-
-    actual: dict
-        The result of the "show mlag interfaces" command
-
-    testcase: dict
-        The test case dataset
+    Checks the test-case against the "show mlag interfaces" dataset,
+    returning a Verdict rather than raising; see `test_mlag_interface_status`.
 
     Returns
     -------
-    bool:
-        `True` when the test passes, otherwise an exception is raised.
-
-    Raises
-    ------
-    MissingError:
-        When an expected MLAG  is missing
-
-    MismatchError:
-        When an MLAG is not in the expect "up" or "down" condition.
+    Verdict - exc.PASSED when the test-case passes
     """
 
     mlag_ifs = actual['interfaces']
@@ -125,8 +121,8 @@ def test_mlag_interface_status(device, actual, testcase):
     mlag_ifstatus = mlag_ifs.get(mlag)
 
     if not mlag_ifstatus:
-        raise exc.MissingError(
-            f"MLAG {mlag} not found",
+        return exc.missing(
+            "MLAG {} not found", mlag,
             missing=mlag)
 
     actual_state = mlag_ifstatus['status']
@@ -136,22 +132,65 @@ def test_mlag_interface_status(device, actual, testcase):
 
     if expected_state == 'up':
         if actual_state != 'active-full':
-            raise exc.MismatchError(
-                f'MLAG {mlag} not up as expected',
+            return exc.mismatch(
+                'MLAG {} not up as expected', mlag,
                 expected=expected_state,
                 actual=actual_state
             )
 
         # if here, then interface is down as expected
-        return True
+        return exc.PASSED
 
     # check expected up state condition
 
     if actual_state != 'inactive':
-        raise exc.MismatchError(
-            f'MLAG {mlag} not down as expected',
+        return exc.mismatch(
+            'MLAG {} not down as expected', mlag,
             expected=expected_state,
             actual=actual_state
         )
 
-    return True
+    return exc.PASSED
+
+
+def test_mlag_interface_status(device, actual, testcase):
+    """
+    Verifies the operational status of the MLAG interface.
+
+    Parameters
+    ----------
+    device: Device instance
+        (unused)
+
+    actual: dict
+        The result of the "show mlag interfaces" command
+
+    testcase: dict
+        The test case dataset
+
+    Returns
+    -------
+    bool:
+        `True` when the test passes, otherwise an exception is raised.
+
+    Raises
+    ------
+    MissingError:
+        When an expected MLAG  is missing
+
+    MismatchError:
+        When an MLAG is not in the expect "up" or "down" condition.
+    """
+    return exc.raise_on_failure(check_mlag_interface_status(device, actual, testcase))
+
+
+def evaluate_all(device, actual, testcases, durations=False):
+    """
+    Check all of the test-cases against the "show mlag interfaces" dataset in one
+    pass; see `evaluate.evaluate_all`.
+
+    Returns
+    -------
+    EvalResults
+    """
+    return evaluate.evaluate_all(check_mlag_interface_status, device, actual, testcases, durations)
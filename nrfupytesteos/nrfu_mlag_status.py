@@ -63,8 +63,18 @@ Examples - "show mlag"
 """
 
 from nrfupytesteos import nrfu_exc as exc
+from nrfupytesteos import evaluate
 
 TEST_CASE_NAME = "test-mlag-status"
+SHOW_COMMAND = "show mlag"
+
+# the fields of the "show mlag" output used by this module; the output is
+# pruned to these fields when it is fetched.
+
+PROJECTIONS = {
+    SHOW_COMMAND: ['state', 'negStatus', 'domainId', 'localInterface',
+                   'peerLink', 'peerAddress']
+}
 
 
 def make_testcase(dut, domain, interface, peer_link, peer_ip):
@@ -84,7 +94,7 @@ def make_testcase(dut, domain, interface, peer_link, peer_ip):
 
 
 def snapshot_testdata(device):
-    return device.execute("show mlag")
+    return device.execute(SHOW_COMMAND, projection=PROJECTIONS[SHOW_COMMAND])
 
 
 def snapshot_testcases(device):
@@ -107,6 +117,31 @@ def name_test(item):
     return f"{item['params']['peer_link']}"
 
 
+def check_mlag_status(device, actual, testcase):
+    """
+    Checks the test-case against the "show mlag" dataset,
+    returning a Verdict rather than raising; see `test_mlag_status`.
+
+    Returns
+    -------
+    Verdict - exc.PASSED when the test-case passes
+    """
+    has_state = actual['state']
+    exp_state = testcase['expected']['state']
+
+    is_up = (exp_state == 'up' and has_state == 'active')
+    has_neg_st = actual['negStatus']
+    is_neg = has_neg_st == "connected"
+
+    if is_up and is_neg:
+        return exc.PASSED
+
+    return exc.mismatch(
+        expected=('active', 'connected'),
+        actual=(has_state, has_neg_st)
+    )
+
+
 def test_mlag_status(device, actual, testcase):
     """
     Verify MLAG control protocol operational status. This test only verifies that
@@ -129,17 +164,16 @@ def test_mlag_status(device, actual, testcase):
     -------
     True: when testcase passes
     """
-    has_state = actual['state']
-    exp_state = testcase['expected']['state']
+    return exc.raise_on_failure(check_mlag_status(device, actual, testcase))
 
-    is_up = (exp_state == 'up' and has_state == 'active')
-    has_neg_st = actual['negStatus']
-    is_neg = has_neg_st == "connected"
 
-    if is_up and is_neg:
-        return True
+def evaluate_all(device, actual, testcases, durations=False):
+    """
+    Check all of the test-cases against the "show mlag" dataset in one
+    pass; see `evaluate.evaluate_all`.
 
-    raise exc.MismatchError(
-        expected=('active', 'connected'),
-        actual=(has_state, has_neg_st)
-    )
+    Returns
+    -------
+    EvalResults
+    """
+    return evaluate.evaluate_all(check_mlag_status, device, actual, testcases, durations)
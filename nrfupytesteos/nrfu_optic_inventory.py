@@ -59,8 +59,30 @@ Examples
 
 
 from nrfupytesteos import nrfu_exc as exc
+from nrfupytesteos import evaluate
 
 TEST_CASE_NAME = "test-optic-inventory"
+SHOW_COMMAND = "show inventory"
+
+# the fields of the "show inventory" output used by this module; the output is
+# pruned to these fields when it is fetched.
+
+PROJECTIONS = {
+    SHOW_COMMAND: {'xcvrSlots': {'*': ['modelName']}}
+}
+
+# the keyed collections of the output, used by drift.py: transceivers by slot
+
+COLLECTIONS = {
+    SHOW_COMMAND: (('xcvrSlots',), None)
+}
+
+# the output is streamed one slot at a time, so that only the projected fields
+# are held in memory; see Device.execute_records.
+
+STREAM_PATHS = {
+    SHOW_COMMAND: ('xcvrSlots',)
+}
 
 
 def make_testcase(dut, interface, optic):
@@ -77,7 +99,8 @@ def make_testcase(dut, interface, optic):
 
 
 def snapshot_testdata(device):
-    return device.execute('show inventory')
+    return device.execute_records(SHOW_COMMAND, STREAM_PATHS[SHOW_COMMAND],
+                                  PROJECTIONS[SHOW_COMMAND])
 
 
 def snapshot_testcases(device):
@@ -97,6 +120,47 @@ def name_test(item):
     return f"{item['params']['interface']}:{item['expected']['optic'] or 'none'}"
 
 
+def check_optic_inventory(device, actual, testcase):
+    """
+    Checks the test-case against the "show inventory" dataset,
+    returning a Verdict rather than raising; see `test_optic_inventory`.
+
+    Returns
+    -------
+    Verdict - exc.PASSED when the test-case passes
+    """
+    xcvrs = actual['xcvrSlots']
+    if_name = testcase['params']['interface']
+    port_no = device.shorten_if_name(if_name).split('E')[-1]
+
+    xcvr_data = xcvrs.get(port_no)
+    if not xcvr_data:
+        return exc.missing(
+            "Interface not found",
+            missing=if_name)
+
+    expect_model = testcase['expected']['optic']
+    actual_model = xcvr_data['modelName']
+
+    if actual_model == expect_model:
+        return exc.PASSED
+
+    # if here then there is a mismatch.  if expecting an optic then the error
+    # message should indicate that the wrong optic is present and if an optic
+    # is not expected, then the error message should indicate that no optic was
+    # expected.  We don't use an Unexpected exception here because that is
+    # meant to server as 'unexpected additional information'
+
+    wrong = "Wrong" if actual_model else "No"
+    err_msg = ("{} optic found on interface {}" if expect_model
+               else "No optic expected, but found on interface {1}")
+
+    return exc.mismatch(
+        err_msg, wrong, if_name,
+        actual=actual_model,
+        expected=expect_model)
+
+
 def test_optic_inventory(device, actual, testcase):
     """
     This test will verify that the given interface has the optic type as expected.
@@ -125,33 +189,16 @@ def test_optic_inventory(device, actual, testcase):
     MismatchError:
         - When optic found does not match expected value.
     """
-    xcvrs = actual['xcvrSlots']
-    if_name = testcase['params']['interface']
-    port_no = device.shorten_if_name(if_name).split('E')[-1]
-
-    xcvr_data = xcvrs.get(port_no)
-    if not xcvr_data:
-        raise exc.MissingError(
-            "Interface not found",
-            missing=if_name)
+    return exc.raise_on_failure(check_optic_inventory(device, actual, testcase))
 
-    expect_model = testcase['expected']['optic']
-    actual_model = xcvr_data['modelName']
 
-    if actual_model == expect_model:
-        return True
-
-    # if here then there is a mismatch.  if expecting an optic then the error
-    # message should indicate that the wrong optic is present and if an optic
-    # is not expected, then the error message should indicate that no optic was
-    # expected.  We don't use an Unexpected exception here because that is
-    # meant to server as 'unexpected additional information'
-
-    wrong = "Wrong" if actual_model else "No"
-    err_msg = (f"{wrong} optic found on interface {if_name}" if expect_model
-               else f"No optic expected, but found on interface {if_name}")
+def evaluate_all(device, actual, testcases, durations=False):
+    """
+    Check all of the test-cases against the "show inventory" dataset in one
+    pass; see `evaluate.evaluate_all`.
 
-    raise exc.MismatchError(
-        err_msg,
-        actual=actual_model,
-        expected=expect_model)
+    Returns
+    -------
+    EvalResults
+    """
+    return evaluate.evaluate_all(check_optic_inventory, device, actual, testcases, durations)
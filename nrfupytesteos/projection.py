@@ -0,0 +1,153 @@
+#  Copyright 2019 Jeremy Schulman, nwkautomaniac@gmail.com
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""
+This file contains the functions used to prune a show command output down to
+the fields that an NRFU module needs, so that only that minimal structure is
+retained after the output is fetched from the device.
+
+A projection spec has the form:
+
+    True
+        keep the value as-is
+
+    list of keys
+        keep only these keys of a dict, each value as-is
+
+    dict
+        key: the key to keep, value: the projection spec of the value.  The
+        key '*' applies its spec to every key that is not listed.
+
+When the data is a list the spec is applied to each of the list items.
+
+Examples
+--------
+    "show interfaces" keeping only the interface status:
+
+        {"interfaces": {"*": ["interfaceStatus"]}}
+
+    "show lldp neighbors" keeping only the neighbor identity:
+
+        {"lldpNeighbors": ["port", "neighborDevice", "neighborPort"]}
+"""
+
+__all__ = ['project', 'merge_projections', 'covers', 'sub_projection']
+
+
+def project(data, spec):
+    """
+    Returns a copy of the data with only the fields given by the projection
+    spec; see the file docs for the spec format.  A spec of None or True
+    returns the data unchanged.
+    """
+    if spec is None or spec is True:
+        return data
+
+    if isinstance(data, list):
+        return [project(item, spec) for item in data]
+
+    if not isinstance(data, dict):
+        return data
+
+    if isinstance(spec, (list, tuple)):
+        return {key: data[key] for key in spec if key in data}
+
+    wildcard = spec.get('*')
+
+    if wildcard is None:
+        return {key: project(data[key], sub_spec)
+                for key, sub_spec in spec.items() if key in data}
+
+    return {key: project(value, spec.get(key, wildcard))
+            for key, value in data.items()}
+
+
+_NOT_KEPT = object()
+
+
+def _as_dict(spec):
+    return dict.fromkeys(spec, True) if isinstance(spec, (list, tuple)) else spec
+
+
+def _key_spec(spec, key):
+    if key in spec:
+        return spec[key]
+    if key != '*' and '*' in spec:
+        return spec['*']
+    return _NOT_KEPT
+
+
+def merge_projections(spec_a, spec_b):
+    """
+    Returns the projection spec that keeps the fields of both specs, used when
+    more than one NRFU module needs the output of the same command.
+    """
+    if spec_a is None or spec_b is None:
+        return None
+
+    if spec_a is True or spec_b is True:
+        return True
+
+    spec_a, spec_b = _as_dict(spec_a), _as_dict(spec_b)
+    merged = dict()
+
+    for key in {**spec_a, **spec_b}:
+        sub_a, sub_b = _key_spec(spec_a, key), _key_spec(spec_b, key)
+        merged[key] = (sub_b if sub_a is _NOT_KEPT
+                       else sub_a if sub_b is _NOT_KEPT
+                       else merge_projections(sub_a, sub_b))
+
+    return merged
+
+
+def covers(spec, other):
+    """
+    Returns True when the data pruned by `spec` retains all of the fields kept
+    by the `other` spec, so that it can be used in place of the `other` data.
+    """
+    if spec is None or other is None:
+        return spec is None
+
+    if spec is True or other is True:
+        return spec is True
+
+    spec, other = _as_dict(spec), _as_dict(other)
+
+    for key, other_sub in other.items():
+        spec_sub = _key_spec(spec, key)
+        if spec_sub is _NOT_KEPT or not covers(spec_sub, other_sub):
+            return False
+
+    # the keys listed only by `spec` are kept by the `other` wildcard
+
+    other_wildcard = other.get('*')
+    if other_wildcard is None:
+        return True
+
+    return all(covers(spec_sub, other_wildcard)
+               for key, spec_sub in spec.items() if key not in other)
+
+
+def sub_projection(spec, key):
+    """
+    Returns the projection spec of the `key` member of the data projected by
+    `spec`; None when the member is kept as-is.
+    """
+    if spec is None or spec is True:
+        return None
+
+    if isinstance(spec, (list, tuple)):
+        return None
+
+    return spec.get(key, spec.get('*'))
@@ -0,0 +1,312 @@
+#  Copyright 2019 Jeremy Schulman, nwkautomaniac@gmail.com
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""
+This file contains the NRFU report writer, which scales to a large number of
+test-cases where a single self-contained pytest-html report does not.  The
+result of each test-case is written as soon as it is known to the report
+directory files:
+
+    results.jsonl
+        one JSON object per result, see engine.Result
+
+    junit.xml
+        the JUnit XML of the results, for CI systems
+
+When the run is done, a paginated HTML report is built from "results.jsonl":
+"index.html" has the summary of the verdicts by test-case type and device, and
+links to the pages of the results of each test-case type and device, failures
+first.  The results are loaded into a temporary SQLite file to group them, so
+that the memory used does not depend on the number of results.
+
+The report is written by the --nrfu-report option of the pytest plugin and the
+--report option of the `nrfu` command; the `nrfu-report` command builds the
+HTML from a JSONL file, for example the output of `nrfu --format jsonl`:
+
+    nrfu-report results.jsonl fleet-report
+"""
+
+from pathlib import Path
+from xml.sax.saxutils import escape, quoteattr
+import argparse
+import html
+import json
+import re
+import shutil
+import sqlite3
+import sys
+import tempfile
+
+from nrfupytesteos.results_store import dumps
+from nrfupytesteos import tracing
+
+__all__ = ['ReportWriter', 'build_html', 'main']
+
+_VERDICTS = ('pass', 'fail', 'error')
+
+_JUNIT_ELEMENTS = {'fail': 'failure', 'error': 'error'}
+
+
+class ReportWriter(object):
+    """
+    Streams the results to the "results.jsonl" and "junit.xml" files of the
+    report directory.  Call `close` at the end of the run to complete the
+    JUnit XML file, and then `build_html` for the HTML report.
+
+    Parameters
+    ----------
+    directory : str | Path - the report directory, created when it does not exist
+    """
+    JSONL_FILE = 'results.jsonl'
+    JUNIT_FILE = 'junit.xml'
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+        self.counts = dict.fromkeys(_VERDICTS, 0)
+        self.duration = 0.0
+
+        self._jsonl = (self.directory / self.JSONL_FILE).open('w')
+
+        # the JUnit testsuite element has the result counts, so the testcase
+        # elements are streamed to a temporary file, and copied after it.
+
+        self._junit_body = (self.directory / (self.JUNIT_FILE + '.tmp')).open('w+')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def write(self, result):
+        """ Write an engine Result, see engine.py """
+        with tracing.span('report.write', cat='report'):
+            self._write(result)
+
+    def _write(self, result):
+        self._jsonl.write(dumps(result._asdict()) + '\n')
+
+        self.counts[result.verdict] += 1
+        self.duration += result.duration or 0.0
+
+        testcase = (f'<testcase classname={quoteattr(f"{result.test_case}.{result.hostname}")} '
+                    f'name={quoteattr(result.name)} time="{result.duration or 0:.6f}"')
+
+        element = _JUNIT_ELEMENTS.get(result.verdict)
+        if element is None:
+            self._junit_body.write(testcase + '/>\n')
+            return
+
+        message = result.message or ''
+        first_line = message.splitlines()[0] if message else result.verdict
+        self._junit_body.write(f'{testcase}><{element} message={quoteattr(first_line)}>'
+                               f'{escape(message)}</{element}></testcase>\n')
+
+    def close(self):
+        if self._jsonl.closed:
+            return
+
+        self._jsonl.close()
+
+        with tracing.span('report.junit', cat='report', results=sum(self.counts.values())):
+            self._write_junit()
+
+    def _write_junit(self):
+        junit_path = self.directory / self.JUNIT_FILE
+        tests = sum(self.counts.values())
+
+        with junit_path.open('w') as ofile:
+            ofile.write('<?xml version="1.0" encoding="utf-8"?>\n<testsuites>\n')
+            ofile.write(f'<testsuite name="nrfu" tests="{tests}" '
+                        f'failures="{self.counts["fail"]}" errors="{self.counts["error"]}" '
+                        f'skipped="0" time="{self.duration:.3f}">\n')
+
+            self._junit_body.seek(0)
+            shutil.copyfileobj(self._junit_body, ofile)
+            ofile.write('</testsuite>\n</testsuites>\n')
+
+        self._junit_body.close()
+        Path(self._junit_body.name).unlink()
+
+
+# -----------------------------------------------------------------------------
+#
+#                                 HTML REPORT
+#
+# -----------------------------------------------------------------------------
+
+_STYLE = """
+body { font-family: sans-serif; font-size: 13px; }
+table { border-collapse: collapse; }
+th, td { border: 1px solid #ccc; padding: 2px 8px; text-align: left; vertical-align: top; }
+.pass { color: #2a7d2a; } .fail { color: #c62828; } .error { color: #ef6c00; }
+pre { margin: 0; white-space: pre-wrap; }
+"""
+
+
+def _page(title, body):
+    return (f'<!DOCTYPE html>\n<html><head><meta charset="utf-8">'
+            f'<title>{html.escape(title)}</title><style>{_STYLE}</style></head>'
+            f'<body><h1>{html.escape(title)}</h1>\n{body}\n</body></html>\n')
+
+
+def _slug(value):
+    return re.sub(r'[^A-Za-z0-9._-]', '_', value)
+
+
+def _counts_cells(counts):
+    return ''.join(f'<td class="{verdict}">{count}</td>' for verdict, count in zip(_VERDICTS, counts))
+
+
+def _load(db, jsonl_path):
+    db.execute('CREATE TABLE results (hostname TEXT, test_case TEXT, name TEXT, '
+               'verdict TEXT, message TEXT, failed INTEGER)')
+
+    def records():
+        with open(jsonl_path) as ifile:
+            for line in ifile:
+                if not line.strip():
+                    continue
+                result = json.loads(line)
+                yield (result['hostname'], result['test_case'], result['name'],
+                       result['verdict'], result.get('message'),
+                       int(result['verdict'] != 'pass'))
+
+    with db:
+        db.executemany('INSERT INTO results VALUES (?, ?, ?, ?, ?, ?)', records())
+        db.execute('CREATE INDEX results_group ON results (test_case, hostname, failed)')
+
+
+def _write_group_pages(db, out_dir, test_case, hostname, total, page_size):
+    """ Write the pages of the results of one test-case type and device """
+    n_pages = (total + page_size - 1) // page_size
+    filename = f"{_slug(test_case)}-{_slug(hostname)}-{{}}.html"
+
+    cursor = db.execute(
+        'SELECT name, verdict, message FROM results WHERE test_case = ? AND hostname = ? '
+        'ORDER BY failed DESC, rowid', (test_case, hostname))
+
+    for page in range(1, n_pages + 1):
+        rows = cursor.fetchmany(page_size)
+
+        nav = ['<a href="index.html">summary</a>']
+        if page > 1:
+            nav.append(f'<a href="{filename.format(page - 1)}">previous</a>')
+        if page < n_pages:
+            nav.append(f'<a href="{filename.format(page + 1)}">next</a>')
+
+        body = [f'<p>page {page} of {n_pages} | {" | ".join(nav)}</p>',
+                '<table><tr><th>test</th><th>verdict</th><th>message</th></tr>']
+
+        body.extend(
+            f'<tr><td>{html.escape(name)}</td><td class="{verdict}">{verdict}</td>'
+            f'<td><pre>{html.escape(message or "")}</pre></td></tr>'
+            for name, verdict, message in rows)
+
+        body.append('</table>')
+
+        (out_dir / filename.format(page)).write_text(
+            _page(f"{test_case} {hostname}", '\n'.join(body)))
+
+    return filename.format(1)
+
+
+def build_html(jsonl_path, out_dir, page_size=500):
+    """
+    Build the paginated HTML report of the results in the JSONL file.
+
+    Parameters
+    ----------
+    jsonl_path : str | Path - the results, one JSON object per line
+    out_dir : str | Path - the report directory, index.html is the summary page
+    page_size : int - the number of results of each page
+
+    Returns
+    -------
+    Path - the summary page
+    """
+    with tracing.span('report.html', cat='report', directory=str(out_dir)):
+        return _build_html(jsonl_path, Path(out_dir), page_size)
+
+
+def _build_html(jsonl_path, out_dir, page_size):
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = sqlite3.connect(str(Path(tmp_dir) / 'report.db'))
+        try:
+            _load(db, jsonl_path)
+
+            count_columns = ', '.join(f"SUM(verdict = '{verdict}')" for verdict in _VERDICTS)
+            groups = db.execute(
+                f'SELECT test_case, hostname, {count_columns} FROM results '
+                'GROUP BY test_case, hostname '
+                'ORDER BY test_case, SUM(failed) DESC, hostname').fetchall()
+
+            totals = [sum(group[2 + index] for group in groups) for index in range(3)]
+            body = ['<table><tr><th></th><th>pass</th><th>fail</th><th>error</th></tr>',
+                    f'<tr><th>total</th>{_counts_cells(totals)}</tr></table>']
+
+            # the summary has the counts of each test-case type, and then of
+            # each device of the type, with the devices that failed first.
+
+            by_type = dict()
+            for test_case, hostname, *counts in groups:
+                by_type.setdefault(test_case, []).append((hostname, counts))
+
+            for test_case, devices in by_type.items():
+                type_counts = [sum(counts[index] for _, counts in devices) for index in range(3)]
+
+                body.append(f'<h2>{html.escape(test_case)}</h2>')
+                body.append('<table><tr><th>device</th><th>pass</th><th>fail</th>'
+                            f'<th>error</th></tr><tr><th>all</th>{_counts_cells(type_counts)}</tr>')
+
+                for hostname, counts in devices:
+                    first_page = _write_group_pages(db, out_dir, test_case, hostname,
+                                                    sum(counts), page_size)
+                    body.append(f'<tr><td><a href="{first_page}">{html.escape(hostname)}</a></td>'
+                                f'{_counts_cells(counts)}</tr>')
+
+                body.append('</table>')
+
+        finally:
+            db.close()
+
+    index = out_dir / 'index.html'
+    index.write_text(_page('NRFU Report', '\n'.join(body)))
+    return index
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='nrfu-report', description='Build the NRFU HTML report from JSONL results')
+
+    parser.add_argument('results', help='the JSONL results file')
+    parser.add_argument('directory', help='the report directory')
+    parser.add_argument('--page-size', type=int, default=500,
+                        help='the number of results of each page')
+
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    print(build_html(args.results, args.directory, page_size=args.page_size))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,323 @@
+#  Copyright 2019 Jeremy Schulman, nwkautomaniac@gmail.com
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""
+This file contains the SQLite results store, to which each NRFU run appends
+the result of every test-case: the device ("dut"), the test-case type, name
+and parameters, the verdict, the failure data (for example the 'expected' and
+'actual' values of a mismatch) and the check duration.  The results are
+inserted in batches while the run is in progress, and are indexed so that the
+history of a test-case, and the test-cases whose verdict flapped between runs,
+are queried without scanning the store: the verdict changes are recorded as
+each batch is inserted.
+
+The store is written by the --nrfu-results-db option of the pytest plugin and
+the --results-db option of the `nrfu` command, and is queried with the
+`nrfu-results` command:
+
+    nrfu-results pod1-results.db flaps --runs 5
+
+    nrfu-results pod1-results.db history --dut dev1 --test-case test-interface-status
+
+Examples
+--------
+    with ResultsStore('pod1-results.db') as store:
+        for dut, test_case, name, verdicts in store.flaps(runs=2):
+            print(dut, test_case, name, ' -> '.join(verdicts))
+"""
+
+from itertools import groupby
+import argparse
+import json
+import sqlite3
+import sys
+import time
+
+from nrfupytesteos import tracing
+
+__all__ = ['ResultsStore', 'dumps', 'main']
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    started REAL NOT NULL,
+    source TEXT
+);
+CREATE TABLE IF NOT EXISTS results (
+    run_id INTEGER NOT NULL REFERENCES runs (id),
+    dut TEXT NOT NULL,
+    test_case TEXT NOT NULL,
+    name TEXT NOT NULL,
+    params TEXT,
+    verdict TEXT NOT NULL,
+    message TEXT,
+    data TEXT,
+    duration REAL
+);
+CREATE INDEX IF NOT EXISTS results_run ON results (run_id);
+CREATE INDEX IF NOT EXISTS results_case ON results (dut, test_case, name, run_id);
+CREATE TABLE IF NOT EXISTS latest (
+    dut TEXT NOT NULL,
+    test_case TEXT NOT NULL,
+    name TEXT NOT NULL,
+    verdict TEXT NOT NULL,
+    run_id INTEGER NOT NULL,
+    PRIMARY KEY (dut, test_case, name)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS changes (
+    run_id INTEGER NOT NULL,
+    dut TEXT NOT NULL,
+    test_case TEXT NOT NULL,
+    name TEXT NOT NULL,
+    previous TEXT NOT NULL,
+    verdict TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS changes_run ON changes (run_id);
+"""
+
+# the verdict changes of the results inserted after a rowid, each compared to
+# the previous result of the test-case in the batch, or else to its latest
+# stored verdict.
+
+_INSERT_CHANGES = """
+INSERT INTO changes (run_id, dut, test_case, name, previous, verdict)
+SELECT run_id, dut, test_case, name, previous, verdict FROM (
+    SELECT r.run_id, r.dut, r.test_case, r.name, r.verdict,
+           COALESCE(LAG(r.verdict) OVER batch, l.verdict) AS previous
+    FROM results AS r NOT INDEXED LEFT JOIN latest AS l USING (dut, test_case, name)
+    WHERE r.rowid > ?
+    WINDOW batch AS (PARTITION BY r.dut, r.test_case, r.name ORDER BY r.rowid))
+WHERE previous != verdict
+"""
+
+_UPDATE_LATEST = """
+INSERT OR REPLACE INTO latest (dut, test_case, name, verdict, run_id)
+SELECT dut, test_case, name, verdict, run_id FROM results WHERE rowid > ? ORDER BY rowid
+"""
+
+_RESULT_FIELDS = ('dut', 'test_case', 'name', 'params', 'verdict', 'message', 'data', 'duration')
+
+
+def _json_default(value):
+    if isinstance(value, (set, frozenset)):
+        return sorted(value, key=str)
+    return str(value)
+
+
+def dumps(data):
+    """ Returns the JSON of the data, with sets as sorted lists """
+    return json.dumps(data, separators=(',', ':'), default=_json_default)
+
+
+class ResultsStore(object):
+    """
+    The test-case results of NRFU runs in a SQLite file.
+
+    Parameters
+    ----------
+    path : str | Path - the SQLite file, created when it does not exist
+    batch_size : int - the number of results buffered before they are inserted
+    """
+    def __init__(self, path, batch_size=1000):
+        self.path = path
+        self.batch_size = batch_size
+        self._pending = list()
+
+        self.conn = sqlite3.connect(str(path))
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript(_SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.flush()
+        self.conn.close()
+
+    def start_run(self, source=None):
+        """ Returns the id of a new run, for example with source 'pytest' or 'nrfu' """
+        with self.conn:
+            cursor = self.conn.execute('INSERT INTO runs (started, source) VALUES (?, ?)',
+                                       (time.time(), source))
+        return cursor.lastrowid
+
+    def add(self, run_id, dut, test_case, name, verdict, params=None, message=None,
+            data=None, duration=None):
+        """
+        Add the result of one test-case of the run.  The result is buffered and
+        inserted with the next batch; see `flush`.
+        """
+        self._pending.append((
+            run_id, dut, test_case, name,
+            None if params is None else dumps(params),
+            verdict, message,
+            None if data is None else dumps(data),
+            duration))
+
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def add_result(self, run_id, result):
+        """ Add an engine Result, see engine.py """
+        self.add(run_id, result.hostname, result.test_case, result.name, result.verdict,
+                 params=result.params, message=result.message, data=result.data,
+                 duration=result.duration)
+
+    def flush(self):
+        """
+        Insert the buffered results in one transaction, recording the
+        test-cases whose verdict changed from their previous result.
+        """
+        if not self._pending:
+            return
+
+        with tracing.span('results.flush', cat='report', results=len(self._pending)), self.conn:
+            last_rowid = self.conn.execute('SELECT COALESCE(MAX(rowid), 0) FROM results').fetchone()[0]
+
+            self.conn.executemany(
+                'INSERT INTO results (run_id, dut, test_case, name, params, verdict, '
+                'message, data, duration) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                self._pending)
+
+            self.conn.execute(_INSERT_CHANGES, (last_rowid,))
+            self.conn.execute(_UPDATE_LATEST, (last_rowid,))
+
+        self._pending = list()
+
+    def runs(self, last=None):
+        """ Returns the (id, started, source, result count) of the runs, newest first """
+        self.flush()
+
+        return self.conn.execute(
+            'SELECT id, started, source, '
+            '(SELECT COUNT(*) FROM results WHERE run_id = runs.id) '
+            'FROM runs ORDER BY id DESC LIMIT ?', (last or -1,)).fetchall()
+
+    def history(self, dut=None, test_case=None, name=None, last=None):
+        """
+        Yields a dict of each stored result, optionally only those of the
+        device, test-case type and/or name, and of the `last` runs; ordered by
+        test-case and run.
+        """
+        self.flush()
+
+        clauses, args = list(), list()
+
+        for column, value in (('dut', dut), ('test_case', test_case), ('name', name)):
+            if value is not None:
+                clauses.append(f'{column} = ?')
+                args.append(value)
+
+        if last:
+            clauses.append('run_id IN (SELECT id FROM runs ORDER BY id DESC LIMIT ?)')
+            args.append(last)
+
+        where = ' WHERE ' + ' AND '.join(clauses) if clauses else ''
+        cursor = self.conn.execute(
+            f'SELECT run_id, {", ".join(_RESULT_FIELDS)} FROM results{where} '
+            f'ORDER BY dut, test_case, name, run_id', args)
+
+        for row in cursor:
+            result = dict(zip(('run_id',) + _RESULT_FIELDS, row))
+            for field in ('params', 'data'):
+                if result[field] is not None:
+                    result[field] = json.loads(result[field])
+            yield result
+
+    def flaps(self, runs=2, test_case=None):
+        """
+        Returns the test-cases whose verdict changed within the last `runs`
+        runs, for example the interfaces that went down and up again, across
+        all of the devices.  The verdict changes are recorded as the results
+        are inserted, so that only those changes are read.
+
+        Returns
+        -------
+        list
+            (dut, test_case, name, verdicts) where verdicts is the list of the
+            verdicts in run order.
+        """
+        self.flush()
+
+        type_clause, args = ('AND test_case = ?', [test_case]) if test_case else ('', [])
+        first_run = self.conn.execute(
+            'SELECT MIN(id) FROM (SELECT id FROM runs ORDER BY id DESC LIMIT ?)',
+            (runs,)).fetchone()[0]
+
+        if first_run is None:
+            return []
+
+        # a change in the first run of the window is from a verdict before it
+
+        cursor = self.conn.execute(f"""
+            SELECT dut, test_case, name, verdict FROM results
+            WHERE (dut, test_case, name) IN (
+                SELECT dut, test_case, name FROM changes
+                WHERE run_id > ? {type_clause})
+            AND run_id >= ?
+            ORDER BY dut, test_case, name, run_id, rowid
+            """, [first_run, *args, first_run])
+
+        return [(*key, [row[3] for row in rows])
+                for key, rows in groupby(cursor, key=lambda row: row[:3])]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='nrfu-results', description='Query the NRFU results store')
+
+    parser.add_argument('store', help='the results store file')
+    queries = parser.add_subparsers(dest='query', required=True)
+
+    flaps = queries.add_parser('flaps', help='test-cases whose verdict changed between runs')
+    flaps.add_argument('--runs', type=int, default=2, help='the number of most recent runs')
+    flaps.add_argument('--test-case', help='only test-cases of this type')
+
+    history = queries.add_parser('history', help='the results of each run')
+    history.add_argument('--dut', help='only the results of this device')
+    history.add_argument('--test-case', help='only test-cases of this type')
+    history.add_argument('--name', help='only test-cases of this name')
+    history.add_argument('--runs', type=int, help='only the most recent runs')
+
+    queries.add_parser('runs', help='the stored runs')
+
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    with ResultsStore(args.store) as store:
+        if args.query == 'flaps':
+            for dut, test_case, name, verdicts in store.flaps(args.runs, args.test_case):
+                print(f"{dut} {test_case} {name}: {' -> '.join(verdicts)}")
+
+        elif args.query == 'history':
+            for result in store.history(args.dut, args.test_case, args.name, args.runs):
+                print(dumps(result))
+
+        else:
+            for run_id, started, source, count in store.runs():
+                started = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(started))
+                print(f"{run_id} {started} {source or ''} {count} results")
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,286 @@
+#  Copyright 2019 Jeremy Schulman, nwkautomaniac@gmail.com
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""
+This file contains the functions used by `nrfu-snapshot.py` to write the
+test-cases of a device incrementally.  Each test-case set, that is the
+test-cases of one device and test-case type, has a stable content hash, and a
+set is only rewritten when its hash has changed, so that a re-baseline of a
+large fleet only touches the devices that drifted.
+
+The device directory contains a manifest file that has the form:
+
+    {
+        "test-cases": {
+            "test-cabling": {
+                "file": "test-cabling.json",
+                "hash": "<sha256 hex digest>",
+                "count": 4,
+                "stamp": [<file mtime_ns>, <file size>]
+            }
+        },
+        "changes": {
+            "test-cabling": {"added": 1, "removed": 0, "changed": 2}
+        }
+    }
+
+where "changes" is the summary of the test-cases added, removed and changed by
+the run that last wrote the directory.
+"""
+
+from pathlib import Path
+import hashlib
+import json
+import os
+import shutil
+
+__all__ = [
+    'MANIFEST_FILE',
+    'testcases_hash',
+    'diff_testcases',
+    'write_testcases_dir',
+    'update_store'
+]
+
+MANIFEST_FILE = 'manifest.json'
+
+
+def _canonical(data):
+    return json.dumps(data, sort_keys=True, separators=(',', ':'))
+
+
+def testcases_hash(testcases):
+    """ Returns the content hash of the test-cases, independent of the dict key order """
+    return hashlib.sha256(_canonical(testcases).encode()).hexdigest()
+
+
+def _testcase_key(testcase):
+    return _canonical([testcase.get('test-case'), testcase.get('params')])
+
+
+def diff_testcases(old_testcases, new_testcases):
+    """
+    Compare two sets of test-cases, where a test-case is identified by its
+    type and parameters.
+
+    Returns
+    -------
+    dict
+        'added', 'removed' and 'changed' lists of test-cases; a changed
+        test-case has the same parameters but other expected values.
+    """
+    old = {_testcase_key(testcase): testcase for testcase in old_testcases}
+    new = {_testcase_key(testcase): testcase for testcase in new_testcases}
+
+    return {
+        'added': [testcase for key, testcase in new.items() if key not in old],
+        'removed': [testcase for key, testcase in old.items() if key not in new],
+        'changed': [testcase for key, testcase in new.items()
+                    if key in old and _canonical(testcase) != _canonical(old[key])]
+    }
+
+
+def _summary(diff):
+    return {change: len(testcases) for change, testcases in diff.items()}
+
+
+def _write_json(filepath, data, **dump_args):
+    tmp_path = filepath.with_name(filepath.name + '.tmp')
+    with tmp_path.open('w') as ofile:
+        json.dump(data, ofile, **dump_args)
+    tmp_path.replace(filepath)
+
+
+def _load_json(filepath, default):
+    try:
+        with filepath.open() as ifile:
+            return json.load(ifile)
+    except (OSError, ValueError):
+        return default
+
+
+def _file_stamp(filepath):
+    try:
+        stat = filepath.stat()
+        return [stat.st_mtime_ns, stat.st_size]
+    except OSError:
+        return None
+
+
+def _entry(tc_file, tc_hash, testcases):
+    return dict(file=tc_file.name, hash=tc_hash, count=len(testcases),
+                stamp=_file_stamp(tc_file))
+
+
+def _link_or_copy(src, dst):
+    # the unchanged files are hard links in the staging directory, so that
+    # they are not rewritten and keep the file stamps of the manifest.
+
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+def _swap_dirs(snapshot_dir, kind):
+    prefix = f".{snapshot_dir.name}.{kind}"
+    return [snapshot_dir.with_name(name) for name in os.listdir(snapshot_dir.parent)
+            if name.startswith(prefix) and name[len(prefix):].isdigit()]
+
+
+def _recover_dir(snapshot_dir):
+    """
+    Undo what a run that stopped during `_swap_dir` left behind: the backup of
+    the device directory is renamed back when the device directory is missing,
+    and the staging and backup directories are removed, so that the next swap
+    starts from a complete directory.
+    """
+    if not snapshot_dir.parent.is_dir():
+        return
+
+    backups = _swap_dirs(snapshot_dir, 'old')
+
+    if backups and not snapshot_dir.exists():
+        backup = max(backups, key=lambda path: path.stat().st_mtime_ns)
+        backup.rename(snapshot_dir)
+        backups.remove(backup)
+
+    for stale_dir in backups + _swap_dirs(snapshot_dir, 'tmp'):
+        shutil.rmtree(stale_dir, ignore_errors=True)
+
+
+def _swap_dir(snapshot_dir, writes, manifest):
+    """
+    Write the changed files and the manifest into a staging copy of the device
+    directory, which then replaces the device directory, so that a failed run
+    never leaves a partial set of test-case files.
+
+    A directory cannot be atomically replaced by another, so the device
+    directory is first renamed to a backup; a run that stops between the two
+    renames leaves no device directory, and the backup is renamed back by the
+    next run, see `_recover_dir`.
+    """
+    tmp_dir = snapshot_dir.with_name(f".{snapshot_dir.name}.tmp{os.getpid()}")
+    old_dir = snapshot_dir.with_name(f".{snapshot_dir.name}.old{os.getpid()}")
+
+    shutil.copytree(snapshot_dir, tmp_dir, copy_function=_link_or_copy)
+
+    # the files are replaced, never written in place, as they are links to the
+    # files of the device directory.
+
+    for name, (filename, testcases) in writes.items():
+        tc_file = tmp_dir / filename
+
+        if testcases:
+            _write_json(tc_file, testcases, indent=3)
+            manifest['test-cases'][name] = _entry(tc_file, testcases_hash(testcases), testcases)
+
+        elif tc_file.exists():
+            tc_file.unlink()
+
+    _write_json(tmp_dir / MANIFEST_FILE, manifest, indent=3, sort_keys=True)
+
+    snapshot_dir.rename(old_dir)
+    tmp_dir.rename(snapshot_dir)
+    shutil.rmtree(old_dir, ignore_errors=True)
+
+
+def write_testcases_dir(snapshot_dir, nrfu_testcases):
+    """
+    Write the test-case files of a device, rewriting only the files whose
+    test-cases have changed, and then the manifest.  When any file changes,
+    the changed files and the manifest are written to a staging copy of the
+    directory that replaces it, so that the files and manifest are always
+    updated together.
+
+    Parameters
+    ----------
+    snapshot_dir : str | Path - the device test-case directory
+    nrfu_testcases : list - (nrfu module, test-cases) for each module
+
+    Returns
+    -------
+    dict
+        key: test-case type, value: the added/removed/changed counts of each
+        test-case set that was written; empty when nothing changed.
+    """
+    snapshot_dir = Path(snapshot_dir)
+    _recover_dir(snapshot_dir)
+    snapshot_dir.mkdir(parents=True, exist_ok=True)
+
+    manifest_file = snapshot_dir / MANIFEST_FILE
+    old_entries = _load_json(manifest_file, {}).get('test-cases', {})
+    entries, changes, writes = dict(), dict(), dict()
+
+    for nrfu, testcases in nrfu_testcases:
+        name = nrfu.TEST_CASE_NAME
+        tc_file = snapshot_dir / f'{name}.json'
+        new_hash = testcases_hash(testcases) if testcases else None
+
+        # the manifest hash is used only while the file is the one the
+        # manifest describes, so that an edited file is not taken as unchanged.
+
+        old_entry = old_entries.get(name)
+        old_hash = (old_entry['hash'] if old_entry and _file_stamp(tc_file) == old_entry.get('stamp')
+                    else None)
+
+        if new_hash == old_hash:
+            if old_entry:
+                entries[name] = old_entry
+            continue
+
+        # the previous file is only read to summarize the changes
+
+        old_testcases = _load_json(tc_file, [])
+
+        if testcases and testcases_hash(old_testcases) == new_hash:
+            entries[name] = _entry(tc_file, new_hash, testcases)
+            continue
+
+        changes[name] = _summary(diff_testcases(old_testcases, testcases))
+        writes[name] = (tc_file.name, testcases)
+
+    manifest = {'test-cases': entries, 'changes': changes}
+
+    if writes:
+        _swap_dir(snapshot_dir, writes, manifest)
+
+    elif entries != old_entries or not manifest_file.exists():
+        _write_json(manifest_file, manifest, indent=3, sort_keys=True)
+
+    return changes
+
+
+def update_store(store, dut, nrfu_testcases):
+    """
+    Store the test-cases of a device in the test-case store, rewriting only
+    the test-case sets that have changed.
+
+    Returns
+    -------
+    dict - see `write_testcases_dir`
+    """
+    changes = dict()
+
+    for nrfu, testcases in nrfu_testcases:
+        name = nrfu.TEST_CASE_NAME
+        old_testcases = list(store.iter(dut=dut, test_case=name))
+
+        if testcases_hash(old_testcases) == testcases_hash(testcases):
+            continue
+
+        changes[name] = _summary(diff_testcases(old_testcases, testcases))
+        store.put(dut, name, testcases)
+
+    return changes
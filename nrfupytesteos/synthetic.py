@@ -0,0 +1,221 @@
+#  Copyright 2019 Jeremy Schulman, nwkautomaniac@gmail.com
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""
+This file contains the synthetic device generator, which creates the show
+output of a device of a given size, in the form of the EOS 'json' output, and
+the matching test-cases.  It is used by the benchmarks (see the benchmarks
+directory) and to exercise the NRFU modules at scale without a live device.
+
+The device has `ports` Ethernet interfaces, 4 lanes per transceiver slot, of
+which the first ones are bundled into `lags` port-channels, each also an MLAG
+interface; `lldp_neighbors` LLDP neighbors spread over the ports; and
+`bgp_peers` BGP peers.  The outputs include the fields the NRFU modules do not
+use, so that the projections are exercised as with a real device.
+
+Examples
+--------
+    from nrfupytesteos import synthetic
+
+    outputs = synthetic.make_outputs(**synthetic.SIZES['large'])
+    dev = synthetic.make_device(outputs)
+    testcases = synthetic.make_testcases(dev)
+"""
+
+import random
+
+from nrfupytesteos.eos_device import Device
+from nrfupytesteos.eapi_capture import CaptureStore, ReplayTransport
+from nrfupytesteos import (
+    nrfu_optic_inventory,
+    nrfu_interface_status,
+    nrfu_cabling,
+    nrfu_lag_status,
+    nrfu_mlag_status,
+    nrfu_mlag_interface_status,
+    nrfu_bgp_neighbor_status
+)
+
+__all__ = ['SIZES', 'make_outputs', 'make_device', 'make_testcases']
+
+# the device sizes used by the benchmarks
+
+SIZES = {
+    'small': dict(ports=48, lags=8, lldp_neighbors=48, bgp_peers=16),
+    'medium': dict(ports=192, lags=64, lldp_neighbors=512, bgp_peers=256),
+    'large': dict(ports=576, lags=300, lldp_neighbors=4096, bgp_peers=4096)
+}
+
+_OPTICS = ('QSFP28-SR4-100G', 'QSFP28-LR4-100G', 'QSFP-40G-SR4', '')
+
+
+def _if_name(port):
+    return f"Ethernet{port // 4 + 1}/{port % 4 + 1}"
+
+
+def _interface(if_name, status):
+    return {
+        'name': if_name,
+        'interfaceStatus': status,
+        'lineProtocolStatus': 'up' if status == 'connected' else 'notPresent',
+        'hardware': 'ethernet',
+        'mtu': 9214,
+        'bandwidth': 100000000000,
+        'description': f'"synthetic {if_name}"',
+        'interfaceCounters': {
+            'inOctets': 0, 'outOctets': 0, 'inUcastPkts': 0, 'outUcastPkts': 0,
+            'inDiscards': 0, 'outDiscards': 0, 'totalInErrors': 0,
+            'totalOutErrors': 0, 'linkStatusChanges': 2
+        },
+        'interfaceStatistics': {
+            'inBitsRate': 0.0, 'outBitsRate': 0.0, 'updateInterval': 300.0
+        }
+    }
+
+
+def make_outputs(ports=48, lags=8, lldp_neighbors=48, bgp_peers=16, hostname='synth1', seed=0):
+    """
+    Returns the 'json' show output of a synthetic device.
+
+    Parameters
+    ----------
+    ports : int - the number of Ethernet interfaces
+    lags : int - the number of port-channels, each of 1 or 2 Ethernet members
+    lldp_neighbors : int - the number of LLDP neighbors
+    bgp_peers : int - the number of BGP peers
+    hostname : str - the device name, used in the neighbor names
+    seed : int - the random seed, the same seed returns the same outputs
+
+    Returns
+    -------
+    dict - key: command, value: the command output
+    """
+    rnd = random.Random(seed)
+    if_names = [_if_name(port) for port in range(ports)]
+
+    interfaces = {
+        if_name: _interface(if_name, rnd.choice(('connected', 'connected', 'connected',
+                                                 'notconnect', 'disabled')))
+        for if_name in if_names
+    }
+
+    port_channels = dict()
+    mlag_interfaces = dict()
+
+    # the port-channels have 2 members, or 1 when there are not enough ports
+
+    lags = min(lags, ports)
+    n_members = [2] * min(lags, ports - lags) + [1] * max(0, 2 * lags - ports)
+    first_member = 0
+
+    for lag, n_member in enumerate(n_members):
+        pc_name = f"Port-Channel{lag + 1}"
+        members = if_names[first_member:first_member + n_member]
+        first_member += n_member
+        interfaces[pc_name] = _interface(pc_name, 'connected')
+
+        port_channels[pc_name] = {'interfaces': {
+            member: {'actorPortStatus': 'bundled', 'partnerPortPriority': 32768,
+                     'partnerSystemId': '8000,76-83-ef-ed-66-5d', 'partnerPortId': port}
+            for port, member in enumerate(members)
+        }}
+
+        mlag_interfaces[str(lag + 1)] = {
+            'localInterface': pc_name, 'peerInterface': pc_name,
+            'localInterfaceStatus': 'up', 'peerInterfaceStatus': 'up',
+            'status': 'active-full', 'localInterfaceDescription': f'server-{lag + 1}'
+        }
+
+    xcvr_slots = {
+        str(slot + 1): {'modelName': rnd.choice(_OPTICS), 'serialNum': f'XS{slot:06d}',
+                        'mfgName': 'Arista Networks', 'hardwareRev': '01'}
+        for slot in range((ports + 3) // 4)
+    }
+
+    lldp = [
+        {'port': if_names[index % ports], 'ttl': 120,
+         'neighborDevice': f"{hostname}-nbr{index // ports}-{index % ports // 32}",
+         'neighborPort': f"Ethernet{index % 32 + 1}/1"}
+        for index in range(lldp_neighbors)
+    ]
+
+    peers = {
+        f"10.{peer >> 16 & 255}.{peer >> 8 & 255}.{peer & 255}": {
+            'asn': str(64512 + peer % 1000), 'peerState': 'Established',
+            'prefixReceived': rnd.randrange(10000), 'prefixAccepted': 0,
+            'msgSent': 0, 'msgReceived': 0, 'upDownTime': 1569593053.967133,
+            'inMsgQueue': 0, 'outMsgQueue': 0, 'version': 4, 'underMaintenance': False
+        }
+        for peer in range(bgp_peers)
+    }
+
+    interface_statuses = {
+        if_name: {'linkStatus': interface['interfaceStatus'], 'description': '',
+                  'bandwidth': interface['bandwidth'], 'duplex': 'duplexFull',
+                  'interfaceType': '100GBASE-SR4', 'autoNegotiateActive': False,
+                  'vlanInformation': {'interfaceMode': 'routed', 'interfaceForwardingModel': 'routed'}}
+        for if_name, interface in interfaces.items()
+    }
+
+    return {
+        'show interfaces': {'interfaces': interfaces},
+        'show interfaces status': {'interfaceStatuses': interface_statuses},
+        'show inventory': {'xcvrSlots': xcvr_slots, 'portCount': ports},
+        'show lacp neighbor': {'portChannels': port_channels},
+        'show lldp neighbors': {'lldpNeighbors': lldp, 'tablesInserts': lldp_neighbors},
+        'show mlag interfaces': {'interfaces': mlag_interfaces},
+        'show mlag': {
+            'state': 'active', 'negStatus': 'connected', 'domainId': 'MLAG_SYNTH',
+            'localInterface': 'Vlan4094', 'peerLink': 'Port-Channel2000',
+            'peerAddress': '192.168.255.2', 'configSanity': 'consistent'
+        },
+        'show ip bgp summary': {'vrfs': {'default': {'routerId': '10.0.0.1', 'peers': peers}}}
+    }
+
+
+def make_device(outputs, hostname='synth1'):
+    """ Returns a Device that replays the synthetic outputs """
+    store = CaptureStore(f'{hostname}.json.gz')
+    for command, output in outputs.items():
+        store.put(command, 'json', output)
+
+    return Device(hostname, api=ReplayTransport(store))
+
+
+def _bgp_testcases(device):
+    peers = nrfu_bgp_neighbor_status.snapshot_testdata(device)['vrfs']['default']['peers']
+
+    return [{
+        'test-case': nrfu_bgp_neighbor_status.TEST_CASE_NAME,
+        'dut': device.hostname,
+        'params': {'peer_ip': peer_ip, 'peer_device': f"peer{index + 1}",
+                   'peer_role': 'ebgp', 'bgp_type': 'eBGP'},
+        'expected': {'state': 'up'}
+    } for index, peer_ip in enumerate(peers)]
+
+
+def make_testcases(device):
+    """
+    Returns the test-cases of the synthetic device, created by the NRFU module
+    `snapshot_testcases` functions, as a dict, key: NRFU module, value: list
+    of test-cases.
+    """
+    nrfu_testcases = {
+        nrfu: nrfu.snapshot_testcases(device)
+        for nrfu in (nrfu_optic_inventory, nrfu_interface_status, nrfu_cabling,
+                     nrfu_lag_status, nrfu_mlag_status, nrfu_mlag_interface_status)
+    }
+
+    nrfu_testcases[nrfu_bgp_neighbor_status] = _bgp_testcases(device)
+    return nrfu_testcases
@@ -0,0 +1,192 @@
+#  Copyright 2019 Jeremy Schulman, nwkautomaniac@gmail.com
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""
+This file contains the SQLite test-case store, an alternative to the per-type
+JSON test-case files.  All of the test-cases of a fleet are stored in a single
+file, indexed by the device ("dut") and the "test-case" type, so that the
+test-cases of one device and type are read without parsing the others, and are
+iterated one at a time.
+
+The store can be used wherever a test-case directory is given, for example
+with the --nrfu-testcasedir option of the pytest plugin or the --testcasedir
+option of the `nrfu` command.
+
+Examples
+--------
+    with TestcaseStore('pod1-testcases.db') as store:
+        store.import_dir('dev1-testcases', dut='dev1')
+
+        for testcase in store.iter(dut='dev1', test_case='test-cabling'):
+            print(testcase['params'])
+"""
+
+from pathlib import Path
+import json
+import sqlite3
+
+from nrfupytesteos.snapshot import MANIFEST_FILE
+
+__all__ = ['TestcaseStore']
+
+_SQLITE_HEADER = b'SQLite format 3\x00'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS testcases (
+    id INTEGER PRIMARY KEY,
+    dut TEXT NOT NULL,
+    test_case TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS testcases_dut_type ON testcases (dut, test_case);
+"""
+
+
+class TestcaseStore(object):
+    """
+    The test-cases of one or more devices in a SQLite file.
+
+    Parameters
+    ----------
+    path : str | Path - the SQLite file, created when it does not exist
+
+    readonly : bool
+        When True the file is opened read-only, and FileNotFoundError is
+        raised when it does not exist, rather than creating an empty store.
+    """
+    SUFFIXES = ('.db', '.sqlite', '.sqlite3')
+
+    # this is not a pytest test class
+
+    __test__ = False
+
+    def __init__(self, path, readonly=False):
+        self.path = Path(path)
+
+        if not readonly:
+            self.conn = sqlite3.connect(str(self.path))
+            self.conn.executescript(_SCHEMA)
+            return
+
+        if not self.path.is_file():
+            raise FileNotFoundError(f"No test-case store: {self.path}")
+
+        self.conn = sqlite3.connect(f'{self.path.absolute().as_uri()}?mode=ro', uri=True)
+
+    @classmethod
+    def is_store(cls, path):
+        """
+        Returns True when the path is a test-case store: an existing SQLite
+        file, or a path with one of the SUFFIXES.
+        """
+        path = Path(path)
+
+        if path.is_file():
+            with path.open('rb') as ifile:
+                return ifile.read(len(_SQLITE_HEADER)) == _SQLITE_HEADER
+
+        return path.suffix in cls.SUFFIXES
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.conn.close()
+
+    def put(self, dut, test_case, testcases):
+        """
+        Replace the stored test-cases of the device and test-case type.
+
+        Parameters
+        ----------
+        dut : str - the device name
+        test_case : str - the test-case type, for example "test-cabling"
+        testcases : iterable - the test-cases
+        """
+        with self.conn:
+            self.conn.execute('DELETE FROM testcases WHERE dut = ? AND test_case = ?',
+                              (dut, test_case))
+            self.conn.executemany(
+                'INSERT INTO testcases (dut, test_case, data) VALUES (?, ?, ?)',
+                ((dut, test_case, json.dumps(testcase, separators=(',', ':')))
+                 for testcase in testcases))
+
+    def _where(self, dut, test_case):
+        clauses, args = list(), list()
+
+        if dut is not None:
+            clauses.append('dut = ?')
+            args.append(dut)
+
+        if test_case is not None:
+            clauses.append('test_case = ?')
+            args.append(test_case)
+
+        return (' WHERE ' + ' AND '.join(clauses) if clauses else ''), args
+
+    def iter(self, dut=None, test_case=None):
+        """
+        Yields the stored test-cases, in the order they were stored, optionally
+        only those of the device and/or test-case type.  The test-cases are
+        read from the file as they are iterated.
+        """
+        where, args = self._where(dut, test_case)
+        cursor = self.conn.execute(f'SELECT data FROM testcases{where} ORDER BY id', args)
+
+        for (data,) in cursor:
+            yield json.loads(data)
+
+    def count(self, dut=None, test_case=None):
+        where, args = self._where(dut, test_case)
+        return self.conn.execute(f'SELECT COUNT(*) FROM testcases{where}', args).fetchone()[0]
+
+    def duts(self):
+        """ Returns the names of the devices that have stored test-cases """
+        return [dut for (dut,) in self.conn.execute(
+            'SELECT DISTINCT dut FROM testcases ORDER BY dut')]
+
+    def test_cases(self, dut=None):
+        """ Returns the test-case types stored, optionally of the device """
+        where, args = self._where(dut, None)
+        return [test_case for (test_case,) in self.conn.execute(
+            f'SELECT DISTINCT test_case FROM testcases{where} ORDER BY test_case', args)]
+
+    def import_dir(self, testcases_dir, dut=None):
+        """
+        Store the test-cases of the JSON test-case files in the directory.  The
+        device of each test-case is `dut` when given, otherwise the "dut" of
+        the test-case.
+
+        Returns
+        -------
+        int - the number of test-cases stored
+        """
+        grouped = dict()
+
+        for tc_file in sorted(Path(testcases_dir).glob('*.json')):
+            if tc_file.name == MANIFEST_FILE:
+                continue
+
+            with tc_file.open() as ifile:
+                for testcase in json.load(ifile):
+                    key = (dut or testcase['dut'], testcase['test-case'])
+                    grouped.setdefault(key, []).append(testcase)
+
+        for (tc_dut, test_case), testcases in grouped.items():
+            self.put(tc_dut, test_case, testcases)
+
+        return sum(map(len, grouped.values()))
@@ -0,0 +1,176 @@
+#  Copyright 2019 Jeremy Schulman, nwkautomaniac@gmail.com
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""
+This file contains the span tracing of NRFU runs.  The phases of a run, the
+device probe, the eAPI request of each device and the decode of its response,
+the show output snapshot and the evaluation of each NRFU module, and the
+writing of the results and report, are recorded as spans with the device,
+command and byte count.  The spans are saved in the Chrome trace event format,
+which is opened as a flame chart of each thread by chrome://tracing or
+https://ui.perfetto.dev.
+
+Tracing is enabled by the --nrfu-trace option of the pytest plugin and the
+--trace option of the `nrfu` command:
+
+    nrfu --inventory pod1.txt --testcasedir pod1-testcases --trace pod1-trace.json
+
+When tracing is not enabled, `span` returns a shared no-op span, so that the
+instrumented code does not pay for it.
+
+Examples
+--------
+    tracing.start()
+
+    with tracing.span('eapi.request', cat='device', device=hostname) as span:
+        content = ...
+        span.set(bytes=len(content))
+
+    tracing.save('trace.json')
+"""
+
+from pathlib import Path
+import json
+import os
+import threading
+import time
+
+__all__ = ['Tracer', 'span', 'start', 'stop', 'save', 'enabled']
+
+_tracer = None
+
+
+class Tracer(object):
+    """
+    Records the completed spans of all of the threads, as Chrome trace
+    "complete" events with the start time and duration in microseconds.
+    """
+    def __init__(self):
+        self.events = list()
+        self.threads = dict()
+        self.pid = os.getpid()
+        self.origin = time.perf_counter()
+
+    def record(self, name, cat, started, ended, args):
+        tid = threading.get_ident()
+        if tid not in self.threads:
+            self.threads[tid] = threading.current_thread().name
+
+        # list.append is atomic, so the threads do not need a lock
+
+        self.events.append({
+            'name': name, 'cat': cat, 'ph': 'X', 'pid': self.pid, 'tid': tid,
+            'ts': round((started - self.origin) * 1e6, 3),
+            'dur': round((ended - started) * 1e6, 3),
+            'args': args
+        })
+
+    def save(self, path):
+        """ Write the spans to the Chrome trace JSON file """
+        metadata = [{'name': 'thread_name', 'ph': 'M', 'pid': self.pid, 'tid': tid,
+                     'args': {'name': name}}
+                    for tid, name in list(self.threads.items())]
+
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        with path.open('w') as ofile:
+            json.dump({'traceEvents': metadata + self.events, 'displayTimeUnit': 'ms'},
+                      ofile, separators=(',', ':'), default=str)
+
+
+class Span(object):
+    """ A span of a Tracer, recorded when the context exits """
+    __slots__ = ('tracer', 'name', 'cat', 'args', 'started')
+
+    def __init__(self, tracer, name, cat, args):
+        self.tracer = tracer
+        self.name = name
+        self.cat = cat
+        self.args = args
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is not None:
+            self.args['error'] = exc_type.__name__
+
+        self.tracer.record(self.name, self.cat, self.started, time.perf_counter(), self.args)
+
+    def set(self, **args):
+        """ Add to the span args, for example a byte count known at the end """
+        self.args.update(args)
+
+
+class _NullSpan(object):
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        pass
+
+    def set(self, **args):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def span(name, cat='nrfu', **args):
+    """
+    Returns the context manager of a span of the active tracer, or a no-op
+    span when tracing is not enabled.
+
+    Parameters
+    ----------
+    name : str - the span name, for example 'eapi.request'
+    cat : str - the span category, for example 'device'
+    args : the span args shown with the span, for example the device name
+    """
+    tracer = _tracer
+    if tracer is None:
+        return _NULL_SPAN
+
+    return Span(tracer, name, cat, args)
+
+
+def enabled():
+    return _tracer is not None
+
+
+def start():
+    """ Enable tracing, returning the active Tracer """
+    global _tracer
+
+    _tracer = Tracer()
+    return _tracer
+
+
+def stop():
+    """ Disable tracing, returning the Tracer that was active, if any """
+    global _tracer
+
+    tracer, _tracer = _tracer, None
+    return tracer
+
+
+def save(path):
+    """ Disable tracing and write the spans to the Chrome trace JSON file """
+    tracer = stop()
+    if tracer is not None:
+        tracer.save(path)
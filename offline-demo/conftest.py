@@ -22,15 +22,45 @@ directory called "dev1-testcases".
 """
 from pathlib import Path
 
-import pytest
-
 from nrfupytesteos import Device
+from nrfupytesteos.eapi_capture import ReplayTransport
 
 # import the pytest_addoption from the package so we pickup the pytest options
 # for NRFU.  The `pytest_addoption` function needs to be scoped in this file in
-# order for the pytest commandline to use the --nrfu options.
+# order for the pytest commandline to use the --nrfu options.  The other hooks
+# and the `device` fixture setup the NRFU runtime for one device or a fleet of
+# devices.
+
+from nrfupytesteos.conftest import (  # noqa
+    pytest_addoption,
+    pytest_configure,
+    pytest_collection_finish,
+    pytest_runtest_call,
+    pytest_runtest_makereport,
+    pytest_sessionfinish,
+    device
+)
+
+
+def replay_device(hostname):
+    """
+    Normally when we want the device instance we would create a pyEapi session
+    and return it; see the `online-demo/conftest.py` for real-world use.  Since we
+    are using captured show output data, we are going to instead create the
+    Device instance with a ReplayTransport so that the show commands executed by
+    the test functions return the captured data without connecting to a device.
 
-from nrfupytesteos.conftest import pytest_addoption  # noqa
+    Parameters
+    ----------
+    hostname : str - the device name
+
+    Returns
+    -------
+    Device
+        The device instance that will be used by the test functions
+    """
+    show_outputs_dir = Path.cwd().joinpath(hostname + "-show-outputs")
+    return Device(hostname, api=ReplayTransport.from_path(show_outputs_dir))
 
 
 def pytest_sessionstart(session):
@@ -41,40 +71,11 @@ def pytest_sessionstart(session):
     Normally when a session starts we would attempt to connect to the device
     and verify that we can reach it.  See the `online-demo/conftest.py` for
     performing that action with EOS.  For the purposes of demonstration, we are
-    going to store Path variables to the directories we will need in order to
-    obtain the demo "show" output and the test-cases
+    going to create the devices from the captured show output stored in the
+    "<device>-show-outputs" directories.
 
     Parameters
     ----------
     session : Session - pytest Session instance
     """
-    cfg_opts = session.config.option
-
-    session.config._nrfu = dict(
-        show_outputs_dir=Path.cwd().joinpath(cfg_opts.nrfu_device + "-show-outputs"),
-        testcase_dir=Path(cfg_opts.nrfu_testcasedir).absolute()
-    )
-
-
-@pytest.fixture(scope='session')
-def device(pytestconfig):
-    """
-    Normally when we want the device instance we would create a pyEapi session
-    and return it; see the `online-demo/conftest.py` for real-world use.  Since we
-    are using captured show output data, we are going to instead add a variable
-    to the Device instance so that the test functions can use it to load the
-    fake data.
-
-    Parameters
-    ----------
-    pytestconfig : Config - the pytest Config instance
-
-    Returns
-    -------
-    Device
-        The device instance that will be used by the test functions
-    """
-    device_name = pytestconfig.option.nrfu_device
-    dev = Device(device_name)
-    dev.show_outputs_dir = pytestconfig._nrfu['show_outputs_dir']
-    return dev
+    session.config._nrfu.make_device = replay_device
@@ -18,13 +18,13 @@ line option.  This file retrieves the device specific "show" output from a file
 rather than an actual device to support a dev-demo environment.
 """
 
-import json
 import pytest
 
 # import the EOS specific NRFU optic inventory module so the functions in this
 # file can generate the test-case names and invoke the actual NRFU validation
 # function.
 
+from nrfupytesteos.conftest import nrfu_parametrize
 from nrfupytesteos import nrfu_optic_inventory as nrfu
 
 
@@ -34,8 +34,8 @@ def device_inventory(device):
     This fixture is used to return the EOS result of the "show inventory"
     command as structured data.
 
-    Rather than running the specific EOS show command, we are going to load the
-    previously captured output.  For a real-world example, see the file
+    The device replays the previously captured output rather than running the
+    EOS show command on a live device.  For a real-world example, see the file
     `online-demo/test_00_optic_inventory.py`.
 
     Parameters
@@ -45,11 +45,10 @@ def device_inventory(device):
     Returns
     -------
     dict
-        The dictionary output of the "show inventory" command that was retrieve
-        from a file rather than the device.
+        The dictionary output of the "show inventory" command that was retrieved
+        from the captured output.
     """
-    device_data = device.show_outputs_dir / 'show-inventory.json'
-    return json.load(device_data.open())
+    return nrfu.snapshot_testdata(device)
 
 
 def pytest_generate_tests(metafunc):
@@ -62,12 +61,7 @@ def pytest_generate_tests(metafunc):
     ----------
     metafunc : Metafunc instance used to parametrize the test function
     """
-    tc_file = metafunc.config._nrfu['testcase_dir'].joinpath(
-        'testcases-optic-inventory.json')
-
-    metafunc.parametrize('testcase',
-                         json.load(tc_file.open()),
-                         ids=nrfu.name_test)
+    nrfu_parametrize(metafunc, nrfu, 'testcases-optic-inventory.json')
 
 
 def test_optic_inventory(device, device_inventory, testcase):
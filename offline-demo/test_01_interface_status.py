@@ -17,13 +17,13 @@ load NRFU interface status test-cases based on the --nrfu-testcasedir command
 line option.  This file retrieves the device specific "show" output from a file
 rather than an actual device to support a dev-demo environment.
 """
-import json
 import pytest
 
 # import the EOS specific NRFU interface status module so the functions in this
 # file can generate the test-case names and invoke the actual NRFU validation
 # function.
 
+from nrfupytesteos.conftest import nrfu_parametrize
 from nrfupytesteos import nrfu_interface_status as nrfu
 
 
@@ -33,8 +33,8 @@ def device_interfaces_status(device):
     This fixture is used to return the EOS result of the "show interfaces" command
     as structured data.
 
-    Rather than running the specific EOS show command, we are going to load the
-    previously captured output.  For a real-world example, see the file
+    The device replays the previously captured output rather than running the
+    EOS show command on a live device.  For a real-world example, see the file
     `online-demo/test_01_interface_status.py`.
 
     Parameters
@@ -44,11 +44,10 @@ def device_interfaces_status(device):
     Returns
     -------
     dict
-        The dictionary output of the "show interfaces" command that was retrieve
-        from a file rather than the device.
+        The dictionary output of the "show interfaces" command that was retrieved
+        from the captured output.
     """
-    show_file = device.show_outputs_dir.joinpath('show-interfaces.json')
-    return json.load(show_file.open())
+    return nrfu.snapshot_testdata(device)
 
 
 def pytest_generate_tests(metafunc):
@@ -62,12 +61,7 @@ def pytest_generate_tests(metafunc):
     metafunc : Metafunc instance used to parametrize the test function
     """
 
-    tc_file = metafunc.config._nrfu['testcase_dir'].joinpath(
-        'testcases-interface-status.json')
-
-    metafunc.parametrize('testcase',
-                         json.load(tc_file.open()),
-                         ids=nrfu.name_test)
+    nrfu_parametrize(metafunc, nrfu, 'testcases-interface-status.json')
 
 
 def test_interface_status(device, device_interfaces_status, testcase):
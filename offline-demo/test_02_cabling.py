@@ -17,13 +17,12 @@ load NRFU cabling test-cases based on the --nrfu-testcasedir command line
 option.  This file retrieves the device specific "show" output from a file
 rather than an actual device to support a dev-demo environment.
 """
-import json
-
 import pytest
 
 # import the EOS specific NRFU cabling module so the functions in this file can
 # generate the test-case names and invoke the actual NRFU validation function.
 
+from nrfupytesteos.conftest import nrfu_parametrize
 from nrfupytesteos import nrfu_cabling as nrfu
 
 
@@ -33,8 +32,8 @@ def device_lldp_neighbors(device):
     This fixture is used to return the EOS result of the 'show lldp neighbors'
     command as structured data.
 
-    Rather than running the specific EOS show command, we are going to load the
-    previously captured output.  For a real-world example, see the file
+    The device replays the previously captured output rather than running the
+    EOS show command on a live device.  For a real-world example, see the file
     `online-demo/test_02_cabling.py`.
 
     Parameters
@@ -45,12 +44,9 @@ def device_lldp_neighbors(device):
     -------
     dict
         The dictionary output of the "show lldp neighbors" command that was
-        retrieve from a file rather than the device.
+        replayed from the captured output.
     """
-    show_file = device.show_outputs_dir.joinpath(
-        'show-lldp-neighbors.json')
-
-    return json.load(show_file.open())
+    return nrfu.snapshot_testdata(device)
 
 
 def pytest_generate_tests(metafunc):
@@ -63,12 +59,7 @@ def pytest_generate_tests(metafunc):
     ----------
     metafunc : Metafunc instance used to parametrize the test function
     """
-    testcases_file = metafunc.config._nrfu['testcase_dir'].joinpath(
-        'testcases-cabling.json')
-
-    metafunc.parametrize('testcase',
-                         json.load(testcases_file.open()),
-                         ids=nrfu.name_test)
+    nrfu_parametrize(metafunc, nrfu, 'testcases-cabling.json')
 
 
 def test_cabling(device, device_lldp_neighbors, testcase):
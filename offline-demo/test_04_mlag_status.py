@@ -18,13 +18,13 @@ This file retrieves the device specific "show" output from a file rather than
 an actual device to support a dev-demo environment.
 """
 
-import json
 import pytest
 
 # import the EOS specific NRFU MLAG status module so the functions in this file
 # can generate the test-case names and invoke the actual NRFU validation
 # function.
 
+from nrfupytesteos.conftest import nrfu_parametrize
 from nrfupytesteos import nrfu_mlag_status as nrfu
 
 
@@ -34,8 +34,8 @@ def device_mlag_status(device):
     This fixture is used to return the EOS result of the 'show mlag' command as
     structured data.
 
-    Rather than running the specific EOS show command, we are going to load the
-    previously captured output.  For a real-world example, see the file
+    The device replays the previously captured output rather than running the
+    EOS show command on a live device.  For a real-world example, see the file
     `online-demo/test_04_mlag_status.py`.
 
     Parameters
@@ -46,12 +46,9 @@ def device_mlag_status(device):
     -------
     dict
         The dictionary output of the 'show mlag' command that was retrieve from
-        a file rather than the device.
+        the captured output.
     """
-    show_file = device.show_outputs_dir.joinpath(
-         'show-mlag.json')
-
-    return json.load(show_file.open())
+    return nrfu.snapshot_testdata(device)
 
 
 def pytest_generate_tests(metafunc):
@@ -65,12 +62,7 @@ def pytest_generate_tests(metafunc):
     metafunc : Metafunc instance used to parametrize the test function
     """
 
-    testcases_file = metafunc.config._nrfu['testcase_dir'].joinpath(
-        'testcases-mlag-status.json')
-
-    metafunc.parametrize('testcase',
-                         json.load(testcases_file.open()),
-                         ids=nrfu.name_test)
+    nrfu_parametrize(metafunc, nrfu, 'testcases-mlag-status.json')
 
 
 def test_mlag_status(device, device_mlag_status, testcase):
@@ -12,33 +12,30 @@
 #  See the License for the specific language governing permissions and
 #  limitations under the License.
 
-from pathlib import Path
-
 import pytest
 
 from nrfupytesteos.conftest import *
 from pyeapi.eapilib import ConnectionError
 
 
-class NRFUconfig(object):
-    """ for NRFU specific config / runtime """
-    pass
-
-
 def pytest_sessionstart(session):
     config = session.config
+    nrfu_cfg = config._nrfu
 
-    # Store the instance of the Path to the test-case dir since we'll be using
-    # it many times in each of the test function modules.
+    # In fleet mode (--nrfu-inventory) the devices are probed and the show
+    # output fetched concurrently once the tests are collected; a device that
+    # cannot be reached fails only its own tests.  Likewise there is no device
+    # to check when replaying captured show output.
 
-    config._nrfu = NRFUconfig()
-    config._nrfu.testcases_dir = Path(config.option.nrfu_testcasedir).absolute()
+    if nrfu_cfg.fleet or config.getoption("--nrfu-replay"):
+        return
 
     device_name = config.getoption("--nrfu-device")
-    ssh_config_file = config.getoption('--ssh-config')
-    dev = Device(device_name, ssh_config_file=ssh_config_file)
+    dev = nrfu_cfg.make_device(device_name)
 
-    # first probe IP/hostname of the device to ensure it is reachable.
+    # first probe IP/hostname of the device to ensure it is reachable.  The
+    # probe connection is kept in the Device connection pool, so the following
+    # "show version" and all of the test show commands reuse it.
 
     if not dev.probe():
         pytest.exit(f"Device unreachable, check --nrfu-device value: {device_name}.")
@@ -58,14 +55,4 @@ def pytest_sessionstart(session):
     # since we have it, and we can then reference it for use by the device
     # fixture so we don't need to re-connect to the device a second time. ;-)
 
-    config._nrfu.device = dev
-
-
-@pytest.fixture(scope='session')
-def device(request):
-    """
-    This fixture will be called once to return the existing Device instance
-    that was setup in the session start hook function.
-    """
-
-    return request.config._nrfu.device
+    nrfu_cfg.device = dev
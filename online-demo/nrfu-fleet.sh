@@ -0,0 +1,10 @@
+#!/bin/bash
+
+inventory=$1
+shift
+set -x
+
+pytest -v --tb=no \
+    --nrfu-report fleet-report \
+    --nrfu-inventory ${inventory} \
+    --nrfu-testcasedir . "$@"
@@ -14,12 +14,37 @@
 #  See the License for the specific language governing permissions and
 #  limitations under the License.
 
-import sys
+"""
+Create the test-cases of a device, or of each device of an inventory file,
+from the existing operational state:
+
+    nrfu-snapshot.py switch-101.bld1
+
+    nrfu-snapshot.py --inventory inventory.txt --max-workers 32
+
+    nrfu-snapshot.py --inventory inventory.txt --store pod1-testcases.db --capture captures
+
+The show output of a device is fetched in one request, and the devices of an
+inventory are snapshot concurrently.  The test-cases of each device are written
+to a directory named after the device, or into a test-case store.  Only the
+test-case sets that have changed since the last snapshot are rewritten, and the
+added, removed and changed test-cases are reported; see snapshot.py.
+
+The show output fetched from a device is saved, as received, into the capture
+file "show-outputs.json.gz" of the device directory, so that the test-cases can
+be run offline with the --replay option of the `nrfu` command, or the
+--nrfu-replay option of the pytest plugin.
+"""
+
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-import json
+import argparse
+import sys
 
+from nrfupytesteos import engine
+from nrfupytesteos.testcase_store import TestcaseStore
+from nrfupytesteos.snapshot import write_testcases_dir, update_store
 from nrfupytesteos import (
-    Device,
     nrfu_cabling,
     nrfu_lag_status,
     nrfu_interface_status,
@@ -29,15 +54,6 @@ from nrfupytesteos import (
 )
 
 
-try:
-    dev = Device(hostname=sys.argv[1])
-
-except IndexError:
-    sys.exit("Missing hostname")
-
-
-assert dev.probe(), f"Unable to reach {dev.hostname}, exit."
-
 snapshot_list = [
     nrfu_cabling,
     nrfu_lag_status,
@@ -48,22 +64,136 @@ snapshot_list = [
 ]
 
 
-def snapshot():
-    snapshot_dir = Path.cwd() / dev.hostname
+def parse_args():
+    parser = argparse.ArgumentParser(description='Create NRFU test-cases from devices')
+
+    parser.add_argument('hostname', nargs='?', help='device name or IP address')
+
+    parser.add_argument('--inventory',
+                        help='file of device names, one per line, to snapshot')
+
+    parser.add_argument('--max-workers', type=int, default=16,
+                        help='maximum number of devices snapshot concurrently')
+
+    parser.add_argument('--store',
+                        help='test-case store file to write, rather than a '
+                             'directory per device')
+
+    parser.add_argument('--capture',
+                        help='directory to save the show output of each device '
+                             'into, a sub-directory per device; by default the '
+                             'device test-case directory')
+
+    parser.add_argument('--no-capture', action='store_true',
+                        help='do not save the show output')
+
+    parser.add_argument('--ssh-config', help='path to SSH config file')
+
+    args = parser.parse_args()
+    if not (args.hostname or args.inventory):
+        parser.error('a hostname or --inventory is required')
+
+    return args
+
+
+def capture_path(args, hostname):
+    if args.no_capture:
+        return None
+
+    if args.capture:
+        return Path(args.capture) / hostname
+
+    return None if args.store else Path.cwd() / hostname
+
+
+def snapshot_device(hostname, ssh_config_file=None, capture=None):
+    """
+    Returns the test-cases of the device, as a list of (nrfu module, test-cases).
+    When `capture` is given, the show output fetched is also saved into the
+    capture store at that path, see eapi_capture.py.
+    """
+    dev = engine.make_device(hostname, ssh_config_file=ssh_config_file, record=capture)
+
+    if not dev.probe():
+        raise RuntimeError(f"Unable to reach {hostname}")
+
+    # fetch the show output of all modules up front, in one request except for
+    # the streamed outputs, so that the modules create their test-cases from
+    # the Device cache.
+
+    engine.fetch(dev, {nrfu.SHOW_COMMAND: nrfu.SHOW_COMMAND for nrfu in snapshot_list},
+                 engine.plan_projections(snapshot_list), engine.plan_streams(snapshot_list))
+
+    # the capture has the complete show output as received, before the
+    # projections are applied, so that it can be replayed with --replay.
+
+    if capture:
+        dev.api.save()
+
+    return [(nrfu, nrfu.snapshot_testcases(dev)) for nrfu in snapshot_list]
+
+
+def report(hostname, nrfu_testcases, target, changes):
+    print(f"{hostname}: {target}")
+
+    for nrfu, testcases in nrfu_testcases:
+        name = nrfu.TEST_CASE_NAME
+        change = changes.get(name)
+
+        if not testcases and not change:
+            print(f"\t[-] {name} skipping, no test-cases")
+
+        elif not change:
+            print(f"\t[=] {name} unchanged, {len(testcases)} test-cases")
+
+        else:
+            print(f"\t[+] {name} writing {len(testcases)} test-cases: "
+                  f"{change['added']} added, {change['removed']} removed, "
+                  f"{change['changed']} changed")
+
+
+def snapshot(args):
+    hostnames = engine.load_inventory(args.inventory) if args.inventory else [args.hostname]
+    store = TestcaseStore(args.store) if args.store else None
+    failed = drifted = 0
+
+    with ThreadPoolExecutor(max_workers=args.max_workers) as pool:
+        futures = {
+            pool.submit(snapshot_device, hostname, args.ssh_config,
+                        capture_path(args, hostname)): hostname
+            for hostname in hostnames
+        }
+
+        # the test-cases are written as each device completes; the store is
+        # only written from this thread.
+
+        for future in as_completed(futures):
+            hostname = futures[future]
+            try:
+                nrfu_testcases = future.result()
+
+            except Exception as exc:
+                print(f"{hostname}: FAILED, {exc}", file=sys.stderr)
+                failed += 1
+                continue
+
+            if store is not None:
+                changes = update_store(store, hostname, nrfu_testcases)
+                report(hostname, nrfu_testcases, f"store {store.path}", changes)
+
+            else:
+                changes = write_testcases_dir(Path.cwd() / hostname, nrfu_testcases)
+                report(hostname, nrfu_testcases, f"directory {hostname}", changes)
+
+            drifted += bool(changes)
 
-    print(f"Ensure directory: {snapshot_dir.name}")
-    snapshot_dir.mkdir(exist_ok=True)
+    if store is not None:
+        store.close()
 
-    for nrfu in snapshot_list:
-        testcases = nrfu.snapshot_testcases(dev)
-        if not testcases:
-            print(f"\t[-] {nrfu.TEST_CASE_NAME} skipping, no test-cases")
-            continue
+    print(f"{len(hostnames)} devices: {drifted} changed, {failed} failed", file=sys.stderr)
 
-        tc_file = snapshot_dir / f'{nrfu.TEST_CASE_NAME}.json'
-        print(f"\t[+] {nrfu.TEST_CASE_NAME} creating {len(testcases)} test-cases")
-        json.dump(testcases, tc_file.open('w+'), indent=3)
+    return 1 if failed else 0
 
 
 if __name__ == "__main__":
-    snapshot()
+    sys.exit(snapshot(parse_args()))
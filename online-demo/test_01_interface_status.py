@@ -18,13 +18,13 @@ line option.  This file retrieves the device specific "show" output from the
 device directly.
 """
 
-import json
 import pytest
 
 # import the EOS specific NRFU interface status module so the functions in this
 # file can generate the test-case names and invoke the actual NRFU validation
 # function.
 
+from nrfupytesteos.conftest import nrfu_parametrize
 import nrfupytesteos.nrfu_interface_status as nrfu
 
 
@@ -57,12 +57,7 @@ def pytest_generate_tests(metafunc):
     metafunc : Metafunc instance used to parametrize the test function
     """
 
-    testcases_file = metafunc.config._nrfu.testcases_dir.joinpath(
-        f'{nrfu.TEST_CASE_NAME}.json')
-
-    metafunc.parametrize('testcase',
-                         json.load(testcases_file.open()),
-                         ids=nrfu.name_test)
+    nrfu_parametrize(metafunc, nrfu, f'{nrfu.TEST_CASE_NAME}.json')
 
 
 def test_interface_status(device, device_interfaces_status, testcase):
@@ -18,12 +18,12 @@ option.  This file retrieves the device specific "show" output directly from
 the device.
 """
 
-import json
 import pytest
 
 # import the EOS specific NRFU cabling module so the functions in this file can
 # generate the test-case names and invoke the actual NRFU validation function.
 
+from nrfupytesteos.conftest import nrfu_parametrize
 import nrfupytesteos.nrfu_cabling as nrfu
 
 
@@ -56,12 +56,7 @@ def pytest_generate_tests(metafunc):
     metafunc : Metafunc instance used to parametrize the test function
     """
 
-    testcases_file = metafunc.config._nrfu.testcases_dir.joinpath(
-        f'{nrfu.TEST_CASE_NAME}.json')
-
-    metafunc.parametrize('testcase',
-                         json.load(testcases_file.open()),
-                         ids=nrfu.name_test)
+    nrfu_parametrize(metafunc, nrfu, f'{nrfu.TEST_CASE_NAME}.json')
 
 
 def test_cabling(device, device_lldp_neighbors, testcase):
@@ -19,8 +19,8 @@ This file retrieves the device specific "show" output from a file rather than
 an actual device to support a dev-demo environment.
 """
 
-import json
 import pytest
+from nrfupytesteos.conftest import nrfu_parametrize
 import nrfupytesteos.nrfu_lag_status as nrfu
 
 
@@ -57,16 +57,7 @@ def pytest_generate_tests(metafunc):
     ----------
     metafunc : Metafunc instance used to parametrize the test function
     """
-    testcases_file = metafunc.config._nrfu.testcases_dir.joinpath(
-        f'{nrfu.TEST_CASE_NAME}.json')
-
-    if not testcases_file.exists():
-        metafunc.parametrize('testcase', [], ids=['no-tests'])
-        return
-
-    metafunc.parametrize('testcase',
-                         json.load(testcases_file.open()),
-                         ids=nrfu.name_test)
+    nrfu_parametrize(metafunc, nrfu, f'{nrfu.TEST_CASE_NAME}.json')
 
 
 def test_lag_status(device, device_lacp_neighbors, testcase):
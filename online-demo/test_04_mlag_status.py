@@ -18,13 +18,13 @@ load NRFU MLAG test-cases based on the --nrfu-testcasedir command line option.
 This file retrieves the device specific "show" output from a file rather than
 an actual device to support a dev-demo environment.
 """
-import json
 import pytest
 
 # import the EOS specific NRFU MLAG status module so the functions in this file
 # can generate the test-case names and invoke the actual NRFU validation
 # function.
 
+from nrfupytesteos.conftest import nrfu_parametrize
 import nrfupytesteos.nrfu_mlag_status as nrfu
 
 
@@ -65,16 +65,7 @@ def pytest_generate_tests(metafunc):
     metafunc : Metafunc instance used to parametrize the test function
     """
 
-    testcases_file = metafunc.config._nrfu.testcases_dir.joinpath(
-        f'{nrfu.TEST_CASE_NAME}.json')
-
-    if not testcases_file.exists():
-        metafunc.parametrize('testcase', [], ids=['no-tests'])
-        return
-
-    metafunc.parametrize('testcase',
-                         json.load(testcases_file.open()),
-                         ids=nrfu.name_test)
+    nrfu_parametrize(metafunc, nrfu, f'{nrfu.TEST_CASE_NAME}.json')
 
 
 def test_mlag_status(device, device_mlag_status, testcase):
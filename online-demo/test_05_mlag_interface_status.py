@@ -22,13 +22,13 @@ directly from the device.
 # this file can generate the test-case names and invoke the actual NRFU
 # validation function.
 
-import json
 import pytest
 
 # import the EOS specific NRFU MLAG interface status module so the functions in
 # this file can generate the test-case names and invoke the actual NRFU
 # validation function.
 
+from nrfupytesteos.conftest import nrfu_parametrize
 import nrfupytesteos.nrfu_mlag_interface_status as nrfu
 
 
@@ -60,16 +60,7 @@ def pytest_generate_tests(metafunc):
     ----------
     metafunc : Metafunc instance used to parametrize the test function
     """
-    testcases_file = metafunc.config._nrfu.testcases_dir.joinpath(
-        f'{nrfu.TEST_CASE_NAME}.json')
-
-    if not testcases_file.exists():
-        metafunc.parametrize('testcase', [], ids=['no-tests'])
-        return
-
-    metafunc.parametrize('testcase',
-                         json.load(testcases_file.open()),
-                         ids=nrfu.name_test)
+    nrfu_parametrize(metafunc, nrfu, f'{nrfu.TEST_CASE_NAME}.json')
 
 def test_mlag_interface_status(device, device_mlag_interfaces_status, testcase):
     """
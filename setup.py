@@ -37,4 +37,16 @@ setup(
     author='Jeremy Schulman',
     packages=find_packages(),
     install_requires=requirements(),
+    extras_require={
+        'async': ['aiohttp']
+    },
+    entry_points={
+        'console_scripts': [
+            'nrfu = nrfupytesteos.cli:main',
+            'nrfu-drift = nrfupytesteos.drift:main',
+            'nrfu-results = nrfupytesteos.results_store:main',
+            'nrfu-report = nrfupytesteos.report:main',
+            'nrfu-fake-eapi = nrfupytesteos.fake_eapi:main'
+        ]
+    },
 )
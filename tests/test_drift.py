@@ -0,0 +1,126 @@
+#  Copyright 2019 Jeremy Schulman, nwkautomaniac@gmail.com
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""
+Tests of the drift engine, see nrfupytesteos/drift.py
+"""
+
+import copy
+
+from nrfupytesteos.drift import Drift, Fingerprint, diff_outputs
+
+SHOW_INTERFACES = 'show interfaces'
+SHOW_LLDP = 'show lldp neighbors'
+
+COLLECTIONS = {
+    SHOW_INTERFACES: (('interfaces',), None),
+    SHOW_LLDP: (('lldpNeighbors',), ('port', 'neighborDevice'))
+}
+
+PRE = {
+    SHOW_INTERFACES: {
+        'interfaces': {
+            'Ethernet1': {'interfaceStatus': 'connected', 'mtu': 9214},
+            'Ethernet2': {'interfaceStatus': 'connected', 'mtu': 9214}
+        }
+    },
+    SHOW_LLDP: {
+        'lldpNeighbors': [
+            {'port': 'Ethernet1', 'neighborDevice': 'spine1', 'neighborPort': 'Ethernet3/1'},
+            {'port': 'Ethernet2', 'neighborDevice': 'spine2', 'neighborPort': 'Ethernet3/1'}
+        ]
+    }
+}
+
+
+def diff(post, **kwargs):
+    return list(diff_outputs('dev1', PRE, post, COLLECTIONS, **kwargs))
+
+
+def test_no_drift():
+    assert diff(copy.deepcopy(PRE)) == []
+
+
+def test_entity_order_does_not_drift():
+    post = copy.deepcopy(PRE)
+    post[SHOW_LLDP]['lldpNeighbors'].reverse()
+    post[SHOW_INTERFACES]['interfaces'] = dict(reversed(list(post[SHOW_INTERFACES]['interfaces'].items())))
+
+    assert diff(post) == []
+
+
+def test_added():
+    post = copy.deepcopy(PRE)
+    post[SHOW_INTERFACES]['interfaces']['Ethernet3'] = {'interfaceStatus': 'notconnect'}
+
+    assert diff(post) == [Drift('dev1', SHOW_INTERFACES, added=['Ethernet3'], removed=[], changed={})]
+
+
+def test_removed():
+    post = copy.deepcopy(PRE)
+    del post[SHOW_LLDP]['lldpNeighbors'][1]
+
+    assert diff(post) == [Drift('dev1', SHOW_LLDP, added=[], removed=['Ethernet2 spine2'], changed={})]
+
+
+def test_changed():
+    post = copy.deepcopy(PRE)
+    post[SHOW_INTERFACES]['interfaces']['Ethernet2'].update(interfaceStatus='disabled', mtu=1500)
+
+    assert diff(post) == [
+        Drift('dev1', SHOW_INTERFACES, added=[], removed=[],
+              changed={'Ethernet2': ['interfaceStatus', 'mtu']})
+    ]
+
+
+def test_keyed_list_neighbor_replaced():
+    # a new neighbor on the port is an added and a removed entity, as the
+    # neighbor device is part of the key.
+
+    post = copy.deepcopy(PRE)
+    post[SHOW_LLDP]['lldpNeighbors'][0]['neighborDevice'] = 'spine9'
+
+    assert diff(post) == [
+        Drift('dev1', SHOW_LLDP, added=['Ethernet1 spine9'], removed=['Ethernet1 spine1'], changed={})
+    ]
+
+
+def test_projection_hides_fields():
+    post = copy.deepcopy(PRE)
+    post[SHOW_INTERFACES]['interfaces']['Ethernet1']['mtu'] = 1500
+
+    projections = {SHOW_INTERFACES: {'interfaces': {'*': ['interfaceStatus']}}}
+    assert diff(post, projections=projections) == []
+    assert len(diff(post)) == 1
+
+
+def test_command_added_and_removed():
+    post = {SHOW_INTERFACES: PRE[SHOW_INTERFACES], 'show mlag': {'state': 'active'}}
+    drifts = {drift.command: drift for drift in diff(post)}
+
+    assert sorted(drifts) == [SHOW_LLDP, 'show mlag']
+    assert drifts[SHOW_LLDP].removed == ['Ethernet1 spine1', 'Ethernet2 spine2']
+
+    # a command without a collection is compared by its top-level fields
+
+    assert drifts['show mlag'].added == ['state']
+
+
+def test_fingerprint_digest():
+    interfaces = PRE[SHOW_INTERFACES]
+    reordered = {'interfaces': dict(reversed(list(interfaces['interfaces'].items())))}
+    collection = COLLECTIONS[SHOW_INTERFACES]
+
+    assert Fingerprint(interfaces, collection).digest == Fingerprint(reordered, collection).digest
+    assert Fingerprint(interfaces, collection).digest != Fingerprint({'interfaces': {}}, collection).digest
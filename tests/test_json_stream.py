@@ -0,0 +1,183 @@
+#  Copyright 2019 Jeremy Schulman, nwkautomaniac@gmail.com
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""
+Tests of the incremental JSON record decoder, see nrfupytesteos/json_stream.py
+"""
+
+import json
+
+import pytest
+
+from nrfupytesteos.json_stream import iter_records, iter_items, StreamPathError
+
+INTERFACES = {
+    'Ethernet1': {'interfaceStatus': 'connected', 'mtu': 9214, 'rate': 1.5e-3},
+    'Ethernet2': {'interfaceStatus': 'disabled', 'mtu': 1500, 'rate': 0},
+    'Ethernet3': {'interfaceStatus': 'notconnect', 'description': '"spine-1 é"'}
+}
+
+RESPONSE = json.dumps({
+    'jsonrpc': '2.0',
+    'id': 'nrfu',
+    'result': [{}, {'interfaces': INTERFACES}]
+}, ensure_ascii=False)
+
+ERROR_RESPONSE = json.dumps({
+    'jsonrpc': '2.0',
+    'id': 'nrfu',
+    'error': {
+        'code': 1002,
+        'message': "CLI command 2 of 2 'show interfacez' failed: invalid command",
+        'data': [{}, {'errors': ["Invalid input (at token 1: 'interfacez')"]}]
+    }
+})
+
+PATH = ('result', 1, 'interfaces')
+
+MANY_RESPONSE = json.dumps({
+    'jsonrpc': '2.0',
+    'id': 'nrfu',
+    'result': [
+        {},
+        {'hostname': 'dev1', 'fqdn': 'dev1.example.com'},
+        {'interfaces': INTERFACES, 'counters': {'Ethernet1': [1, 2]}},
+        {'lldpNeighbors': [{'port': 'Ethernet1'}, {'port': 'Ethernet2'}]}
+    ]
+}, ensure_ascii=False)
+
+ITEM_PATHS = {2: ('interfaces',), 3: ('lldpNeighbors',)}
+
+
+def chunked(text, size, encode=False):
+    data = text.encode() if encode else text
+    return [data[pos:pos + size] for pos in range(0, len(data), size)]
+
+
+def test_records_in_one_chunk():
+    assert dict(iter_records([RESPONSE], PATH)) == INTERFACES
+
+
+@pytest.mark.parametrize('size', [1, 2, 3, 7, 16, 64])
+def test_records_split_across_chunks(size):
+    assert dict(iter_records(chunked(RESPONSE, size), PATH)) == INTERFACES
+
+
+@pytest.mark.parametrize('size', [1, 2, 5])
+def test_records_split_across_byte_chunks(size):
+    # the multi-byte UTF-8 characters are split between chunks
+
+    assert dict(iter_records(chunked(RESPONSE, size, encode=True), PATH)) == INTERFACES
+
+
+def test_number_split_at_chunk_end():
+    records = list(iter_records(['{"counts": [12', '345, 6', '7]}'], ('counts',)))
+    assert records == [(0, 12345), (1, 67)]
+
+
+def test_list_collection():
+    document = json.dumps({'lldpNeighbors': [{'port': 'Ethernet1'}, {'port': 'Ethernet2'}]})
+
+    assert list(iter_records(chunked(document, 4), ('lldpNeighbors',))) == [
+        (0, {'port': 'Ethernet1'}), (1, {'port': 'Ethernet2'})
+    ]
+
+
+def test_empty_collection():
+    assert list(iter_records(['{"interfaces": {}}'], ('interfaces',))) == []
+
+
+def test_skipped_root_members():
+    skipped = dict()
+    list(iter_records(chunked(RESPONSE, 8), PATH, skipped))
+
+    assert skipped == {'jsonrpc': '2.0', 'id': 'nrfu'}
+
+
+def test_eapi_error_response():
+    with pytest.raises(StreamPathError) as excinfo:
+        list(iter_records(chunked(ERROR_RESPONSE, 8), PATH))
+
+    # the error is kept so that the caller can raise the eAPI command error
+
+    assert excinfo.value.path == PATH
+    assert excinfo.value.skipped['error']['code'] == 1002
+
+
+def test_missing_key():
+    with pytest.raises(StreamPathError):
+        list(iter_records([RESPONSE], ('result', 1, 'portChannels')))
+
+
+def test_missing_index():
+    with pytest.raises(StreamPathError):
+        list(iter_records([RESPONSE], ('result', 2, 'interfaces')))
+
+
+def test_path_to_a_value():
+    with pytest.raises(StreamPathError):
+        list(iter_records([RESPONSE], ('jsonrpc',)))
+
+
+def test_truncated_response():
+    with pytest.raises(ValueError):
+        list(iter_records([RESPONSE[:len(RESPONSE) // 2]], PATH))
+
+
+def decode_items(chunks, item_paths, consume=True):
+    return [(index, list(item) if index in item_paths and consume else item)
+            for index, item in iter_items(chunks, ('result',), item_paths)]
+
+
+@pytest.mark.parametrize('size', [1, 3, 16, 4096])
+def test_items(size):
+    items = decode_items(chunked(MANY_RESPONSE, size), ITEM_PATHS)
+
+    # the items with a path yield the records of the collection, and the rest
+    # of the item is skipped
+
+    assert items == [
+        (0, {}),
+        (1, {'hostname': 'dev1', 'fqdn': 'dev1.example.com'}),
+        (2, list(INTERFACES.items())),
+        (3, [(0, {'port': 'Ethernet1'}), (1, {'port': 'Ethernet2'})])
+    ]
+
+
+def test_items_records_not_consumed():
+    items = list(iter_items(chunked(MANY_RESPONSE, 8), ('result',), ITEM_PATHS))
+
+    assert [index for index, _ in items] == [0, 1, 2, 3]
+    assert list(items[2][1]) == []
+
+
+def test_items_without_paths():
+    items = [item for _, item in iter_items([MANY_RESPONSE], ('result',))]
+    assert items == json.loads(MANY_RESPONSE)['result']
+
+
+def test_items_eapi_error_response():
+    skipped = dict()
+
+    with pytest.raises(StreamPathError):
+        list(iter_items(chunked(ERROR_RESPONSE, 8), ('result',), {1: ('interfaces',)}, skipped))
+
+    assert skipped['error']['code'] == 1002
+
+
+def test_items_missing_item_path():
+    with pytest.raises(StreamPathError) as excinfo:
+        decode_items([MANY_RESPONSE], {1: ('interfaces',)})
+
+    assert excinfo.value.path == ('result', 1, 'interfaces')
@@ -0,0 +1,107 @@
+#  Copyright 2019 Jeremy Schulman, nwkautomaniac@gmail.com
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""
+Tests of the NRFU cabling validator, see nrfupytesteos/nrfu_cabling.py
+"""
+
+import pytest
+
+from nrfupytesteos import nrfu_cabling as nrfu
+from nrfupytesteos import synthetic
+from nrfupytesteos.nrfu_exc import MissingError, MismatchError
+from nrfupytesteos.evaluate import PASS, FAIL
+
+N_NEIGHBORS = 400
+
+
+@pytest.fixture
+def device():
+    return synthetic.make_device(synthetic.make_outputs(ports=N_NEIGHBORS, lldp_neighbors=N_NEIGHBORS))
+
+
+@pytest.fixture
+def index_builds(monkeypatch):
+    """ Returns the list of the datasets the port index is built for """
+    builds = list()
+    build_index = nrfu.port_index
+
+    def counted_port_index(lldp_nbrs):
+        builds.append(lldp_nbrs)
+        return build_index(lldp_nbrs)
+
+    monkeypatch.setattr(nrfu, 'port_index', counted_port_index)
+    return builds
+
+
+def run_test_cabling(device, testcases):
+    """ Call test_cabling for each test-case, as the pytest test functions do """
+    for testcase in testcases:
+        nrfu.test_cabling(device, nrfu.snapshot_testdata(device), testcase)
+
+
+def test_per_case_index_built_once(device, index_builds):
+    testcases = nrfu.snapshot_testcases(device)
+    assert len(testcases) == N_NEIGHBORS
+
+    run_test_cabling(device, testcases)
+    assert len(index_builds) == 1
+
+    # evaluate_all uses the same index of the dataset
+
+    results = nrfu.evaluate_all(device, nrfu.snapshot_testdata(device), testcases)
+    assert results.counts()['pass'] == N_NEIGHBORS
+    assert len(index_builds) == 1
+
+
+def test_index_rebuilt_for_new_dataset(device, index_builds):
+    testcases = nrfu.snapshot_testcases(device)[:2]
+
+    run_test_cabling(device, testcases)
+    device.invalidate(nrfu.SHOW_COMMAND)
+    run_test_cabling(device, testcases)
+
+    assert len(index_builds) == 2
+    assert index_builds[0] is not index_builds[1]
+
+
+def test_given_index(device, index_builds):
+    actual = nrfu.snapshot_testdata(device)
+    nbrs_index = {'Ethernet1/1': [{'neighborDevice': 'spine1', 'neighborPort': 'Ethernet1/1'}]}
+
+    testcase = nrfu.make_testcase('synth1', 'Ethernet1/1', 'spine1', 'Ethernet1/1')
+    assert nrfu.test_cabling(device, actual, testcase, nbrs_index=nbrs_index)
+    assert index_builds == []
+
+
+def test_without_device():
+    actual = {'lldpNeighbors': [
+        {'port': 'Ethernet1', 'neighborDevice': 'spine1', 'neighborPort': 'Ethernet3/1'},
+        {'port': 'Ethernet1', 'neighborDevice': 'host1', 'neighborPort': 'eth0'},
+        {'port': 'Ethernet2', 'neighborDevice': 'spine2', 'neighborPort': 'Ethernet3/1'}
+    ]}
+
+    # a port with more than one neighbor passes when any one is expected
+
+    assert nrfu.test_cabling(None, actual, nrfu.make_testcase('dev1', 'Ethernet1', 'HOST1', 'eth0'))
+
+    with pytest.raises(MismatchError):
+        nrfu.test_cabling(None, actual, nrfu.make_testcase('dev1', 'Ethernet2', 'spine1', 'Ethernet3/1'))
+
+    with pytest.raises(MissingError):
+        nrfu.test_cabling(None, actual, nrfu.make_testcase('dev1', 'Ethernet3', 'spine1', 'Ethernet3/1'))
+
+    testcases = [nrfu.make_testcase('dev1', 'Ethernet1', 'spine1', 'Ethernet3/1'),
+                 nrfu.make_testcase('dev1', 'Ethernet2', 'spine1', 'Ethernet3/1')]
+    assert list(nrfu.evaluate_all(None, actual, testcases).codes) == [PASS, FAIL]
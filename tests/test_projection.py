@@ -0,0 +1,127 @@
+#  Copyright 2019 Jeremy Schulman, nwkautomaniac@gmail.com
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""
+Tests of the show output projections, see nrfupytesteos/projection.py
+"""
+
+from nrfupytesteos.projection import project, covers, merge_projections
+
+INTERFACES = {
+    'interfaces': {
+        'Ethernet1': {'interfaceStatus': 'connected', 'mtu': 9214, 'bandwidth': 10},
+        'Ethernet2': {'interfaceStatus': 'disabled', 'mtu': 1500, 'bandwidth': 10}
+    },
+    'updateTime': 1562940525.1
+}
+
+LLDP = {
+    'lldpNeighbors': [
+        {'port': 'Ethernet1', 'neighborDevice': 'spine1', 'neighborPort': 'Ethernet3/1', 'ttl': 120},
+        {'port': 'Ethernet2', 'neighborDevice': 'spine2', 'neighborPort': 'Ethernet3/1', 'ttl': 120}
+    ],
+    'tablesInserts': 2
+}
+
+
+def test_project_none_or_true_returns_data():
+    assert project(INTERFACES, None) is INTERFACES
+    assert project(INTERFACES, True) is INTERFACES
+
+
+def test_project_wildcard():
+    projected = project(INTERFACES, {'interfaces': {'*': ['interfaceStatus']}})
+
+    assert projected == {
+        'interfaces': {
+            'Ethernet1': {'interfaceStatus': 'connected'},
+            'Ethernet2': {'interfaceStatus': 'disabled'}
+        }
+    }
+
+
+def test_project_wildcard_with_listed_key():
+    projected = project(INTERFACES['interfaces'],
+                        {'Ethernet1': True, '*': ['interfaceStatus']})
+
+    assert projected['Ethernet1'] == INTERFACES['interfaces']['Ethernet1']
+    assert projected['Ethernet2'] == {'interfaceStatus': 'disabled'}
+
+
+def test_project_list_items():
+    projected = project(LLDP, {'lldpNeighbors': ['port', 'neighborDevice']})
+
+    assert projected == {
+        'lldpNeighbors': [
+            {'port': 'Ethernet1', 'neighborDevice': 'spine1'},
+            {'port': 'Ethernet2', 'neighborDevice': 'spine2'}
+        ]
+    }
+
+
+def test_project_missing_keys_are_skipped():
+    assert project({'a': 1}, ['a', 'b']) == {'a': 1}
+    assert project({'a': 1}, {'b': True}) == {}
+
+
+def test_project_does_not_change_data():
+    project(INTERFACES, {'interfaces': {'*': ['interfaceStatus']}})
+    assert 'mtu' in INTERFACES['interfaces']['Ethernet1']
+
+
+def test_merge_projections():
+    merged = merge_projections({'interfaces': {'*': ['interfaceStatus']}},
+                               {'interfaces': {'*': ['mtu']}, 'updateTime': True})
+
+    assert project(INTERFACES, merged) == {
+        'interfaces': {
+            'Ethernet1': {'interfaceStatus': 'connected', 'mtu': 9214},
+            'Ethernet2': {'interfaceStatus': 'disabled', 'mtu': 1500}
+        },
+        'updateTime': 1562940525.1
+    }
+
+    assert merge_projections(['a'], None) is None
+    assert merge_projections(['a'], True) is True
+
+
+def test_covers():
+    status = {'interfaces': {'*': ['interfaceStatus']}}
+    status_mtu = {'interfaces': {'*': ['interfaceStatus', 'mtu']}}
+
+    assert covers(status_mtu, status)
+    assert not covers(status, status_mtu)
+    assert covers(status, status)
+
+
+def test_covers_whole_output():
+    status = {'interfaces': {'*': ['interfaceStatus']}}
+
+    # None keeps the whole output, which covers any projection, and is
+    # covered only by another None.
+
+    assert covers(None, status)
+    assert not covers(status, None)
+    assert covers(None, None)
+
+
+def test_covers_wildcard_and_listed_key():
+    assert covers({'*': ['a', 'b']}, {'x': ['a']})
+    assert not covers({'x': ['a']}, {'*': ['a']})
+    assert not covers(['a'], ['a', 'b'])
+
+    # a key listed only by the spec must also cover the other wildcard
+
+    assert covers({'x': True, '*': ['a']}, {'*': ['a']})
+    assert not covers({'x': ['b'], '*': ['a', 'b']}, {'*': ['a']})
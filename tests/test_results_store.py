@@ -0,0 +1,109 @@
+#  Copyright 2019 Jeremy Schulman, nwkautomaniac@gmail.com
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""
+Tests of the SQLite results store, see nrfupytesteos/results_store.py
+"""
+
+import pytest
+
+from nrfupytesteos.results_store import ResultsStore
+
+TEST_CASE = 'test-interface-status'
+
+
+def add_runs(store, runs):
+    """
+    Add the runs to the store; each run is a dict, key: test-case name,
+    value: verdict.
+    """
+    for verdicts in runs:
+        run_id = store.start_run('pytest')
+        for name, verdict in verdicts.items():
+            store.add(run_id, 'dev1', TEST_CASE, name, verdict, params={'interface': name})
+
+
+@pytest.fixture(params=[1, 1000], ids=['batch-per-result', 'one-batch'])
+def store(request, tmp_path):
+    # the verdict changes are the same whether the results of the runs are
+    # inserted one at a time, or all in one batch.
+
+    with ResultsStore(tmp_path / 'results.db', batch_size=request.param) as results_store:
+        yield results_store
+
+
+def test_no_flaps(store):
+    add_runs(store, [{'Ethernet1': 'pass'}, {'Ethernet1': 'pass'}])
+    assert store.flaps(runs=2) == []
+
+
+def test_flap_across_runs(store):
+    add_runs(store, [
+        {'Ethernet1': 'pass', 'Ethernet2': 'pass'},
+        {'Ethernet1': 'fail', 'Ethernet2': 'pass'},
+        {'Ethernet1': 'pass', 'Ethernet2': 'pass'}
+    ])
+
+    assert store.flaps(runs=3) == [('dev1', TEST_CASE, 'Ethernet1', ['pass', 'fail', 'pass'])]
+
+
+def test_change_before_window(store):
+    add_runs(store, [{'Ethernet1': 'pass'}, {'Ethernet1': 'fail'}, {'Ethernet1': 'fail'}])
+
+    # the change into the first run of the window is not a flap of the window
+
+    assert store.flaps(runs=2) == []
+    assert store.flaps(runs=3) == [('dev1', TEST_CASE, 'Ethernet1', ['pass', 'fail', 'fail'])]
+
+
+def test_flap_within_run(store):
+    # in watch mode a run has each verdict change of a test-case
+
+    add_runs(store, [{'Ethernet1': 'pass'}])
+    run_id = store.start_run('nrfu')
+    for verdict in ('fail', 'pass'):
+        store.add(run_id, 'dev1', TEST_CASE, 'Ethernet1', verdict)
+
+    assert store.flaps(runs=2) == [('dev1', TEST_CASE, 'Ethernet1', ['pass', 'fail', 'pass'])]
+
+
+def test_flaps_by_test_case(store):
+    add_runs(store, [{'Ethernet1': 'pass'}, {'Ethernet1': 'error'}])
+
+    run_id = store.runs(last=1)[0][0]
+    store.add(run_id, 'dev1', 'test-cabling', 'Ethernet1', 'pass')
+
+    assert store.flaps(runs=2, test_case='test-cabling') == []
+    assert [flap[1] for flap in store.flaps(runs=2)] == [TEST_CASE]
+
+
+def test_changes_recorded(store):
+    add_runs(store, [{'Ethernet1': 'pass'}, {'Ethernet1': 'fail'}, {'Ethernet1': 'fail'}])
+    store.flush()
+
+    changes = store.conn.execute('SELECT name, previous, verdict FROM changes').fetchall()
+    assert changes == [('Ethernet1', 'pass', 'fail')]
+
+    latest = store.conn.execute('SELECT name, verdict FROM latest').fetchall()
+    assert latest == [('Ethernet1', 'fail')]
+
+
+def test_history(store):
+    add_runs(store, [{'Ethernet1': 'pass'}, {'Ethernet1': 'fail'}])
+
+    history = list(store.history(dut='dev1', name='Ethernet1'))
+    assert [result['verdict'] for result in history] == ['pass', 'fail']
+    assert history[0]['params'] == {'interface': 'Ethernet1'}
+
+    assert [result['verdict'] for result in store.history(last=1)] == ['fail']
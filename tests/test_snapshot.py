@@ -0,0 +1,191 @@
+#  Copyright 2019 Jeremy Schulman, nwkautomaniac@gmail.com
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""
+Tests of the incremental test-case directory writer, see nrfupytesteos/snapshot.py
+"""
+
+import json
+import os
+
+from nrfupytesteos.snapshot import MANIFEST_FILE, diff_testcases, write_testcases_dir, update_store
+from nrfupytesteos.testcase_store import TestcaseStore
+from nrfupytesteos import snapshot
+from nrfupytesteos import nrfu_interface_status, nrfu_cabling
+
+
+def status_testcases(**states):
+    return [nrfu_interface_status.make_testcase('dev1', if_name, state)
+            for if_name, state in states.items()]
+
+
+def cabling_testcases(count):
+    return [nrfu_cabling.make_testcase('dev1', f'Ethernet{port}', 'spine1', f'Ethernet{port}/1')
+            for port in range(1, count + 1)]
+
+
+def manifest(snapshot_dir):
+    return json.loads((snapshot_dir / MANIFEST_FILE).read_text())
+
+
+def test_hash_ignores_key_order():
+    testcases = status_testcases(Ethernet1='up')
+    reordered = [dict(reversed(list(testcase.items()))) for testcase in testcases]
+
+    assert snapshot.testcases_hash(testcases) == snapshot.testcases_hash(reordered)
+    assert snapshot.testcases_hash(testcases) != snapshot.testcases_hash(status_testcases(Ethernet1='down'))
+
+
+def test_diff_testcases():
+    old = status_testcases(Ethernet1='up', Ethernet2='up')
+    new = status_testcases(Ethernet2='down', Ethernet3='up')
+
+    diff = diff_testcases(old, new)
+    assert [tc['params']['interface'] for tc in diff['added']] == ['Ethernet3']
+    assert [tc['params']['interface'] for tc in diff['removed']] == ['Ethernet1']
+    assert [tc['params']['interface'] for tc in diff['changed']] == ['Ethernet2']
+
+
+def test_write_new_dir(tmp_path):
+    snapshot_dir = tmp_path / 'dev1'
+    changes = write_testcases_dir(snapshot_dir, [
+        (nrfu_interface_status, status_testcases(Ethernet1='up', Ethernet2='down')),
+        (nrfu_cabling, [])
+    ])
+
+    assert changes == {'test-interface-status': {'added': 2, 'removed': 0, 'changed': 0}}
+    assert sorted(os.listdir(snapshot_dir)) == [MANIFEST_FILE, 'test-interface-status.json']
+
+    entry = manifest(snapshot_dir)['test-cases']['test-interface-status']
+    assert entry['count'] == 2
+    assert entry['hash'] == snapshot.testcases_hash(status_testcases(Ethernet1='up', Ethernet2='down'))
+
+
+def test_unchanged_files_are_not_rewritten(tmp_path):
+    snapshot_dir = tmp_path / 'dev1'
+    nrfu_testcases = [(nrfu_interface_status, status_testcases(Ethernet1='up')),
+                      (nrfu_cabling, cabling_testcases(2))]
+
+    write_testcases_dir(snapshot_dir, nrfu_testcases)
+    stats = {name: os.stat(snapshot_dir / name) for name in os.listdir(snapshot_dir)}
+
+    assert write_testcases_dir(snapshot_dir, nrfu_testcases) == {}
+    for name, stat in stats.items():
+        assert os.stat(snapshot_dir / name).st_mtime_ns == stat.st_mtime_ns
+
+    # only the changed file is written; the others keep their file and stamp
+
+    changes = write_testcases_dir(snapshot_dir, [
+        (nrfu_interface_status, status_testcases(Ethernet1='up')),
+        (nrfu_cabling, cabling_testcases(3))
+    ])
+
+    status_stat = os.stat(snapshot_dir / 'test-interface-status.json')
+
+    assert changes == {'test-cabling': {'added': 1, 'removed': 0, 'changed': 0}}
+    assert status_stat.st_ino == stats['test-interface-status.json'].st_ino
+
+    entries = manifest(snapshot_dir)['test-cases']
+    assert entries['test-interface-status']['stamp'] == [status_stat.st_mtime_ns, status_stat.st_size]
+    assert entries['test-cabling']['count'] == 3
+
+    assert manifest(snapshot_dir)['changes'] == changes
+    assert sorted(os.listdir(tmp_path)) == ['dev1']
+
+
+def test_edited_file_is_rewritten(tmp_path):
+    snapshot_dir = tmp_path / 'dev1'
+    nrfu_testcases = [(nrfu_interface_status, status_testcases(Ethernet1='up'))]
+    write_testcases_dir(snapshot_dir, nrfu_testcases)
+
+    # the file no longer matches the manifest stamp, so its hash is not reused
+
+    tc_file = snapshot_dir / 'test-interface-status.json'
+    tc_file.write_text(json.dumps(status_testcases(Ethernet1='down')))
+
+    changes = write_testcases_dir(snapshot_dir, nrfu_testcases)
+
+    assert changes == {'test-interface-status': {'added': 0, 'removed': 0, 'changed': 1}}
+    assert json.loads(tc_file.read_text()) == status_testcases(Ethernet1='up')
+
+
+def test_touched_file_is_not_rewritten(tmp_path):
+    snapshot_dir = tmp_path / 'dev1'
+    nrfu_testcases = [(nrfu_interface_status, status_testcases(Ethernet1='up'))]
+    write_testcases_dir(snapshot_dir, nrfu_testcases)
+
+    # a file with the same content but another stamp is hashed again, and only
+    # the manifest stamp is updated
+
+    tc_file = snapshot_dir / 'test-interface-status.json'
+    os.utime(tc_file, ns=(0, 0))
+
+    assert write_testcases_dir(snapshot_dir, nrfu_testcases) == {}
+    assert os.stat(tc_file).st_mtime_ns == 0
+    assert manifest(snapshot_dir)['test-cases']['test-interface-status']['stamp'][0] == 0
+
+
+def test_removed_set_deletes_file(tmp_path):
+    snapshot_dir = tmp_path / 'dev1'
+    write_testcases_dir(snapshot_dir, [(nrfu_cabling, cabling_testcases(2))])
+    (snapshot_dir / 'notes.txt').write_text('kept')
+
+    changes = write_testcases_dir(snapshot_dir, [(nrfu_cabling, [])])
+
+    assert changes == {'test-cabling': {'added': 0, 'removed': 2, 'changed': 0}}
+    assert sorted(os.listdir(snapshot_dir)) == [MANIFEST_FILE, 'notes.txt']
+    assert manifest(snapshot_dir)['test-cases'] == {}
+
+
+def test_stale_staging_dir(tmp_path):
+    snapshot_dir = tmp_path / 'dev1'
+    write_testcases_dir(snapshot_dir, [(nrfu_cabling, cabling_testcases(2))])
+
+    # the staging and backup directories of a run that stopped are removed
+
+    for stale_name in (f'.dev1.tmp{os.getpid()}', '.dev1.tmp1', '.dev1.old1'):
+        (tmp_path / stale_name).mkdir()
+        (tmp_path / stale_name / 'test-cabling.json').write_text('[]')
+
+    changes = write_testcases_dir(snapshot_dir, [(nrfu_cabling, cabling_testcases(3))])
+
+    assert changes == {'test-cabling': {'added': 1, 'removed': 0, 'changed': 0}}
+    assert sorted(os.listdir(tmp_path)) == ['dev1']
+
+
+def test_backup_dir_recovered(tmp_path):
+    snapshot_dir = tmp_path / 'dev1'
+    write_testcases_dir(snapshot_dir, [(nrfu_cabling, cabling_testcases(2))])
+
+    # a run that stopped between the renames of the swap left only the backup
+
+    snapshot_dir.rename(tmp_path / '.dev1.old1')
+    (tmp_path / '.dev1.tmp1').mkdir()
+
+    changes = write_testcases_dir(snapshot_dir, [(nrfu_cabling, cabling_testcases(3))])
+
+    assert changes == {'test-cabling': {'added': 1, 'removed': 0, 'changed': 0}}
+    assert sorted(os.listdir(tmp_path)) == ['dev1']
+    assert manifest(snapshot_dir)['test-cases']['test-cabling']['count'] == 3
+
+
+def test_update_store(tmp_path):
+    with TestcaseStore(tmp_path / 'testcases.db') as store:
+        nrfu_testcases = [(nrfu_cabling, cabling_testcases(2))]
+
+        assert update_store(store, 'dev1', nrfu_testcases) == {
+            'test-cabling': {'added': 2, 'removed': 0, 'changed': 0}
+        }
+        assert update_store(store, 'dev1', nrfu_testcases) == {}
+        assert list(store.iter(dut='dev1')) == cabling_testcases(2)
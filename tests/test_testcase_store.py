@@ -0,0 +1,73 @@
+#  Copyright 2019 Jeremy Schulman, nwkautomaniac@gmail.com
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""
+Tests of the SQLite test-case store, see nrfupytesteos/testcase_store.py
+"""
+
+import sqlite3
+
+import pytest
+
+from nrfupytesteos.testcase_store import TestcaseStore
+from nrfupytesteos import nrfu_interface_status
+
+TEST_CASE = nrfu_interface_status.TEST_CASE_NAME
+
+
+def status_testcases(dut, *if_names):
+    return [nrfu_interface_status.make_testcase(dut, if_name, 'up') for if_name in if_names]
+
+
+def test_put_and_iter(tmp_path):
+    with TestcaseStore(tmp_path / 'testcases.db') as store:
+        store.put('dev1', TEST_CASE, status_testcases('dev1', 'Ethernet1', 'Ethernet2'))
+        store.put('dev2', TEST_CASE, status_testcases('dev2', 'Ethernet1'))
+
+        # put replaces the test-cases of the device and type
+
+        store.put('dev1', TEST_CASE, status_testcases('dev1', 'Ethernet3'))
+
+        assert list(store.iter(dut='dev1')) == status_testcases('dev1', 'Ethernet3')
+        assert len(list(store.iter(test_case=TEST_CASE))) == 2
+
+
+def test_is_store(tmp_path):
+    json_file = tmp_path / 'test-cabling.json'
+    json_file.write_text('[]')
+
+    assert TestcaseStore.is_store(tmp_path / 'missing.db')
+    assert not TestcaseStore.is_store(tmp_path)
+    assert not TestcaseStore.is_store(json_file)
+
+
+def test_readonly(tmp_path):
+    path = tmp_path / 'testcases.db'
+    with TestcaseStore(path) as store:
+        store.put('dev1', TEST_CASE, status_testcases('dev1', 'Ethernet1'))
+
+    with TestcaseStore(path, readonly=True) as store:
+        assert list(store.iter(dut='dev1')) == status_testcases('dev1', 'Ethernet1')
+
+        with pytest.raises(sqlite3.OperationalError):
+            store.put('dev1', TEST_CASE, [])
+
+
+def test_readonly_missing_store(tmp_path):
+    path = tmp_path / 'missing.db'
+
+    with pytest.raises(FileNotFoundError):
+        TestcaseStore(path, readonly=True)
+
+    assert not path.exists()